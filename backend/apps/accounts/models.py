@@ -9,6 +9,8 @@ class User(AbstractUser):
     phone = models.CharField(max_length=20, blank=True)
     is_host = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Profile edits; listing validators include it because host name and avatar are embedded
+    updated_at = models.DateTimeField(auto_now=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.bookings.availability import stay_nights
+from apps.bookings.models import Booking, BookedNight
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the BookedNight occupancy table from pending and confirmed bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only report bookings whose stored nights are missing or stale')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        verify     = options['verify']
+        batch_size = options['batch_size']
+
+        # Earliest booking first: when two active bookings overlap (made before
+        # the unique constraint existed), the earlier one keeps the night.
+        bookings = (
+            Booking.objects.filter(status__in=Booking.ACTIVE_STATUSES).order_by('created_at', 'pk')
+            .values_list('pk', 'listing_id', 'check_in', 'check_out')
+        )
+        held, conflicts, rows = set(), [], []
+        for pk, listing_id, check_in, check_out in bookings.iterator(chunk_size=batch_size):
+            for night in stay_nights(check_in, check_out):
+                if (listing_id, night) in held:
+                    conflicts.append((pk, listing_id, night))
+                    continue
+                held.add((listing_id, night))
+                rows.append(BookedNight(booking_id=pk, listing_id=listing_id, night=night))
+
+        for pk, listing_id, night in conflicts[:50]:
+            self.stdout.write(self.style.WARNING(
+                f'  booking {pk}: listing {listing_id} on {night} is already held by an earlier booking'
+            ))
+        if len(conflicts) > 50:
+            self.stdout.write(self.style.WARNING(f'  … and {len(conflicts) - 50} more'))
+
+        if verify:
+            stored = set(BookedNight.objects.values_list('booking_id', 'listing_id', 'night').iterator(chunk_size=batch_size))
+            expected = {(r.booking_id, r.listing_id, r.night) for r in rows}
+            style = self.style.SUCCESS if stored == expected else self.style.WARNING
+            self.stdout.write(style(
+                f'{len(expected - stored)} nights missing, {len(stored - expected)} stale, '
+                f'{len(conflicts)} double-booked'
+            ))
+            return
+
+        with transaction.atomic():
+            BookedNight.objects.all().delete()
+            BookedNight.objects.bulk_create(rows, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Rebuilt {len(rows)} booked nights; {len(conflicts)} double-booked nights skipped'
+        ))
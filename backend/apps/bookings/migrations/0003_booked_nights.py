@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:44
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_booked_nights(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    BookedNight = apps.get_model('bookings', 'BookedNight')
+    rows = Booking.objects.filter(status__in=['pending', 'confirmed']).values_list(
+        'id', 'listing_id', 'check_in', 'check_out',
+    )
+    BookedNight.objects.bulk_create([
+        BookedNight(booking_id=pk, listing_id=listing_id, night=check_in + timedelta(days=i))
+        for pk, listing_id, check_in, check_out in rows.iterator()
+        for i in range((check_out - check_in).days)
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_indexes'),
+        ('listings', '0006_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookedNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('night', models.DateField()),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booked_nights', to='bookings.booking')),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booked_nights', to='listings.listing')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['listing', 'night'], name='bookednight_listing_idx'), models.Index(fields=['night', 'listing'], name='bookednight_night_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_booked_nights, migrations.RunPython.noop),
+    ]
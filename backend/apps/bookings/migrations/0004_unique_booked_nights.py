@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:53
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def drop_double_bookings(apps, schema_editor):
+    """
+    Nights held by more than one booking stay with the earliest booking (by
+    created_at, then id) — the same rule as `backfill_booked_nights`.
+    """
+    BookedNight = apps.get_model('bookings', 'BookedNight')
+    duplicates = (
+        BookedNight.objects.values('listing_id', 'night')
+        .annotate(n=Count('id')).filter(n__gt=1).values_list('listing_id', 'night')
+    )
+    for listing_id, night in list(duplicates):
+        held = BookedNight.objects.filter(listing_id=listing_id, night=night)
+        keep = held.order_by('booking__created_at', 'booking_id').values_list('pk', flat=True)[0]
+        held.exclude(pk=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_booked_nights'),
+        ('listings', '0006_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_double_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bookednight',
+            constraint=models.UniqueConstraint(fields=('listing', 'night'), name='bookednight_listing_night_uniq'),
+        ),
+        # The constraint's index covers (listing, night) lookups.
+        migrations.RemoveIndex(
+            model_name='bookednight',
+            name='bookednight_listing_idx',
+        ),
+    ]
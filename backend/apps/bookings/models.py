@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 
 
@@ -7,6 +7,8 @@ class Booking(models.Model):
         ('pending', 'Pending'), ('confirmed', 'Confirmed'),
         ('cancelled', 'Cancelled'), ('completed', 'Completed'),
     ]
+    # Statuses that hold the listing's nights
+    ACTIVE_STATUSES = ['pending', 'confirmed']
 
     listing    = models.ForeignKey('listings.Listing', on_delete=models.CASCADE, related_name='bookings')
     guest      = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='bookings')
@@ -22,10 +24,47 @@ class Booking(models.Model):
     class Meta:
         app_label = 'bookings'
         ordering = ['-created_at']
+        indexes = [
+            # Date-conflict check and availability lookups
+            models.Index(fields=['listing', 'status', 'check_in', 'check_out'], name='booking_listing_dates_idx'),
+            models.Index(fields=['guest', '-created_at'], name='booking_guest_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.guest.email} → {self.listing.title} ({self.check_in}→{self.check_out})"
 
+    def save(self, *args, **kwargs):
+        # apps.bookings.signals writes the BookedNight rows from post_save; one
+        # transaction means a night already taken rolls the booking back too.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     @property
     def nights(self):
         return (self.check_out - self.check_in).days
+
+
+class BookedNight(models.Model):
+    """
+    One night a pending or confirmed booking holds on its listing — the
+    occupancy table behind availability search. Maintained by
+    apps.bookings.signals; never edited directly. The unique (listing, night)
+    constraint is what makes double booking impossible: of two concurrent
+    bookings for the same night, the second insert fails.
+    """
+    listing = models.ForeignKey('listings.Listing', on_delete=models.CASCADE, related_name='booked_nights')
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='booked_nights')
+    night   = models.DateField()
+
+    class Meta:
+        app_label = 'bookings'
+        constraints = [
+            models.UniqueConstraint(fields=['listing', 'night'], name='bookednight_listing_night_uniq'),
+        ]
+        indexes = [
+            # Listings booked on any night of a range (covering: no table reads)
+            models.Index(fields=['night', 'listing'], name='bookednight_night_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.listing_id} @ {self.night}"
@@ -1,5 +1,9 @@
+from django.db import IntegrityError
 from rest_framework import serializers
-from .models import Booking
+from .availability import is_night_conflict
+from .models import Booking, BookedNight
+
+UNAVAILABLE = 'These dates are not available.'
 
 
 class BookingSerializer(serializers.ModelSerializer):
@@ -30,27 +34,38 @@ class BookingSerializer(serializers.ModelSerializer):
     def get_guest_avatar(self, obj):    return obj.guest.avatar
 
     def get_primary_image(self, obj):
-        img = obj.listing.images.filter(is_primary=True).first() or obj.listing.images.first()
-        return img.url if img else None
+        return obj.listing.primary_image
 
     def validate(self, data):
         ci, co = data.get('check_in'), data.get('check_out')
-        listing = data.get('listing')
+        listing = data.get('listing', getattr(self.instance, 'listing', None))
         if ci and co:
             if co <= ci:
                 raise serializers.ValidationError('Check-out must be after check-in.')
-            conflicts = Booking.objects.filter(
-                listing=listing, status__in=['pending', 'confirmed'],
-                check_in__lt=co, check_out__gt=ci
-            )
+            # A friendly early answer; the unique (listing, night) constraint is
+            # what actually rules out a concurrent booking of the same nights.
+            taken = BookedNight.objects.filter(listing=listing, night__gte=ci, night__lt=co)
             if self.instance:
-                conflicts = conflicts.exclude(pk=self.instance.pk)
-            if conflicts.exists():
-                raise serializers.ValidationError('These dates are not available.')
+                taken = taken.exclude(booking=self.instance)
+            if taken.exists():
+                raise serializers.ValidationError(UNAVAILABLE)
         return data
 
     def create(self, validated_data):
         listing = validated_data['listing']
         nights  = (validated_data['check_out'] - validated_data['check_in']).days
         validated_data['total_price'] = listing.price_per_night * nights
-        return super().create(validated_data)
+        try:
+            return super().create(validated_data)
+        except IntegrityError as e:
+            if is_night_conflict(e):
+                raise serializers.ValidationError(UNAVAILABLE)
+            raise
+
+    def update(self, instance, validated_data):
+        try:
+            return super().update(instance, validated_data)
+        except IntegrityError as e:
+            if is_night_conflict(e):
+                raise serializers.ValidationError(UNAVAILABLE)
+            raise
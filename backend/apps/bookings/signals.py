@@ -0,0 +1,18 @@
+"""Keep the BookedNight occupancy table in step with bookings."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.listings.cache import invalidate_availability
+from .availability import sync_booked_nights
+from .models import Booking
+
+
+@receiver(post_save, sender=Booking)
+def sync_nights(sender, instance, **kwargs):
+    invalidate_availability(sync_booked_nights(instance))
+
+
+@receiver(post_delete, sender=Booking)
+def release_nights(sender, instance, **kwargs):
+    # The nights themselves go with the booking (on_delete=CASCADE).
+    invalidate_availability([instance.listing_id])
@@ -0,0 +1,132 @@
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.bookings.availability import encode_calendar
+from apps.bookings.models import Booking
+from apps.listings.tests.utils import clear_caches, make_listing, make_user
+
+
+class EncodeCalendarTests(TestCase):
+    start, end = date(2031, 1, 1), date(2031, 1, 11)
+    nights = [date(2031, 1, 4), date(2031, 1, 5), date(2031, 1, 6), date(2031, 1, 9)]
+
+    def test_ranges_merge_adjacent_nights(self):
+        self.assertEqual(encode_calendar(self.nights, self.start, self.end), [
+            {'check_in': date(2031, 1, 4), 'check_out': date(2031, 1, 7)},
+            {'check_in': date(2031, 1, 9), 'check_out': date(2031, 1, 10)},
+        ])
+
+    def test_rle_starts_with_a_free_run(self):
+        self.assertEqual(encode_calendar(self.nights, self.start, self.end, 'rle'), '3,3,2,1,1')
+        self.assertEqual(encode_calendar([self.start], self.start, self.end, 'rle'), '0,1,9')
+        self.assertEqual(encode_calendar([], self.start, self.end, 'rle'), '10')
+
+    def test_bitset_has_one_character_per_night(self):
+        self.assertEqual(encode_calendar(self.nights, self.start, self.end, 'bitset'), '0001110010')
+
+
+class AvailabilityViewTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.listing = make_listing()
+        self.other = make_listing()
+        self.guest = make_user()
+        self.booking = self._book(self.listing, date(2031, 3, 3), date(2031, 3, 6))
+
+    def _book(self, listing, check_in, check_out):
+        return Booking.objects.create(
+            listing=listing, guest=self.guest, check_in=check_in, check_out=check_out,
+            total_price=300, status='confirmed',
+        )
+
+    def _get(self, params, **headers):
+        return self.client.get(f'/api/bookings/availability/{self.listing.id}/', params, headers=headers)
+
+    def test_encodings(self):
+        window = {'from': '2031-03-01', 'to': '2031-03-08'}
+        self.assertEqual(self._get(window).data, [{'check_in': date(2031, 3, 3), 'check_out': date(2031, 3, 6)}])
+        self.assertEqual(self._get({**window, 'encoding': 'rle'}).data['nights'], '2,3,2')
+        self.assertEqual(self._get({**window, 'encoding': 'bitset'}).data['nights'], '0011100')
+
+    def test_invalid_windows(self):
+        self.assertEqual(self._get({'encoding': 'png'}).status_code, 400)
+        self.assertEqual(self._get({'from': '2031-03-08', 'to': '2031-03-01'}).status_code, 400)
+        self.assertEqual(self._get({'from': '2031-01-01', 'to': '2032-06-01'}).status_code, 400)
+
+    def test_etag_follows_bookings(self):
+        window = {'from': '2031-03-01', 'to': '2031-03-31'}
+        etag = self._get(window)['ETag']
+        self.assertEqual(self._get(window, if_none_match=etag).status_code, 304)
+        # Written without any cache token changing, as from another worker.
+        with mock.patch('apps.bookings.signals.invalidate_availability'):
+            self._book(self.listing, date(2031, 3, 20), date(2031, 3, 22))
+        self.assertEqual(self._get(window, if_none_match=etag).status_code, 200)
+        etag = self._get(window)['ETag']
+        self.booking.status = 'cancelled'
+        self.booking.save()
+        self.assertEqual(self._get(window, if_none_match=etag).status_code, 200)
+
+    def test_default_window_etag_rolls_over_daily(self):
+        with mock.patch('django.utils.timezone.localdate', return_value=date(2031, 3, 1)):
+            etag = self._get({})['ETag']
+            self.assertEqual(self._get({}, if_none_match=etag).status_code, 304)
+        with mock.patch('django.utils.timezone.localdate', return_value=date(2031, 3, 2)):
+            self.assertEqual(self._get({}, if_none_match=etag).status_code, 200)
+
+    def test_batch_reads_every_listing_in_one_query(self):
+        self._book(self.other, date(2031, 3, 1), date(2031, 3, 2))
+        params = {'listings': f'{self.listing.id},{self.other.id}', 'from': '2031-03-01', 'to': '2031-03-08',
+                  'encoding': 'bitset'}
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/bookings/availability/', params)
+        self.assertEqual(response.data['listings'], {self.listing.id: '0011100', self.other.id: '1000000'})
+        self.assertEqual(self.client.get('/api/bookings/availability/', {'listings': 'a,b'}).status_code, 400)
+
+    def test_calendars_are_cached_until_a_booking_changes(self):
+        window = {'from': '2031-03-01', 'to': '2031-03-08', 'encoding': 'bitset'}
+        self._get(window)
+        with self.assertNumQueries(1):  # the ETag; the nights come from the cache
+            self.assertEqual(self._get(window).data['nights'], '0011100')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.status = 'cancelled'
+            self.booking.save()
+        self.assertEqual(self._get(window).data['nights'], '0000000')
+
+    def test_moving_a_booking_refreshes_both_calendars(self):
+        window = {'from': '2031-03-01', 'to': '2031-03-08', 'encoding': 'bitset'}
+        batch = {'listings': f'{self.listing.id},{self.other.id}', **window}
+        self.client.get('/api/bookings/availability/', batch)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.listing = self.other
+            self.booking.save()
+        response = self.client.get('/api/bookings/availability/', batch)
+        self.assertEqual(response.data['listings'], {self.listing.id: '0000000', self.other.id: '0011100'})
+
+    def test_inactive_and_unknown_listings(self):
+        self._get({})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing.is_active = False
+            self.listing.save()
+        self.assertEqual(self._get({}).status_code, 404)
+        self.assertEqual(self.client.get('/api/bookings/availability/999999/').status_code, 404)
+        params = {'listings': f'{self.listing.id},{self.other.id},999999'}
+        response = self.client.get('/api/bookings/availability/', params)
+        self.assertEqual(list(response.data['listings']), [self.other.id])
+        self.assertEqual(response.data['not_found'], [self.listing.id, 999999])
+
+    def test_batch_reads_only_the_misses_and_answers_304(self):
+        window = {'from': '2031-03-01', 'to': '2031-03-08', 'encoding': 'rle'}
+        self.client.get('/api/bookings/availability/', {'listings': str(self.listing.id), **window})
+        third = make_listing()
+        params = {'listings': f'{self.listing.id},{self.other.id},{third.id}', **window}
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/bookings/availability/', params)
+        self.assertEqual(response.data['listings'], {self.listing.id: '2,3,2', self.other.id: '7', third.id: '7'})
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/bookings/availability/', params,
+                                       headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
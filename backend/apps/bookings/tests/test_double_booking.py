@@ -0,0 +1,114 @@
+import threading
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.db.models import Count
+from django.utils import timezone
+from django.test import TestCase, TransactionTestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from apps.bookings.models import Booking, BookedNight
+from apps.bookings.serializers import BookingSerializer
+from apps.listings.tests.utils import clear_caches, make_listing, make_user
+
+
+class BookingConflictTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.listing = make_listing()
+        self.client = APIClient()
+        self.client.force_authenticate(make_user())
+
+    def _post(self, check_in, check_out):
+        return self.client.post('/api/bookings/', {
+            'listing': self.listing.id, 'check_in': check_in, 'check_out': check_out, 'guests': 1,
+        })
+
+    def test_overlapping_booking_is_refused(self):
+        self.assertEqual(self._post('2031-05-01', '2031-05-04').status_code, 201)
+        response = self._post('2031-05-03', '2031-05-05')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('These dates are not available.', str(response.data))
+        self.assertEqual(self._post('2031-05-04', '2031-05-06').status_code, 201)  # back to back
+
+    def test_constraint_refuses_what_the_precheck_misses(self):
+        self.assertEqual(self._post('2031-05-01', '2031-05-04').status_code, 201)
+        serializer = BookingSerializer(data={
+            'listing': self.listing.id, 'check_in': '2031-05-02', 'check_out': '2031-05-03', 'guests': 1,
+        })
+        BookedNight.objects.all().delete()  # validate() sees free nights...
+        self.assertTrue(serializer.is_valid())
+        self._post('2031-05-01', '2031-05-04')  # ...until another booking takes them first
+        with self.assertRaises(ValidationError):
+            serializer.save(guest=make_user())
+        self.assertEqual(BookedNight.objects.filter(night=date(2031, 5, 2)).count(), 1)
+
+    def test_backfill_keeps_the_earliest_booking(self):
+        # Overlapping bookings from before the constraint; bulk_create skips the signals.
+        later, earlier = Booking.objects.bulk_create([
+            Booking(listing=self.listing, guest=make_user(), check_in=date(2031, 6, 1),
+                    check_out=date(2031, 6, 3), total_price=200, status='confirmed')
+            for _ in range(2)
+        ])
+        Booking.objects.filter(pk=earlier.pk).update(created_at=timezone.now() - timedelta(days=1))
+        call_command('backfill_booked_nights', stdout=StringIO())
+        self.assertEqual(set(BookedNight.objects.values_list('booking_id', flat=True)), {earlier.pk})
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """Several requests race for the same nights; at most one may win each round."""
+    threads = 6
+    rounds = 5
+
+    def setUp(self):
+        clear_caches()
+        self.listing = make_listing()
+        self.guests = [make_user() for _ in range(self.threads)]
+
+    def _race(self, check_in, check_out):
+        barrier = threading.Barrier(self.threads)
+        results = [None] * self.threads
+
+        def attempt(i):
+            try:
+                serializer = BookingSerializer(data={
+                    'listing': self.listing.pk, 'check_in': check_in, 'check_out': check_out, 'guests': 1,
+                })
+                valid = serializer.is_valid()
+                try:
+                    barrier.wait(timeout=30)  # everyone has validated; all write at once
+                except threading.BrokenBarrierError:
+                    pass
+                if not valid:
+                    raise ValidationError(serializer.errors)
+                serializer.save(guest=self.guests[i])
+                results[i] = 'ok'
+            except ValidationError:
+                results[i] = 'conflict'
+            except DatabaseError:
+                results[i] = 'error'  # e.g. SQLite's "database is locked" under write contention
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=attempt, args=(i,)) for i in range(self.threads)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        return results
+
+    def test_no_night_is_booked_twice(self):
+        start = date(2031, 9, 1)
+        for r in range(self.rounds):
+            check_in = start + timedelta(days=r * 4)
+            results = self._race(check_in, check_in + timedelta(days=3))
+            self.assertLessEqual(results.count('ok'), 1, results)
+
+        self.assertTrue(Booking.objects.exists())
+        doubles = BookedNight.objects.values('listing', 'night').annotate(n=Count('id')).filter(n__gt=1)
+        self.assertFalse(doubles.exists())
+        for booking in Booking.objects.all():
+            self.assertEqual(booking.booked_nights.count(), booking.nights)
@@ -6,5 +6,6 @@ urlpatterns = [
     path('<int:pk>/',                     views.BookingDetailView.as_view(),     name='booking-detail'),
     path('<int:pk>/cancel/',              views.cancel_booking,                  name='booking-cancel'),
     path('<int:pk>/confirm/',             views.confirm_booking,                 name='booking-confirm'),
+    path('availability/',                 views.batch_availability,              name='booking-availability-batch'),
     path('availability/<int:listing_id>/',views.booking_availability,            name='booking-availability'),
 ]
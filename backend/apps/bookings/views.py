@@ -1,6 +1,10 @@
+from django.utils import timezone
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from apps.listings.conditional import availability_condition, etag_response
+from apps.listings.pagination import BookingPagination
+from . import availability
 from .models import Booking
 from .serializers import BookingSerializer
 
@@ -8,6 +12,7 @@ from .serializers import BookingSerializer
 class BookingListCreateView(generics.ListCreateAPIView):
     serializer_class   = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class   = BookingPagination
 
     def get_queryset(self):
         return Booking.objects.filter(guest=self.request.user).select_related('listing', 'guest')
@@ -34,7 +39,7 @@ def cancel_booking(request, pk):
     if booking.status not in ('pending', 'confirmed'):
         return Response({'error': 'Cannot cancel this booking.'}, status=400)
     booking.status = 'cancelled'
-    booking.save()
+    booking.save()  # releases its nights in the same transaction (apps.bookings.signals)
     return Response(BookingSerializer(booking).data)
 
 
@@ -53,12 +58,64 @@ def confirm_booking(request, pk):
     return Response(BookingSerializer(booking).data)
 
 
+MAX_BATCH_LISTINGS = 100
+
+
+def _window(request):
+    return availability.calendar_window(request.GET, timezone.localdate())
+
+
 @api_view(['GET'])
-@permission_classes([permissions.IsAuthenticated])
+@permission_classes([permissions.AllowAny])
+@availability_condition
 def booking_availability(request, listing_id):
-    """Return booked date ranges for a listing."""
-    bookings = Booking.objects.filter(
-        listing_id=listing_id,
-        status__in=['pending', 'confirmed']
-    ).values('check_in', 'check_out')
-    return Response(list(bookings))
+    """
+    Booked nights of a listing between `from` (default today) and `to`
+    (default 180 nights later). `encoding=ranges` (default) is the list of
+    booked {check_in, check_out} ranges; `rle` and `bitset` return the same
+    window as one compact string — see apps.bookings.availability. The
+    ETag covers the resolved window, so a default window rolls over daily.
+    Inactive or unknown listings are 404.
+    """
+    try:
+        start, end, fmt = _window(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    nights = availability.calendar_nights([listing_id], start, end)
+    if listing_id not in nights:
+        return Response({'error': 'Not found.'}, status=404)
+    calendar = availability.encode_calendar(nights[listing_id], start, end, fmt)
+    if fmt == 'ranges':
+        return Response(calendar)
+    return Response({'listing': listing_id, 'from': start, 'to': end, 'encoding': fmt, 'nights': calendar})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def batch_availability(request):
+    """
+    Calendars for `listings=1,2,3` (up to MAX_BATCH_LISTINGS) with the same
+    window and encodings. Cached calendars are reused and the rest read in
+    one query; ids of inactive or unknown listings are listed under
+    `not_found`. The ETag hashes the window and the calendars themselves.
+    """
+    try:
+        listing_ids = list(dict.fromkeys(int(v) for v in request.GET.get('listings', '').split(',') if v.strip()))
+    except ValueError:
+        return Response({'error': 'listings must be a comma-separated list of ids.'}, status=400)
+    if not listing_ids or len(listing_ids) > MAX_BATCH_LISTINGS:
+        return Response({'error': f'Give between 1 and {MAX_BATCH_LISTINGS} listing ids.'}, status=400)
+    try:
+        start, end, fmt = _window(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    nights = availability.calendar_nights(listing_ids, start, end)
+    data = {
+        'from':      start,
+        'to':        end,
+        'encoding':  fmt,
+        'listings':  {pk: availability.encode_calendar(nights[pk], start, end, fmt)
+                      for pk in listing_ids if pk in nights},
+        'not_found': [pk for pk in listing_ids if pk not in nights],
+    }
+    return etag_response(request, Response(data), (start, end, fmt, sorted(nights.items())))
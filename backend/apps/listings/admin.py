@@ -153,6 +153,7 @@ class ListingAdmin(admin.ModelAdmin):
         'rating_readonly', 'review_count_readonly', 'primary_image_preview',
     ]
     inlines    = [ListingImageInline]
+    list_select_related = ['host']
     save_on_top = True
     list_per_page = 20
 
@@ -0,0 +1,115 @@
+"""
+Response cache for anonymous listing reads.
+
+Cache keys embed version tokens: one global token for list pages and one
+per listing for detail pages. Writes to a Listing, its images or its
+reviews replace those tokens, so stale entries become unreachable at once
+and simply age out of the backend. Booking writes replace a separate
+availability token, which only date-filtered searches depend on, and the
+calendar token of each listing they touch, which keys its cached booked
+nights together with the listing's detail token.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+GLOBAL_VERSION_KEY  = 'listings:ver'
+LISTING_VERSION_KEY = 'listings:ver:{pk}'
+AVAILABILITY_VERSION_KEY = 'bookings:availability:ver'
+CALENDAR_VERSION_KEY = 'bookings:availability:ver:{pk}'
+
+
+def get_cache():
+    return caches[getattr(settings, 'LISTING_CACHE_ALIAS', 'default')]
+
+
+def cache_timeout():
+    return getattr(settings, 'LISTING_CACHE_TIMEOUT', 300)
+
+
+def _version(key):
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        # A fresh token rather than a counter: an evicted counter restarting
+        # at 1 could resurrect entries written under the old value.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def global_version():
+    return _version(GLOBAL_VERSION_KEY)
+
+
+def listing_version(pk):
+    return _version(LISTING_VERSION_KEY.format(pk=pk))
+
+
+def availability_version():
+    return _version(AVAILABILITY_VERSION_KEY)
+
+
+def normalized_query(request):
+    """Query string with sorted keys/values and empty parameters dropped."""
+    items = sorted(
+        (k, v) for k, values in request.GET.lists() for v in values if v != ''
+    )
+    return urlencode(items)
+
+
+def list_cache_key(request):
+    # Host is part of the key because paginated responses carry absolute links.
+    raw = f'{request.get_host()}{request.path}?{normalized_query(request)}'
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    key = f'listings:list:{global_version()}:{digest}'
+    if 'check_in' in request.GET or 'check_out' in request.GET:
+        # Date-filtered pages also go stale when a booking takes or frees a night.
+        key += f':{availability_version()}'
+    return key
+
+
+def detail_cache_key(pk):
+    return f'listings:detail:{pk}:{listing_version(pk)}'
+
+
+def calendar_cache_keys(listing_ids, start, end):
+    """{pk: key of the listing's booked nights in [start, end)}, reading every token in one round trip."""
+    tokens = {
+        pk: (LISTING_VERSION_KEY.format(pk=pk), CALENDAR_VERSION_KEY.format(pk=pk)) for pk in listing_ids
+    }
+    found = get_cache().get_many([key for pair in tokens.values() for key in pair])
+    return {
+        pk: f'bookings:calendar:{pk}:{start}:{end}:' + ':'.join(
+            str(found[key] if key in found else _version(key)) for key in pair
+        )
+        for pk, pair in tokens.items()
+    }
+
+
+def invalidate_listings(listing_ids=()):
+    """Retire the global list token and the detail tokens of `listing_ids` once the transaction commits."""
+    listing_ids = list(listing_ids)
+
+    def bump():
+        cache = get_cache()
+        cache.set_many({LISTING_VERSION_KEY.format(pk=pk): time.time_ns() for pk in listing_ids}, None)
+        cache.set(GLOBAL_VERSION_KEY, time.time_ns(), None)
+
+    transaction.on_commit(bump)
+
+
+def invalidate_availability(listing_ids=()):
+    """Retire the availability token and the calendar tokens of `listing_ids` once the transaction commits."""
+    listing_ids = list(listing_ids)
+
+    def bump():
+        cache = get_cache()
+        cache.set_many({CALENDAR_VERSION_KEY.format(pk=pk): time.time_ns() for pk in listing_ids}, None)
+        cache.set(AVAILABILITY_VERSION_KEY, time.time_ns(), None)
+
+    transaction.on_commit(bump)
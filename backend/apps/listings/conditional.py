@@ -0,0 +1,90 @@
+"""
+Conditional GET support (ETag / Last-Modified).
+
+Validators come from one cheap aggregate query per request, evaluated
+before the view body, so a matching If-None-Match / If-Modified-Since is
+answered with 304 without touching the serializers.
+"""
+import hashlib
+
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
+
+from apps.bookings import availability
+from .models import Listing
+
+
+def conditional_on(state_func):
+    """
+    Build a `condition` decorator from `state_func(request, *args, **kwargs)`,
+    which returns a tuple whose first item is the last-modified datetime,
+    or None when the resource does not exist. The ETag hashes the whole tuple.
+    """
+    def state(request, *args, **kwargs):
+        if not hasattr(request, '_conditional_state'):
+            request._conditional_state = state_func(request, *args, **kwargs)
+        return request._conditional_state
+
+    def etag(request, *args, **kwargs):
+        s = state(request, *args, **kwargs)
+        return hashlib.md5(repr(s).encode()).hexdigest() if s else None
+
+    def last_modified(request, *args, **kwargs):
+        s = state(request, *args, **kwargs)
+        return s[0] if s else None
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def _listing_state(request, pk, **kwargs):
+    # Image and review writes touch Listing.updated_at, so the row covers them;
+    # the embedded host name and avatar change with the host's updated_at.
+    row = (
+        Listing.objects.filter(pk=pk).with_host_summary()
+        .values_list('updated_at', 'host__updated_at', 'review_count', 'host_listing_count').first()
+    )
+    return (max(row[0], row[1]),) + row if row else None
+
+
+def _listing_reviews_state(request, listing_pk, **kwargs):
+    # Review writes touch Listing.updated_at; the embedded author names and
+    # avatars change with each author's updated_at.
+    row = (
+        Listing.objects.filter(pk=listing_pk)
+        .annotate(authors_updated_at=Max('reviews__author__updated_at'))
+        .values_list('updated_at', 'authors_updated_at', 'review_count').first()
+    )
+    if not row:
+        return None
+    return (max(row[0], row[1] or row[0]),) + row + (request.GET.urlencode(),)
+
+
+def etag_response(request, response, state):
+    """
+    Set an ETag hashed from `state` on `response`, or answer 304 when the
+    request already holds it — for views whose validator is only known once
+    their data has been read.
+    """
+    etag = quote_etag(hashlib.md5(repr(state).encode()).hexdigest())
+    response['ETag'] = etag
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def _availability_state(request, listing_id, **kwargs):
+    # Keyed on the resolved window rather than the query string: `from`
+    # defaults to today. Nights are deleted and re-inserted, never updated,
+    # so there is no Last-Modified.
+    try:
+        start, end, fmt = availability.calendar_window(request.GET, timezone.localdate())
+    except ValueError:
+        return None  # the view answers 400
+    version = availability.calendar_version(listing_id, start, end)
+    return (None, start, end, fmt) + version if version else None  # None: the view answers 404
+
+
+listing_condition         = conditional_on(_listing_state)
+listing_reviews_condition = conditional_on(_listing_reviews_state)
+availability_condition    = conditional_on(_availability_state)
@@ -1,4 +1,10 @@
 import django_filters
+from django.db.models import F
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import SearchFilter
+from apps.bookings import availability
+from apps.search import fts
+from . import geo
 from .models import Listing
 
 
@@ -9,6 +15,14 @@ class ListingFilter(django_filters.FilterSet):
     min_bedrooms = django_filters.NumberFilter(field_name='bedrooms',        lookup_expr='gte')
     city         = django_filters.CharFilter(lookup_expr='icontains')
     country      = django_filters.CharFilter(lookup_expr='icontains')
+    # ?bbox=west,south,east,north  and  ?near=lat,lng&radius_km=10 (no cap with ordering=distance)
+    bbox         = django_filters.CharFilter(method='filter_bbox')
+    near         = django_filters.CharFilter(method='filter_near')
+    # ?amenities=wifi,pool,ac — see Listing.AMENITIES for the slugs
+    amenities    = django_filters.CharFilter(method='filter_amenities')
+    # ?check_in=2026-07-01&check_out=2026-07-05 — only listings free for every night
+    check_in     = django_filters.CharFilter(method='filter_available')
+    check_out    = django_filters.CharFilter(method='filter_available')
 
     class Meta:
         model = Listing
@@ -17,5 +31,57 @@ class ListingFilter(django_filters.FilterSet):
             'min_price', 'max_price', 'min_guests', 'min_bedrooms',
             'has_wifi', 'has_kitchen', 'has_parking', 'has_pool',
             'has_ac', 'has_washer', 'has_tv', 'has_gym',
-            'has_workspace', 'has_fireplace', 'has_bbq',
+            'has_workspace', 'has_fireplace', 'has_bbq', 'has_ev_charger',
         ]
+
+    def filter_bbox(self, queryset, name, value):
+        try:
+            south, west, north, east = geo.parse_bbox(value)
+        except ValueError as e:
+            raise ValidationError({'bbox': str(e)})
+        return queryset.filter(geo.bbox_q(south, west, north, east))
+
+    def filter_near(self, queryset, name, value):
+        try:
+            lat, lng = geo.parse_point(value)
+            radius = geo.near_radius(self.data)
+        except ValueError as e:
+            raise ValidationError({'near': str(e)})
+        if radius is None:
+            return queryset.annotate(distance_km=geo.distance_expression(lat, lng))
+        # Geohash/box prefilter on the index, then exact haversine on the candidates.
+        return (
+            queryset.filter(geo.bbox_q(*geo.bbox_around(lat, lng, radius)))
+            .annotate(distance_km=geo.distance_expression(lat, lng))
+            .filter(distance_km__lte=radius)
+        )
+
+    def filter_amenities(self, queryset, name, value):
+        try:
+            required = Listing.amenity_bits(s.strip() for s in value.split(',') if s.strip())
+        except ValueError as e:
+            raise ValidationError({'amenities': str(e)})
+        if not required:
+            return queryset
+        # One predicate instead of a WHERE clause per amenity: mask & required = required.
+        # A bitwise test is checked row by row; no index on amenity_mask can serve it.
+        return queryset.alias(_amenities=F('amenity_mask').bitand(required)).filter(_amenities=required)
+
+    def filter_available(self, queryset, name, value):
+        if name == 'check_out' and self.data.get('check_in'):
+            return queryset  # applied once, from check_in
+        try:
+            check_in, check_out = availability.parse_stay(self.data.get('check_in'), self.data.get('check_out'))
+        except ValueError as e:
+            raise ValidationError({name: str(e)})
+        return availability.filter_available(queryset, check_in, check_out)
+
+
+class ListingSearchFilter(SearchFilter):
+    """`?search=` through the SQLite FTS index when it is installed, else DRF's LIKE scan."""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms or not fts.available(queryset.db):
+            return super().filter_queryset(request, queryset, view)
+        return fts.text_search(queryset, ' '.join(terms))
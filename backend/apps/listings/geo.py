@@ -0,0 +1,210 @@
+"""
+Geohash helpers for viewport (bbox) and radius (near) search.
+
+Every listing with coordinates stores its precision-9 geohash in the
+indexed `Listing.geohash` column. A bounding box is covered by a handful
+of coarser cells; because a cell's geohash is a prefix of every geohash
+inside it, each cell becomes an index range scan
+(`geohash >= 'u09t' AND geohash < 'u09u'`). Candidates are then refined
+exactly on latitude/longitude, or by haversine distance for radius search.
+
+`near` without `radius_km` caps results at DEFAULT_RADIUS_KM, except when
+they are only sorted by distance (`ordering=distance`): then every listing
+is kept, nearest first, unless a radius is given explicitly.
+"""
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+MAX_COVER_CELLS = 32
+DEFAULT_RADIUS_KM = 10
+MAX_RADIUS_KM = 500
+
+
+def encode(lat, lng, precision=GEOHASH_PRECISION):
+    lat, lng = float(lat), float(lng)
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, ch, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                ch, lng_lo = (ch << 1) | 1, mid
+            else:
+                ch, lng_hi = ch << 1, mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch, lat_lo = (ch << 1) | 1, mid
+            else:
+                ch, lat_hi = ch << 1, mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[ch])
+            bits, ch = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(height, width) of a geohash cell in degrees."""
+    total = 5 * precision
+    lng_bits = (total + 1) // 2
+    lat_bits = total // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def _steps(lo, hi, step):
+    n = int((hi - lo) / step) + 1
+    return [lo + i * step for i in range(n)] + [hi]
+
+
+def cover_bbox(south, west, north, east, max_cells=MAX_COVER_CELLS):
+    """
+    Geohash cells covering the box, at the finest precision that needs at
+    most `max_cells` cells. `west > east` means the box crosses the antimeridian.
+    """
+    if west > east:
+        return sorted(set(cover_bbox(south, west, north, 180.0, max_cells // 2)) |
+                      set(cover_bbox(south, -180.0, north, east, max_cells // 2)))
+
+    precision = 0
+    while precision < GEOHASH_PRECISION:
+        h, w = cell_size(precision + 1)
+        if (int((north - south) / h) + 2) * (int((east - west) / w) + 2) > max_cells:
+            break
+        precision += 1
+    if precision == 0:
+        return ['']  # the whole world
+
+    h, w = cell_size(precision)
+    # Sampling at exactly the cell pitch (plus the far edges) lands in every cell row/column.
+    return sorted({
+        encode(lat, lng, precision)
+        for lat in _steps(south, north, h)
+        for lng in _steps(west, east, w)
+    })
+
+
+def _successor(cell):
+    """Smallest geohash string greater than every hash inside `cell`, or None at the end."""
+    n = 0
+    for c in cell:
+        n = n * 32 + BASE32.index(c)
+    n += 1
+    if n >= 32 ** len(cell):
+        return None
+    out = []
+    for _ in cell:
+        n, r = divmod(n, 32)
+        out.append(BASE32[r])
+    return ''.join(reversed(out))
+
+
+def cells_q(cells, field='geohash'):
+    """OR of index range predicates for `cells`, merging runs of adjacent cells."""
+    if '' in cells:
+        return Q(**{f'{field}__gt': ''})
+    ranges = []
+    for cell in sorted(cells):
+        if ranges and ranges[-1][1] == cell:
+            ranges[-1][1] = _successor(cell)
+        else:
+            ranges.append([cell, _successor(cell)])
+    q = Q()
+    for start, stop in ranges:
+        term = Q(**{f'{field}__gte': start})
+        if stop is not None:
+            term &= Q(**{f'{field}__lt': stop})
+        q |= term
+    return q
+
+
+def bbox_q(south, west, north, east):
+    """Index-backed cell prefilter plus exact coordinate refinement for a box."""
+    lng_q = (Q(longitude__gte=west, longitude__lte=east) if west <= east
+             else Q(longitude__gte=west) | Q(longitude__lte=east))
+    return (cells_q(cover_bbox(south, west, north, east))
+            & Q(latitude__gte=south, latitude__lte=north) & lng_q)
+
+
+def bbox_around(lat, lng, radius_km):
+    """(south, west, north, east) of the box enclosing a circle."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    south, north = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    cos_lat = math.cos(math.radians(max(abs(south), abs(north))))
+    if cos_lat < 1e-6 or radius_km / (EARTH_RADIUS_KM * cos_lat) >= math.pi:
+        return south, -180.0, north, 180.0
+    dlng = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    west, east = lng - dlng, lng + dlng
+    if west < -180.0:
+        west += 360.0
+    if east > 180.0:
+        east -= 360.0
+    return south, west, north, east
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+def distance_expression(lat, lng):
+    """Haversine distance in km from (lat, lng) to each row, as an ORM expression."""
+    rlat, rlng = math.radians(lat), math.radians(lng)
+    row_lat = Radians(Cast(F('latitude'), FloatField()))
+    row_lng = Radians(Cast(F('longitude'), FloatField()))
+    a = (Power(Sin((row_lat - Value(rlat)) / 2), 2)
+         + Value(math.cos(rlat)) * Cos(row_lat) * Power(Sin((row_lng - Value(rlng)) / 2), 2))
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a))
+
+
+def parse_bbox(value):
+    """
+    Parse 'west,south,east,north' (Leaflet's `bounds.toBBoxString()` order)
+    into (south, west, north, east).
+    """
+    try:
+        west, south, east, north = (float(v) for v in value.split(','))
+    except ValueError:
+        raise ValueError('bbox must be "west,south,east,north".')
+    if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError('bbox is out of range.')
+    return south, west, north, east
+
+
+def parse_point(value):
+    """Parse 'lat,lng'."""
+    try:
+        lat, lng = (float(v) for v in value.split(','))
+    except ValueError:
+        raise ValueError('Point must be "lat,lng".')
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError('Point is out of range.')
+    return lat, lng
+
+
+def parse_radius(value):
+    if value in (None, ''):
+        return DEFAULT_RADIUS_KM
+    try:
+        radius = float(value)
+    except ValueError:
+        raise ValueError('radius_km must be a number.')
+    if not 0 < radius <= MAX_RADIUS_KM:
+        raise ValueError(f'radius_km must be between 0 and {MAX_RADIUS_KM}.')
+    return radius
+
+
+def near_radius(params):
+    """The radius cap of a `near` search, or None for an uncapped `ordering=distance`."""
+    from .pagination import DISTANCE_ORDERING
+    if params.get('ordering') == DISTANCE_ORDERING and params.get('radius_km') in (None, ''):
+        return None
+    return parse_radius(params.get('radius_km'))
@@ -0,0 +1,100 @@
+import re
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.request import Request
+
+from apps.bookings.models import Booking, BookedNight
+from apps.listings.models import Listing
+from apps.listings.views import ListingListCreateView
+from apps.reviews.models import Review
+
+# Plan lines that mean "read the whole table", per backend.
+FULL_SCAN = {
+    'sqlite':     re.compile(r'\bSCAN (\w+)$'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+TEMP_SORT = re.compile(r'USE TEMP B-TREE|Sort Key', re.IGNORECASE)
+
+
+def listing_list_queryset(params):
+    """The queryset GET /api/listings/?<params> runs: the view's own queryset and filter backends."""
+    view = ListingListCreateView()
+    view.request = Request(RequestFactory().get('/api/listings/', params))
+    view.format_kwarg = None
+    return view.filter_queryset(view.get_queryset())
+
+
+def canonical_queries():
+    """(endpoint, queryset) pairs mirroring the hot queries each endpoint issues."""
+    now = timezone.now()
+    ci, co = date.today(), date.today() + timedelta(days=3)
+    return [
+        ('GET /api/listings/ (newest)',
+         listing_list_queryset({})[:13]),
+        ('GET /api/listings/?ordering=price_per_night',
+         listing_list_queryset({'ordering': 'price_per_night'})[:13]),
+        ('GET /api/listings/?pagination=cursor (page 2)',
+         listing_list_queryset({}).filter(Q(created_at__lt=now) | Q(created_at=now, pk__lt=1000))
+         .order_by('-created_at', '-pk')[:13]),
+        ('GET /api/listings/?property_type=&min_price=&max_price=',
+         listing_list_queryset({'property_type': 'villa', 'min_price': 100, 'max_price': 500})[:13]),
+        ('GET /api/listings/?country=&city=',
+         listing_list_queryset({'country': 'Italy', 'city': 'Florence'})[:13]),
+        ('GET /api/listings/?bbox=',
+         listing_list_queryset({'bbox': '2.20,48.80,2.45,48.95'})[:13]),
+        ('GET /api/listings/?check_in=&check_out=',
+         listing_list_queryset({'check_in': ci.isoformat(), 'check_out': co.isoformat()})[:13]),
+        ('ListingSerializer host listing count',
+         Listing.objects.filter(host_id=1).order_by()),
+        ('POST /api/bookings/ conflict check',
+         BookedNight.objects.filter(listing_id=1, night__gte=ci, night__lt=co).order_by()),
+        ('GET /api/bookings/availability/<id>/',
+         BookedNight.objects.filter(listing_id=1, night__gte=ci, night__lt=co + timedelta(days=180))
+         .order_by('listing_id', 'night').values('listing_id', 'night')),
+        ('GET /api/bookings/',
+         Booking.objects.filter(guest_id=1).order_by('-created_at')),
+        ('GET /api/reviews/listings/<id>/reviews/',
+         Review.objects.filter(listing_id=1).order_by('-created_at')),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the canonical query of each hot endpoint and flag full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fail-on-scan', action='store_true',
+                            help='Exit with an error if any query plans a full table scan')
+        parser.add_argument('--verbose-plans', action='store_true',
+                            help='Print the full plan of every query, not only flagged ones')
+
+    def handle(self, *args, **options):
+        pattern = FULL_SCAN.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f'No plan checks for the {connection.vendor} backend.')
+
+        scans = 0
+        for name, qs in canonical_queries():
+            plan = qs.explain()
+            lines = [line.strip() for line in plan.splitlines() if line.strip()]
+            full = [m.group(1) for m in (pattern.search(line) for line in lines) if m]
+            sorts = any(TEMP_SORT.search(line) for line in lines)
+
+            if full:
+                scans += 1
+                self.stdout.write(self.style.ERROR(f'✗ {name}: full scan of {", ".join(full)}'))
+            elif sorts:
+                self.stdout.write(self.style.WARNING(f'~ {name}: indexed, but sorts in a temp structure'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {name}'))
+            if full or options['verbose_plans']:
+                for line in lines:
+                    self.stdout.write(f'      {line}')
+
+        if scans and options['fail_on_scan']:
+            raise CommandError(f'{scans} queries plan a full table scan')
+        self.stdout.write(f'{scans} full scans found')
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from apps.listings.models import Listing
+from apps.reviews.models import Review
+
+
+class Command(BaseCommand):
+    help = 'Rebuild (or verify) the stored review aggregates on every listing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only report listings whose stored aggregates are stale')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        verify     = options['verify']
+        batch_size = options['batch_size']
+        fields     = Listing.RATING_AGGREGATE_FIELDS
+
+        checked = stale = 0
+        batch = []
+        for row in Listing.objects.order_by('pk').values('pk', *fields).iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                stale += self._process(batch, fields, verify)
+                checked += len(batch)
+                batch = []
+        if batch:
+            stale += self._process(batch, fields, verify)
+            checked += len(batch)
+
+        if verify:
+            style = self.style.SUCCESS if not stale else self.style.WARNING
+            self.stdout.write(style(f'{stale} of {checked} listings have stale rating aggregates'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt rating aggregates: {stale} of {checked} listings updated'))
+
+    def _process(self, batch, fields, verify):
+        """Compare one batch against a single grouped aggregate query; return the stale count."""
+        rows = {
+            r['listing_id']: r for r in
+            Review.objects.filter(listing_id__in=[b['pk'] for b in batch]).listing_aggregates()
+        }
+        stale = []
+        for current in batch:
+            expected = Listing.rating_aggregate_values(rows.get(current['pk']))
+            if any(current[f] != expected[f] for f in fields):
+                stale.append(Listing(pk=current['pk'], **expected))
+                if verify:
+                    self.stdout.write(f"  listing {current['pk']}: "
+                                      f"stored {[current[f] for f in fields]} != {[expected[f] for f in fields]}")
+        if stale and not verify:
+            Listing.objects.bulk_update(stale, fields)
+        return len(stale)
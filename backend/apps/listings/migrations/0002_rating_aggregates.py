@@ -0,0 +1,73 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:12
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Listing = apps.get_model('listings', 'Listing')
+    Review = apps.get_model('reviews', 'Review')
+    rows = (
+        Review.objects.order_by().values('listing_id').annotate(
+            rating_sum=Sum('rating'),
+            review_count=Count('id'),
+            avg_cleanliness=Avg('cleanliness'),
+            avg_accuracy=Avg('accuracy'),
+            avg_communication=Avg('communication'),
+            avg_location=Avg('location'),
+            avg_value=Avg('value'),
+        )
+    )
+    for row in rows:
+        listing_id = row.pop('listing_id')
+        for key, value in row.items():
+            if key.startswith('avg_') and value is not None:
+                row[key] = round(value, 2)
+        Listing.objects.filter(pk=listing_id).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0001_initial'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='avg_accuracy',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='avg_cleanliness',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='avg_communication',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='avg_location',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='avg_value',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:13
+
+from django.db import migrations, models
+
+
+def backfill_primary_image_url(apps, schema_editor):
+    Listing = apps.get_model('listings', 'Listing')
+    ListingImage = apps.get_model('listings', 'ListingImage')
+    for listing_id in Listing.objects.values_list('pk', flat=True):
+        url = (
+            ListingImage.objects.filter(listing_id=listing_id)
+            .order_by('-is_primary', 'order', 'pk')
+            .values_list('url', flat=True).first()
+        )
+        if url:
+            Listing.objects.filter(pk=listing_id).update(primary_image_url=url)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0002_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='primary_image_url',
+            field=models.URLField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.RunPython(backfill_primary_image_url, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:17
+
+from django.db import migrations, models
+
+from apps.listings import geo
+
+
+def backfill_geohash(apps, schema_editor):
+    Listing = apps.get_model('listings', 'Listing')
+    rows = Listing.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for pk, lat, lng in rows.values_list('pk', 'latitude', 'longitude'):
+        Listing.objects.filter(pk=pk).update(geohash=geo.encode(lat, lng))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0003_primary_image_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
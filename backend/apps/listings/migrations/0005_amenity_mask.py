@@ -0,0 +1,37 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:18
+
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+# Frozen copy of Listing.AMENITIES at the time of this migration.
+AMENITY_FIELDS = [
+    'has_wifi', 'has_kitchen', 'has_parking', 'has_pool', 'has_ac', 'has_washer',
+    'has_tv', 'has_gym', 'has_workspace', 'has_fireplace', 'has_bbq', 'has_ev_charger',
+]
+
+
+def backfill_amenity_mask(apps, schema_editor):
+    Listing = apps.get_model('listings', 'Listing')
+    Listing.objects.update(amenity_mask=sum(
+        (Case(When(**{field: True}, then=Value(1 << bit)), default=Value(0))
+         for bit, field in enumerate(AMENITY_FIELDS)),
+        Value(0),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0004_geohash'),
+    ]
+
+    # No index: the amenities filter tests `mask & required = required`,
+    # which no B-tree index can serve.
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='amenity_mask',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_amenity_mask, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,35 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery
 from django.conf import settings
+from django.utils import timezone
+
+from . import geo
+
+# Columns ListingCardSerializer reads from a `card_values()` row
+CARD_FIELDS = [
+    'id', 'host', 'host__first_name', 'host__last_name', 'host__username', 'host__avatar',
+    'title', 'property_type', 'price_per_night', 'city', 'state', 'country',
+    'latitude', 'longitude', 'guests', 'bedrooms', 'beds', 'bathrooms',
+    'primary_image_url', 'rating_sum', 'review_count', 'amenity_mask', 'created_at',
+]
+
+
+class ListingQuerySet(models.QuerySet):
+    def with_host_summary(self):
+        """
+        Join the host and annotate the host's listing count, so the host_*
+        fields of ListingSerializer render without per-row queries.
+        """
+        host_listings = (
+            Listing.objects.filter(host=OuterRef('host'))
+            .order_by().values('host').annotate(c=Count('pk')).values('c')[:1]
+        )
+        return self.select_related('host').annotate(host_listing_count=Subquery(host_listings))
+
+    def card_values(self, *fields):
+        """Dict rows with everything ListingCardSerializer reads (plus `fields`), in one query."""
+        names = dict.fromkeys([*CARD_FIELDS, *fields, 'host_listing_count'])
+        return self.with_host_summary().values(*names)
 
 
 class Listing(models.Model):
@@ -23,6 +53,8 @@ class Listing(models.Model):
     country = models.CharField(max_length=100)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    # Geohash of (latitude, longitude), set in save(); see apps.listings.geo
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
 
     # Capacity
     guests = models.IntegerField(default=1)
@@ -43,34 +75,154 @@ class Listing(models.Model):
     has_fireplace = models.BooleanField(default=False)
     has_bbq = models.BooleanField(default=False)
     has_ev_charger = models.BooleanField(default=False)
+    # Bit i is set when AMENITIES[i] is available; set in save()
+    amenity_mask = models.PositiveIntegerField(default=0, editable=False)
+
+    # (slug, field) pairs. Append only — a slug's position is its bit in amenity_mask.
+    AMENITIES = [
+        ('wifi', 'has_wifi'), ('kitchen', 'has_kitchen'), ('parking', 'has_parking'),
+        ('pool', 'has_pool'), ('ac', 'has_ac'), ('washer', 'has_washer'),
+        ('tv', 'has_tv'), ('gym', 'has_gym'), ('workspace', 'has_workspace'),
+        ('fireplace', 'has_fireplace'), ('bbq', 'has_bbq'), ('ev_charger', 'has_ev_charger'),
+    ]
+
+    # Cover photo — maintained by apps.listings.signals on ListingImage writes
+    primary_image_url = models.URLField(max_length=500, blank=True, editable=False)
+
+    # Review aggregates — maintained by apps.reviews.signals, rebuilt by
+    # `python manage.py rebuild_rating_aggregates`
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    avg_cleanliness = models.FloatField(null=True, blank=True, editable=False)
+    avg_accuracy = models.FloatField(null=True, blank=True, editable=False)
+    avg_communication = models.FloatField(null=True, blank=True, editable=False)
+    avg_location = models.FloatField(null=True, blank=True, editable=False)
+    avg_value = models.FloatField(null=True, blank=True, editable=False)
 
     # Status
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ListingQuerySet.as_manager()
+
     class Meta:
         app_label = 'listings'
         ordering = ['-created_at']
+        # Partial on is_active: every public query filters on it, and a bare
+        # boolean column is not usable as a leading index key on SQLite.
+        indexes = [
+            # Default browse order and (created_at, id) keyset pages
+            models.Index(fields=['-created_at', '-id'], condition=Q(is_active=True),
+                         name='listing_active_recent_idx'),
+            # Price sort, price ranges and (price_per_night, id) keyset pages
+            models.Index(fields=['price_per_night', 'id'], condition=Q(is_active=True),
+                         name='listing_active_price_idx'),
+            models.Index(fields=['property_type', 'price_per_night'], condition=Q(is_active=True),
+                         name='listing_active_type_idx'),
+            models.Index(fields=['country', 'city'], condition=Q(is_active=True),
+                         name='listing_active_place_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        has_coords = self.latitude is not None and self.longitude is not None
+        self.geohash = geo.encode(self.latitude, self.longitude) if has_coords else ''
+        self.amenity_mask = self.amenity_bits(slug for slug, field in self.AMENITIES if getattr(self, field))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None and not self._state.adding and not kwargs.get('force_insert'):
+            # The review aggregates and the cover photo are written with .update()
+            # by signals; a full save of an older copy must not put them back.
+            update_fields = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.MAINTAINED_FIELDS
+            ]
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if {'latitude', 'longitude'} & update_fields:
+                update_fields.add('geohash')
+            if {field for _, field in self.AMENITIES} & update_fields:
+                update_fields.add('amenity_mask')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def amenity_bits(cls, slugs):
+        """Bitmask for amenity slugs; raises ValueError on an unknown slug."""
+        positions = {slug: i for i, (slug, _) in enumerate(cls.AMENITIES)}
+        mask = 0
+        for slug in slugs:
+            if slug not in positions:
+                raise ValueError(f'Unknown amenity: {slug}')
+            mask |= 1 << positions[slug]
+        return mask
+
+    @classmethod
+    def amenity_slugs(cls, mask):
+        return [slug for i, (slug, _) in enumerate(cls.AMENITIES) if mask & (1 << i)]
+
+    @property
+    def amenities(self):
+        return [slug for slug, field in self.AMENITIES if getattr(self, field)]
+
+    SUB_RATINGS = ['cleanliness', 'accuracy', 'communication', 'location', 'value']
+    RATING_AGGREGATE_FIELDS = ['rating_sum', 'review_count'] + [f'avg_{s}' for s in SUB_RATINGS]
+    # Left out of a save() unless named in update_fields
+    MAINTAINED_FIELDS = frozenset(RATING_AGGREGATE_FIELDS + ['primary_image_url'])
+
     @property
     def average_rating(self):
-        reviews = self.reviews.all()
-        if reviews.exists():
-            return round(sum(r.rating for r in reviews) / reviews.count(), 2)
+        return self.rating_average(self.rating_sum, self.review_count)
+
+    @staticmethod
+    def rating_average(rating_sum, review_count):
+        if review_count:
+            return round(rating_sum / review_count, 2)
         return None
 
-    @property
-    def review_count(self):
-        return self.reviews.count()
+    @staticmethod
+    def rating_aggregate_values(row):
+        """Map a `Review.objects.listing_aggregates()` row (or None) to field values."""
+        row = row or {}
+        values = {
+            'rating_sum':   row.get('rating_sum') or 0,
+            'review_count': row.get('review_count') or 0,
+        }
+        for sub in Listing.SUB_RATINGS:
+            avg = row.get(f'avg_{sub}')
+            values[f'avg_{sub}'] = round(avg, 2) if avg is not None else None
+        return values
+
+    @classmethod
+    def refresh_rating_aggregates(cls, listing_ids):
+        """Recompute the stored review aggregates for the given listings (and touch updated_at)."""
+        from apps.reviews.models import Review
+        listing_ids = set(listing_ids)
+        rows = {
+            row['listing_id']: row for row in
+            Review.objects.filter(listing_id__in=listing_ids).listing_aggregates()
+        }
+        for pk in listing_ids:
+            cls.objects.filter(pk=pk).update(
+                **cls.rating_aggregate_values(rows.get(pk)), updated_at=timezone.now(),
+            )
 
     @property
     def primary_image(self):
-        img = self.images.filter(is_primary=True).first() or self.images.first()
-        return img.url if img else None
+        return self.primary_image_url or None
+
+    @classmethod
+    def refresh_primary_image(cls, listing_ids):
+        """Re-resolve the stored cover photo (first primary, else first image) and touch updated_at."""
+        for pk in set(listing_ids):
+            url = (
+                ListingImage.objects.filter(listing_id=pk)
+                .order_by('-is_primary', 'order', 'pk')
+                .values_list('url', flat=True).first()
+            )
+            cls.objects.filter(pk=pk).update(primary_image_url=url or '', updated_at=timezone.now())
 
 
 class ListingImage(models.Model):
@@ -0,0 +1,198 @@
+"""
+Keyset (cursor) pagination on (ordering field, id).
+
+Page-number pagination stays the default. Clients opt in with
+`?pagination=cursor` on the first request and then follow the opaque
+`next` cursor; each page is one indexed range scan no matter how deep,
+and the total count is only computed when asked for with `?count=`.
+
+/api/search/ on Elasticsearch hands out search_after cursors in the same
+opaque form; while ES is unavailable they are translated into keyset
+cursors, so a client can keep paging across the switch.
+"""
+import base64
+import json
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+CURSOR_PARAM = 'cursor'
+COUNT_PARAM  = 'count'
+LISTING_ORDERINGS = ('-created_at', 'created_at', '-price_per_night', 'price_per_night')
+# Search only: nearest first from `near=lat,lng`, with page-number paging
+DISTANCE_ORDERING = 'distance'
+BOOKING_ORDERINGS = ('-created_at', 'created_at')
+APPROX_COUNT_LIMIT = 1000
+MAX_PAGE_SIZE = 50
+
+_DECODERS = {
+    'created_at':      parse_datetime,
+    'price_per_night': Decimal,
+}
+
+
+def is_cursor_request(request):
+    params = request.GET
+    return CURSOR_PARAM in params or params.get('pagination') == 'cursor'
+
+
+def _encode(payload):
+    raw = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode(token):
+    return json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+
+
+def encode_cursor(ordering, value, pk):
+    return _encode({'o': ordering, 'v': str(value), 'id': pk})
+
+
+def decode_cursor(token, ordering):
+    """Return (value, pk) for a cursor issued for `ordering`; raise ValueError if invalid."""
+    try:
+        raw = _decode(token)
+        value = _DECODERS[ordering.lstrip('-')](raw['v'])
+        pk = int(raw['id'])
+    except (ValueError, TypeError, KeyError, InvalidOperation):
+        raise ValueError('Invalid cursor.')
+    if raw.get('o') != ordering or value is None:
+        raise ValueError('Cursor does not match the requested ordering.')
+    return value, pk
+
+
+def encode_search_after(ordering, values, pit_id=None):
+    """Cursor for the Elasticsearch search_after path: the last hit's sort values (+ PIT id)."""
+    payload = {'o': ordering, 'sa': values}
+    if pit_id:
+        payload['pit'] = pit_id
+    return _encode(payload)
+
+
+def is_search_after_cursor(token):
+    try:
+        return 'sa' in _decode(token)
+    except (ValueError, TypeError):
+        return False
+
+
+def decode_search_after(token, ordering):
+    """Return (sort values, pit_id or None); raise ValueError if invalid."""
+    try:
+        raw = _decode(token)
+        values = raw['sa']
+    except (ValueError, TypeError, KeyError):
+        raise ValueError('Invalid cursor.')
+    if raw.get('o') != ordering or not isinstance(values, list) or len(values) != 2:
+        raise ValueError('Cursor does not match the requested ordering.')
+    return values, raw.get('pit')
+
+
+def search_after_to_keyset(ordering, values):
+    """Translate search_after sort values into an equivalent database keyset cursor."""
+    value, pk = values
+    if ordering.lstrip('-') == 'created_at':
+        value = datetime.fromtimestamp(value / 1000, tz=dt_timezone.utc)  # ES sorts dates as epoch millis
+    else:
+        value = Decimal(str(value))
+    return encode_cursor(ordering, value, int(pk))
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=12):
+    """
+    Fetch one page ordered by (ordering, id) starting after `cursor`.
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    field = ordering.lstrip('-')
+    descending = ordering.startswith('-')
+    op = 'lt' if descending else 'gt'
+    qs = queryset.order_by(ordering, '-pk' if descending else 'pk')
+    if cursor:
+        value, pk = decode_cursor(cursor, ordering)
+        qs = qs.filter(Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'pk__{op}': pk}))
+
+    items = list(qs[:page_size + 1])
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    last = items[-1]
+    return items, encode_cursor(ordering, getattr(last, field), last.pk)
+
+
+def count_queryset(queryset, mode):
+    """
+    Total for `?count=exact|approx|none`. Returns (count, is_exact); the
+    approximate mode stops counting at APPROX_COUNT_LIMIT.
+    """
+    if mode == 'exact':
+        return queryset.order_by().count(), True
+    if mode == 'approx':
+        n = queryset.order_by()[:APPROX_COUNT_LIMIT + 1].count()
+        if n > APPROX_COUNT_LIMIT:
+            return APPROX_COUNT_LIMIT, False
+        return n, True
+    return None, False
+
+
+def cursor_page_size(request, default):
+    try:
+        return max(1, min(MAX_PAGE_SIZE, int(request.GET.get('page_size', default))))
+    except ValueError:
+        return default
+
+
+class CursorOrPageNumberPagination(PageNumberPagination):
+    """PageNumberPagination that switches to keyset paging on `?pagination=cursor`."""
+    orderings = LISTING_ORDERINGS
+    cursor_mode = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not is_cursor_request(request):
+            return super().paginate_queryset(queryset, request, view)
+
+        self.cursor_mode = True
+        self.request = request
+        ordering = request.query_params.get('ordering', self.orderings[0])
+        if ordering not in self.orderings:
+            raise ValidationError({'ordering': f'Cursor pagination supports: {", ".join(self.orderings)}.'})
+        try:
+            items, self.next_cursor = keyset_page(
+                queryset, ordering,
+                cursor=request.query_params.get(CURSOR_PARAM),
+                page_size=cursor_page_size(request, self.page_size),
+            )
+        except ValueError as e:
+            raise ValidationError({CURSOR_PARAM: str(e)})
+        self.total, self.total_exact = count_queryset(queryset, request.query_params.get(COUNT_PARAM))
+        return items
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({
+            'count':       self.total,
+            'count_exact': self.total_exact,
+            'next':        self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'previous':    None,
+            'results':     data,
+        })
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.next_cursor:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, CURSOR_PARAM, self.next_cursor)
+
+
+class BookingPagination(CursorOrPageNumberPagination):
+    orderings = BOOKING_ORDERINGS
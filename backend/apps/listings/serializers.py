@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import Listing, ListingImage
 
@@ -29,7 +30,9 @@ class ListingSerializer(serializers.ModelSerializer):
             'has_washer', 'has_tv', 'has_gym', 'has_workspace',
             'has_fireplace', 'has_bbq', 'has_ev_charger',
             'is_active', 'images', 'primary_image',
-            'average_rating', 'review_count', 'created_at',
+            'average_rating', 'review_count',
+            'avg_cleanliness', 'avg_accuracy', 'avg_communication',
+            'avg_location', 'avg_value', 'created_at',
         ]
         read_only_fields = ['id', 'host', 'created_at']
 
@@ -41,10 +44,57 @@ class ListingSerializer(serializers.ModelSerializer):
 
     def get_host_is_superhost(self, obj):
         # Superhost = host with 3+ listings and avg rating ≥ 4.8
-        count = obj.host.listings.count()
+        # Querysets built with Listing.objects.with_host_summary() carry the count.
+        count = getattr(obj, 'host_listing_count', None)
+        if count is None:
+            count = obj.host.listings.count()
         return count >= 3
 
 
+class ListingCardSerializer(serializers.ModelSerializer):
+    """
+    The search-result card: what ListingCard shows, without images or
+    description. Serializes `Listing.objects.card_values()` rows, so a page
+    of cards is one query; the same payload is stored in the search index.
+    """
+    host = serializers.IntegerField(read_only=True)
+    primary_image = serializers.SerializerMethodField()
+    average_rating = serializers.SerializerMethodField()
+    review_count = serializers.IntegerField(read_only=True)
+    amenities = serializers.SerializerMethodField()
+    host_name = serializers.SerializerMethodField()
+    host_avatar = serializers.SerializerMethodField()
+    host_is_superhost = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Listing
+        fields = [
+            'id', 'host', 'host_name', 'host_avatar', 'host_is_superhost',
+            'title', 'property_type', 'price_per_night', 'city', 'state', 'country',
+            'latitude', 'longitude', 'guests', 'bedrooms', 'beds', 'bathrooms',
+            'primary_image', 'average_rating', 'review_count', 'amenities', 'created_at',
+        ]
+        read_only_fields = fields
+
+    def get_primary_image(self, row):
+        return row['primary_image_url'] or None
+
+    def get_average_rating(self, row):
+        return Listing.rating_average(row['rating_sum'], row['review_count'])
+
+    def get_amenities(self, row):
+        return Listing.amenity_slugs(row['amenity_mask'])
+
+    def get_host_name(self, row):
+        return f"{row['host__first_name']} {row['host__last_name']}".strip() or row['host__username']
+
+    def get_host_avatar(self, row):
+        return row['host__avatar']
+
+    def get_host_is_superhost(self, row):
+        return (row['host_listing_count'] or 0) >= 3
+
+
 class ListingCreateSerializer(serializers.ModelSerializer):
     images = serializers.ListField(
         child=serializers.URLField(), write_only=True, required=False
@@ -54,11 +104,16 @@ class ListingCreateSerializer(serializers.ModelSerializer):
         model = Listing
         exclude = ['host', 'created_at', 'updated_at']
 
+    @transaction.atomic
     def create(self, validated_data):
         images = validated_data.pop('images', [])
-        listing = Listing.objects.create(**validated_data)
-        for i, url in enumerate(images):
-            ListingImage.objects.create(listing=listing, url=url, is_primary=(i == 0), order=i)
+        listing = Listing.objects.create(
+            **validated_data, primary_image_url=images[0] if images else '',
+        )
+        ListingImage.objects.bulk_create([
+            ListingImage(listing=listing, url=url, is_primary=(i == 0), order=i)
+            for i, url in enumerate(images)
+        ])
         return listing
 
     def update(self, instance, validated_data):
@@ -0,0 +1,39 @@
+"""Keep denormalized listing columns, cached responses and the search index in step with their source rows."""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.search.sync import record_listing_changes
+from .cache import invalidate_listings
+from .models import Listing, ListingImage
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def invalidate_listing_cache(sender, instance, created=False, **kwargs):
+    ids = [instance.pk]
+    if created or kwargs['signal'] is post_delete:
+        # The host's listing count (superhost badge) shows on all their listings
+        # and on their search cards.
+        ids += Listing.objects.filter(host_id=instance.host_id).values_list('pk', flat=True)
+    invalidate_listings(ids)
+    record_listing_changes(ids)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_host_profile(sender, instance, update_fields=None, **kwargs):
+    # Host name and avatar are rendered into listing responses and search cards.
+    if update_fields is not None and set(update_fields) <= {'last_login', 'password'}:
+        return
+    ids = list(Listing.objects.filter(host_id=instance.pk).values_list('pk', flat=True))
+    if ids:
+        invalidate_listings(ids)
+        record_listing_changes(ids)
+
+
+@receiver(post_save, sender=ListingImage)
+@receiver(post_delete, sender=ListingImage)
+def sync_primary_image(sender, instance, **kwargs):
+    Listing.refresh_primary_image([instance.listing_id])
+    invalidate_listings([instance.listing_id])
+    record_listing_changes([instance.listing_id])
@@ -0,0 +1,51 @@
+from datetime import date
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.bookings.models import Booking
+from apps.listings.tests.utils import clear_caches, make_listing, make_user
+
+
+class AvailabilityFilterTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.free = make_listing()
+        self.taken = make_listing()
+        self.guest = make_user()
+
+    def _book(self, listing, check_in, check_out, status='confirmed'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(
+                listing=listing, guest=self.guest, check_in=check_in, check_out=check_out,
+                total_price=100, status=status,
+            )
+
+    def _ids(self, **params):
+        response = self.client.get('/api/listings/', params)
+        self.assertEqual(response.status_code, 200)
+        return {row['id'] for row in response.data['results']}
+
+    def test_overlapping_stays_are_excluded(self):
+        self._book(self.taken, date(2031, 7, 3), date(2031, 7, 6))
+        self.assertEqual(self._ids(check_in='2031-07-01', check_out='2031-07-04'), {self.free.id})
+        # Check-out day is free for the next guest.
+        self.assertEqual(self._ids(check_in='2031-07-06', check_out='2031-07-08'), {self.free.id, self.taken.id})
+
+    def test_cancelled_bookings_free_the_nights(self):
+        booking = self._book(self.taken, date(2031, 7, 3), date(2031, 7, 6))
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = 'cancelled'
+            booking.save()
+        self.assertEqual(self._ids(check_in='2031-07-01', check_out='2031-07-04'), {self.free.id, self.taken.id})
+
+    def test_cached_anonymous_page_follows_new_bookings(self):
+        params = {'check_in': '2031-07-01', 'check_out': '2031-07-04'}
+        self.assertEqual(self._ids(**params), {self.free.id, self.taken.id})
+        self._book(self.taken, date(2031, 7, 2), date(2031, 7, 3))
+        self.assertEqual(self._ids(**params), {self.free.id})
+
+    def test_invalid_stay_is_rejected(self):
+        response = self.client.get('/api/listings/', {'check_in': '2031-07-04', 'check_out': '2031-07-01'})
+        self.assertEqual(response.status_code, 400)
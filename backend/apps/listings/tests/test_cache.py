@@ -0,0 +1,54 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.listings.models import ListingImage
+from apps.listings.tests.utils import clear_caches, make_listing, make_user
+from apps.reviews.models import Review
+
+
+class AnonymousResponseCacheTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.listing = make_listing()
+        self.detail = f'/api/listings/{self.listing.id}/'
+
+    def _get(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(ctx.captured_queries)
+
+    def test_repeat_reads_come_from_the_cache(self):
+        self._get('/api/listings/')
+        _, queries = self._get('/api/listings/')
+        self.assertEqual(queries, 0)
+        self._get(self.detail)
+        _, queries = self._get(self.detail)
+        self.assertEqual(queries, 1)  # the conditional-GET validator only
+
+    def test_writes_invalidate_list_and_detail(self):
+        self._get('/api/listings/')
+        self._get(self.detail)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing.title = 'Renamed'
+            self.listing.save()
+        self.assertEqual(self._get('/api/listings/')[0]['results'][0]['title'], 'Renamed')
+        self.assertEqual(self._get(self.detail)[0]['title'], 'Renamed')
+
+    def test_image_and_review_writes_invalidate_the_detail(self):
+        self._get(self.detail)
+        with self.captureOnCommitCallbacks(execute=True):
+            ListingImage.objects.create(listing=self.listing, url='https://img.example.com/1.jpg')
+        self.assertEqual(self._get(self.detail)[0]['primary_image'], 'https://img.example.com/1.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(listing=self.listing, author=make_user(), rating=4, comment='Good.')
+        self.assertEqual(self._get(self.detail)[0]['review_count'], 1)
+
+    def test_authenticated_requests_bypass_the_cache(self):
+        self._get('/api/listings/')
+        self.client.force_authenticate(make_user())
+        _, queries = self._get('/api/listings/')
+        self.assertGreater(queries, 0)
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.listings.models import Listing
+from apps.listings.tests.utils import clear_caches, make_listing, make_user
+from apps.reviews.models import Review
+
+
+class ListingConditionalGetTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.listing = make_listing()
+        self.url = f'/api/listings/{self.listing.id}/'
+
+    def test_unchanged_listing_answers_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url, headers={'if-none-match': response['ETag']}).status_code, 304)
+        since = response['Last-Modified']
+        self.assertEqual(self.client.get(self.url, headers={'if-modified-since': since}).status_code, 304)
+
+    def test_listing_edit_changes_the_validators(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing.title = 'Renamed'
+            self.listing.save()
+        response = self.client.get(self.url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'Renamed')
+
+    def test_host_profile_edit_changes_the_validators(self):
+        response = self.client.get(self.url)
+        etag, since = response['ETag'], response['Last-Modified']
+        host = self.listing.host
+        # Stored a second later than the listing, so Last-Modified moves too.
+        with self.captureOnCommitCallbacks(execute=True):
+            host.first_name = 'Ana'
+            host.save()
+            User.objects.filter(pk=host.pk).update(updated_at=timezone.now() + timedelta(seconds=2))
+        response = self.client.get(self.url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['host_name'], 'Ana')
+        self.assertEqual(self.client.get(self.url, headers={'if-modified-since': since}).status_code, 200)
+
+    def test_missing_listing_is_404(self):
+        Listing.objects.filter(pk=self.listing.pk).delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_review_list_follows_new_reviews(self):
+        url = f'/api/reviews/listings/{self.listing.id}/reviews/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, headers={'if-none-match': etag}).status_code, 304)
+        Review.objects.create(listing=self.listing, author=make_user(), rating=5, comment='Lovely.')
+        self.assertEqual(self.client.get(url, headers={'if-none-match': etag}).status_code, 200)
+
+    def test_review_list_follows_reviewer_profiles(self):
+        url = f'/api/reviews/listings/{self.listing.id}/reviews/'
+        author = make_user()
+        Review.objects.create(listing=self.listing, author=author, rating=5, comment='Lovely.')
+        response = self.client.get(url)
+        etag, since = response['ETag'], response['Last-Modified']
+        author.first_name = 'Rita'
+        author.save()
+        # Stored a second later than the listing, so Last-Modified moves too.
+        User.objects.filter(pk=author.pk).update(updated_at=timezone.now() + timedelta(seconds=2))
+        response = self.client.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['author_name'], 'Rita')
+        self.assertEqual(self.client.get(url, headers={'if-modified-since': since}).status_code, 200)
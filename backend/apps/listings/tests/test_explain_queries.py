@@ -0,0 +1,17 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.listings.management.commands.explain_queries import listing_list_queryset
+
+
+class ExplainQueriesTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        out = StringIO()
+        call_command('explain_queries', fail_on_scan=True, stdout=out)
+        self.assertIn('0 full scans found', out.getvalue())
+
+    def test_listing_queries_come_from_the_view_filters(self):
+        sql = str(listing_list_queryset({'city': 'Florence'}).query)
+        self.assertIn('LIKE', sql)  # ListingFilter.city is icontains, as the API runs it
@@ -0,0 +1,33 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.listings.models import Listing
+from apps.listings.tests.utils import clear_caches, make_listing
+
+
+class AmenityFilterTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.both = make_listing(has_wifi=True, has_pool=True)
+        self.wifi = make_listing(has_wifi=True)
+        self.none = make_listing()
+
+    def _ids(self, **params):
+        response = self.client.get('/api/listings/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return {row['id'] for row in response.data['results']}
+
+    def test_mask_follows_the_flags(self):
+        self.assertEqual(Listing.amenity_slugs(self.both.amenity_mask), ['wifi', 'pool'])
+        self.wifi.has_wifi = False
+        self.wifi.save(update_fields=['has_wifi'])
+        self.wifi.refresh_from_db()
+        self.assertEqual(self.wifi.amenity_mask, 0)
+
+    def test_every_listed_amenity_is_required(self):
+        self.assertEqual(self._ids(amenities='wifi'), {self.both.id, self.wifi.id})
+        self.assertEqual(self._ids(amenities='wifi,pool'), {self.both.id})
+
+    def test_unknown_amenity_is_rejected(self):
+        self.assertEqual(self.client.get('/api/listings/', {'amenities': 'helipad'}).status_code, 400)
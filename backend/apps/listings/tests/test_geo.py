@@ -0,0 +1,63 @@
+import random
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from apps.listings import geo
+from apps.listings.tests.utils import clear_caches, make_listing
+
+
+class GeohashTests(SimpleTestCase):
+    def test_encode(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+
+    def test_cover_contains_every_point_in_the_box(self):
+        rng = random.Random(7)
+        for south, west, north, east in [(48.80, 2.20, 48.95, 2.45), (-10, 170, 10, -170), (-60, -100, 70, 120)]:
+            cells = geo.cover_bbox(south, west, north, east)
+            self.assertLessEqual(len(cells), geo.MAX_COVER_CELLS)
+            for _ in range(200):
+                lat = rng.uniform(south, north)
+                lng = rng.uniform(west, east if west <= east else east + 360)
+                lng = lng - 360 if lng > 180 else lng
+                code = geo.encode(lat, lng)
+                self.assertTrue(any(code.startswith(cell) for cell in cells), (lat, lng))
+
+    def test_circle_box_wraps_the_antimeridian(self):
+        south, west, north, east = geo.bbox_around(0, 179.9, 50)
+        self.assertGreater(west, east)
+
+    def test_haversine(self):
+        self.assertAlmostEqual(geo.haversine_km(48.8566, 2.3522, 51.5074, -0.1278), 343.5, delta=1)  # Paris-London
+
+
+class GeoFilterTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.paris = make_listing(latitude=Decimal('48.8566'), longitude=Decimal('2.3522'))
+        self.versailles = make_listing(latitude=Decimal('48.8049'), longitude=Decimal('2.1204'))  # ~18 km
+        self.fiji = make_listing(latitude=Decimal('-17.7134'), longitude=Decimal('178.0650'))
+        self.samoa = make_listing(latitude=Decimal('-13.7590'), longitude=Decimal('-172.1046'))
+        make_listing()  # no coordinates
+
+    def _ids(self, **params):
+        response = self.client.get('/api/listings/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return {row['id'] for row in response.data['results']}
+
+    def test_geohash_is_stored_on_save(self):
+        self.assertEqual(self.paris.geohash, geo.encode(48.8566, 2.3522))
+
+    def test_bbox(self):
+        self.assertEqual(self._ids(bbox='2.20,48.80,2.45,48.95'), {self.paris.id})
+        self.assertEqual(self._ids(bbox='170,-20,-170,-10'), {self.fiji.id, self.samoa.id})  # across 180°
+
+    def test_radius(self):
+        self.assertEqual(self._ids(near='48.8566,2.3522'), {self.paris.id})
+        self.assertEqual(self._ids(near='48.8566,2.3522', radius_km='25'), {self.paris.id, self.versailles.id})
+
+    def test_invalid_parameters(self):
+        for params in ({'bbox': '1,2,3'}, {'near': '95,0'}, {'near': '48,2', 'radius_km': '9000'}):
+            self.assertEqual(self.client.get('/api/listings/', params).status_code, 400, params)
@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.listings.pagination import decode_cursor, search_after_to_keyset
+from apps.listings.tests.utils import clear_caches, make_listing
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        # Price ties make the id tiebreaker matter.
+        self.listings = [make_listing(price_per_night=Decimal(100 + 10 * (i // 3))) for i in range(7)]
+
+    def _walk(self, url, params):
+        ids, pages, cursor = [], 0, None
+        while True:
+            response = self.client.get(url, {**params, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200, response.data)
+            ids += [row['id'] for row in response.data['results']]
+            pages += 1
+            cursor = response.data['next_cursor']
+            if not cursor:
+                return ids, pages
+
+    def test_walks_every_listing_once_in_order(self):
+        ids, pages = self._walk('/api/listings/', {'pagination': 'cursor', 'ordering': 'price_per_night',
+                                                   'page_size': 2})
+        expected = [l.id for l in sorted(self.listings, key=lambda l: (l.price_per_night, l.id))]
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 4)
+
+    def test_newest_first_by_default(self):
+        ids, _ = self._walk('/api/listings/', {'pagination': 'cursor', 'page_size': 3})
+        self.assertEqual(ids, [l.id for l in reversed(self.listings)])
+
+    def test_search_pages_with_keyset_cursors_on_the_database(self):
+        ids, _ = self._walk('/api/search/', {'pagination': 'cursor', 'engine': 'django-orm', 'page_size': 3,
+                                             'ordering': '-price_per_night'})
+        expected = [l.id for l in sorted(self.listings, key=lambda l: (-l.price_per_night, -l.id))]
+        self.assertEqual(ids, expected)
+
+    def test_count_modes(self):
+        params = {'pagination': 'cursor', 'page_size': 2}
+        self.assertIsNone(self.client.get('/api/listings/', params).data['count'])
+        data = self.client.get('/api/listings/', {**params, 'count': 'exact'}).data
+        self.assertEqual((data['count'], data['count_exact']), (7, True))
+
+    def test_bad_cursors_are_rejected(self):
+        first = self.client.get('/api/listings/', {'pagination': 'cursor', 'page_size': 2}).data['next_cursor']
+        self.assertEqual(self.client.get('/api/listings/', {'cursor': 'garbage'}).status_code, 400)
+        response = self.client.get('/api/listings/', {'cursor': first, 'ordering': 'price_per_night'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_after_cursor_translates_to_keyset(self):
+        token = search_after_to_keyset('-created_at', [1767225600000, 42])
+        self.assertEqual(decode_cursor(token, '-created_at'),
+                         (datetime(2026, 1, 1, tzinfo=timezone.utc), 42))
+        self.assertEqual(decode_cursor(search_after_to_keyset('price_per_night', [120.5, 7]), 'price_per_night'),
+                         (Decimal('120.5'), 7))
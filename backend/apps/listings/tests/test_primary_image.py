@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.bookings.models import Booking
+from apps.listings.models import ListingImage
+from apps.listings.tests.utils import clear_caches, make_listing, make_user
+
+
+class PrimaryImageTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.listing = make_listing()
+
+    def _image(self, n, **fields):
+        return ListingImage.objects.create(listing=self.listing, url=f'https://img.example.com/{n}.jpg', **fields)
+
+    def _cover(self):
+        self.listing.refresh_from_db()
+        return self.listing.primary_image
+
+    def test_cover_follows_image_writes(self):
+        self.assertIsNone(self._cover())
+        self._image(1, order=1)
+        self._image(0, order=0)
+        self.assertEqual(self._cover(), 'https://img.example.com/0.jpg')  # first by order
+        primary = self._image(2, order=5, is_primary=True)
+        self.assertEqual(self._cover(), 'https://img.example.com/2.jpg')  # a primary wins
+        primary.delete()
+        self.assertEqual(self._cover(), 'https://img.example.com/0.jpg')
+
+    def test_booking_list_reads_the_stored_cover(self):
+        guest = make_user()
+        client = APIClient()
+        client.force_authenticate(guest)
+        self._image(0)
+
+        def book(i):
+            check_in = date(2031, 1, 1) + timedelta(days=3 * i)
+            Booking.objects.create(listing=make_listing(), guest=guest, check_in=check_in,
+                                   check_out=check_in + timedelta(days=2), total_price=200)
+
+        book(0)
+        with CaptureQueriesContext(connection) as one:
+            client.get('/api/bookings/')
+        for i in range(1, 5):
+            book(i)
+        with CaptureQueriesContext(connection) as five:
+            response = client.get('/api/bookings/')
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(len(five.captured_queries), len(one.captured_queries))
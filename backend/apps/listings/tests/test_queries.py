@@ -0,0 +1,35 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.listings.tests.utils import clear_caches, make_listing, make_user
+
+
+class ListingQueryCountTests(TestCase):
+    """Serializing a page costs the same number of queries whatever its size."""
+
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.client.force_authenticate(make_user())  # skip the anonymous cache
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_host_fields_do_not_query_per_row(self):
+        make_listing()
+        few = self._queries('/api/listings/')
+        for _ in range(5):
+            make_listing()
+        self.assertEqual(self._queries('/api/listings/'), few)
+
+    def test_superhost_comes_from_the_annotated_count(self):
+        host = make_user(is_host=True)
+        listings = [make_listing(host=host) for _ in range(3)]
+        rows = self.client.get('/api/listings/').data['results']
+        self.assertTrue(all(row['host_is_superhost'] for row in rows if row['id'] in {l.id for l in listings}))
+        self.assertEqual(self.client.get(f'/api/listings/{listings[0].id}/').data['host_name'], host.username)
@@ -0,0 +1,38 @@
+from decimal import Decimal
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.conf import settings
+
+from apps.listings.models import Listing
+
+_serial = count(1)
+
+
+def clear_caches():
+    """Empty every configured cache, so version tokens start fresh for each test."""
+    for alias in settings.CACHES:
+        caches[alias].clear()
+
+
+def make_user(**fields):
+    n = next(_serial)
+    fields.setdefault('username', f'user{n}')
+    fields.setdefault('email', f'user{n}@example.com')
+    return get_user_model().objects.create_user(password=None, **fields)
+
+
+def make_listing(host=None, **fields):
+    n = next(_serial)
+    values = {
+        'title':           f'Listing {n}',
+        'description':     'A quiet place to stay.',
+        'property_type':   'apartment',
+        'price_per_night': Decimal('100.00'),
+        'address':         f'{n} Main Street',
+        'city':            'Lisbon',
+        'country':         'Portugal',
+    }
+    values.update(fields)
+    return Listing.objects.create(host=host or make_user(is_host=True), **values)
@@ -1,10 +1,15 @@
 from rest_framework import generics, permissions, status, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from django.db.models import Sum
+from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
+from .cache import cache_timeout, detail_cache_key, get_cache, list_cache_key
+from .conditional import listing_condition
 from .models import Listing, ListingImage
 from .serializers import ListingSerializer, ListingCreateSerializer
-from .filters import ListingFilter
+from .filters import ListingFilter, ListingSearchFilter
+from .pagination import CursorOrPageNumberPagination
 
 
 class IsHostOrReadOnly(permissions.BasePermission):
@@ -15,20 +20,33 @@ class IsHostOrReadOnly(permissions.BasePermission):
 
 
 class ListingListCreateView(generics.ListCreateAPIView):
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ListingSearchFilter, filters.OrderingFilter]
     filterset_class = ListingFilter
     search_fields = ['title', 'city', 'country', 'description', 'address']
     ordering_fields = ['price_per_night', 'created_at']
     ordering = ['-created_at']
+    pagination_class = CursorOrPageNumberPagination
 
     def get_queryset(self):
-        return Listing.objects.filter(is_active=True).prefetch_related('images', 'reviews')
+        return Listing.objects.filter(is_active=True).with_host_summary().prefetch_related('images')
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return ListingCreateSerializer
         return ListingSerializer
 
+    def list(self, request, *args, **kwargs):
+        # Anonymous pages are identical for everyone — serve them from cache.
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        cache, key = get_cache(), list_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, cache_timeout())
+        return response
+
     def get_permissions(self):
         if self.request.method == 'POST':
             return [permissions.IsAuthenticated()]
@@ -41,8 +59,9 @@ class ListingListCreateView(generics.ListCreateAPIView):
         serializer.save(host=self.request.user)
 
 
+@method_decorator(listing_condition, name='get')
 class ListingDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Listing.objects.all().prefetch_related('images', 'reviews')
+    queryset = Listing.objects.with_host_summary().prefetch_related('images')
     permission_classes = [IsHostOrReadOnly]
 
     def get_serializer_class(self):
@@ -50,13 +69,24 @@ class ListingDetailView(generics.RetrieveUpdateDestroyAPIView):
             return ListingCreateSerializer
         return ListingSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().retrieve(request, *args, **kwargs)
+        cache, key = get_cache(), detail_cache_key(kwargs['pk'])
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().retrieve(request, *args, **kwargs)
+        cache.set(key, response.data, cache_timeout())
+        return response
+
 
 # ─── Host Dashboard ───────────────────────────────────────────────────────────
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def host_listings(request):
-    listings = Listing.objects.filter(host=request.user).prefetch_related('images', 'reviews', 'bookings')
+    listings = Listing.objects.filter(host=request.user).with_host_summary().prefetch_related('images')
     serializer = ListingSerializer(listings, many=True)
     return Response(serializer.data)
 
@@ -75,11 +105,10 @@ def host_stats(request):
     confirmed_bookings = bookings.filter(status='confirmed').count()
     total_guests = sum(b.guests for b in bookings.filter(status__in=['confirmed', 'completed']))
 
-    # Ratings across all listings
-    all_reviews = []
-    for listing in listings:
-        all_reviews.extend(listing.reviews.values_list('rating', flat=True))
-    avg_rating = round(sum(all_reviews) / len(all_reviews), 2) if all_reviews else None
+    # Ratings across all listings, from the stored per-listing aggregates
+    ratings = listings.aggregate(rating_sum=Sum('rating_sum'), review_count=Sum('review_count'))
+    total_reviews = ratings['review_count'] or 0
+    avg_rating = round(ratings['rating_sum'] / total_reviews, 2) if total_reviews else None
 
     return Response({
         'total_listings': listings.count(),
@@ -90,7 +119,7 @@ def host_stats(request):
         'total_revenue': float(total_revenue),
         'total_guests': total_guests,
         'average_rating': avg_rating,
-        'total_reviews': len(all_reviews),
+        'total_reviews': total_reviews,
     })
 
 
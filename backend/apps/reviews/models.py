@@ -1,6 +1,21 @@
 from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models import Avg, Count, Sum
+
+
+class ReviewQuerySet(models.QuerySet):
+    def listing_aggregates(self):
+        """Per-listing rating totals, in the shape stored on Listing."""
+        return self.order_by().values('listing_id').annotate(
+            rating_sum=Sum('rating'),
+            review_count=Count('id'),
+            avg_cleanliness=Avg('cleanliness'),
+            avg_accuracy=Avg('accuracy'),
+            avg_communication=Avg('communication'),
+            avg_location=Avg('location'),
+            avg_value=Avg('value'),
+        )
 
 
 class Review(models.Model):
@@ -19,10 +34,15 @@ class Review(models.Model):
     comment    = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ReviewQuerySet.as_manager()
+
     class Meta:
         app_label  = 'reviews'
         ordering   = ['-created_at']
         unique_together = [['listing', 'author']]
+        indexes = [
+            models.Index(fields=['listing', '-created_at'], name='review_listing_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.author.email} → {self.listing.title} ({self.rating}/5)"
@@ -0,0 +1,16 @@
+"""Keep the denormalized rating aggregates on Listing in step with reviews."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.listings.cache import invalidate_listings
+from apps.listings.models import Listing
+from apps.search.sync import record_listing_changes
+from .models import Review
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def sync_listing_rating(sender, instance, **kwargs):
+    Listing.refresh_rating_aggregates([instance.listing_id])
+    invalidate_listings([instance.listing_id])
+    record_listing_changes([instance.listing_id])
@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.listings.models import Listing, ListingImage
+from apps.listings.serializers import ListingCreateSerializer
+from apps.listings.tests.utils import clear_caches, make_listing, make_user
+from apps.reviews.models import Review
+
+
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.listing = make_listing()
+
+    def _review(self, rating, **sub):
+        return Review.objects.create(listing=self.listing, author=make_user(), rating=rating, comment='Nice.', **sub)
+
+    def test_reviews_keep_the_stored_aggregates_current(self):
+        self._review(5, cleanliness=4)
+        second = self._review(2, cleanliness=2)
+        self.listing.refresh_from_db()
+        self.assertEqual((self.listing.rating_sum, self.listing.review_count), (7, 2))
+        self.assertEqual(self.listing.average_rating, 3.5)
+        self.assertEqual(self.listing.avg_cleanliness, 3.0)
+
+        second.delete()
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.average_rating, 5.0)
+        self.assertEqual(self.listing.avg_cleanliness, 4.0)
+
+    def test_saving_a_stale_copy_keeps_the_aggregates(self):
+        stale = Listing.objects.get(pk=self.listing.pk)
+        self._review(4)
+        ListingImage.objects.create(listing=self.listing, url='https://example.com/cover.jpg')
+        stale.title = 'Renamed'
+        stale.save()
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.title, 'Renamed')
+        self.assertEqual((self.listing.rating_sum, self.listing.review_count), (4, 1))
+        self.assertEqual(self.listing.primary_image_url, 'https://example.com/cover.jpg')
+
+    def test_host_edits_keep_the_aggregates(self):
+        stale = Listing.objects.get(pk=self.listing.pk)
+        self._review(5)
+        serializer = ListingCreateSerializer(stale, data={'title': 'Edited'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        self.listing.refresh_from_db()
+        self.assertEqual((self.listing.title, self.listing.review_count), ('Edited', 1))
+
+    def test_list_reads_the_stored_aggregates(self):
+        self._review(4)
+        make_listing()
+        client = APIClient()
+        response = client.get('/api/listings/')
+        rows = {row['id']: row for row in response.data['results']}
+        self.assertEqual((rows[self.listing.id]['average_rating'], rows[self.listing.id]['review_count']), (4.0, 1))
+
+    def test_rebuild_repairs_drift(self):
+        self._review(4)
+        Listing.objects.filter(pk=self.listing.pk).update(rating_sum=0, review_count=0)
+        out = StringIO()
+        call_command('rebuild_rating_aggregates', verify=True, stdout=out)
+        self.assertIn('1 of 1 listings have stale', out.getvalue())
+        call_command('rebuild_rating_aggregates', stdout=StringIO())
+        self.listing.refresh_from_db()
+        self.assertEqual((self.listing.rating_sum, self.listing.review_count), (4, 1))
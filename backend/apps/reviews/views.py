@@ -1,8 +1,11 @@
+from django.utils.decorators import method_decorator
 from rest_framework import generics, permissions
+from apps.listings.conditional import listing_reviews_condition
 from .models import Review
 from .serializers import ReviewSerializer
 
 
+@method_decorator(listing_reviews_condition, name='get')
 class ReviewListCreateView(generics.ListCreateAPIView):
     serializer_class = ReviewSerializer
 
@@ -1,7 +1,21 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def restore_fts(sender, using, **kwargs):
+    # Table rebuilds during migrations drop the FTS triggers; put them back.
+    from django.db import connections
+    from django.db.migrations.recorder import MigrationRecorder
+    from . import fts
+    connection = connections[using]
+    if ('search', '0002_listing_fts') in MigrationRecorder(connection).applied_migrations():
+        fts.install(connection)
 
 
 class SearchConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.search'
-    # No signal connections or ES pings at startup
+
+    def ready(self):
+        # No ES pings at startup; only a post-migrate hook for the SQLite FTS index
+        post_migrate.connect(restore_fts, sender=self)
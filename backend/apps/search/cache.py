@@ -0,0 +1,132 @@
+"""
+Search result cache.
+
+Entries hold the page's listing ids, totals and paging metadata — never
+rendered JSON — so every hit is hydrated from the database and always
+shows current prices and photos. The exception is `view=card` on
+Elasticsearch, whose entries also hold the card documents stored in the
+index: those are only as fresh as the index itself. Keys are built from a canonical filter
+set (sorted keys, defaults and blanks dropped, free text and places
+case-folded, numbers normalized) plus the global listings version token,
+so any listing write retires every cached search at once; searches with
+`check_in`/`check_out` also carry the availability token, which booking
+writes replace. Entries expire
+after SEARCH_CACHE_TIMEOUT and the SEARCH_CACHE_ALIAS backend evicts the
+least recently used ones when full.
+
+Facet counts are cached apart from the pages (prefix `facets`, keyed
+without the PAGING_PARAMS), so paging through or re-sorting a result set
+reuses the counts computed for its first page.
+
+Concurrent misses for the same key are coalesced: the first request
+computes, the rest of this process waits for its result (single flight).
+"""
+import hashlib
+import json
+import threading
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.listings.cache import availability_version, global_version
+from apps.listings.filters import ListingFilter
+
+# Parameter defaults; a parameter equal to its default is dropped from the key.
+# `ordering` has none: without it, engine=memory ranks text matches by relevance.
+DEFAULTS = {
+    'page':      '1',
+    'page_size': '12',
+    'view':      'full',
+}
+CASE_FOLDED = ('q', 'city', 'country')
+NUMERIC = ('min_price', 'max_price', 'min_guests', 'min_bedrooms', 'radius_km', 'page', 'page_size')
+FLIGHT_TIMEOUT = 10
+# Everything else in the query string (tracking tags, cache busters) is ignored.
+RESULT_PARAMS = set(ListingFilter.base_filters) | {
+    'q', 'ordering', 'radius_km', 'page', 'page_size', 'pagination', 'cursor', 'count', 'engine', 'pit', 'facets', 'view',
+}
+# Parameters that pick a slice, order or rendering of the results but not the set itself.
+PAGING_PARAMS = ('page', 'page_size', 'ordering', 'pagination', 'cursor', 'count', 'pit', 'view')
+
+
+def get_search_cache():
+    return caches[getattr(settings, 'SEARCH_CACHE_ALIAS', 'default')]
+
+
+def search_cache_timeout():
+    return getattr(settings, 'SEARCH_CACHE_TIMEOUT', 60)
+
+
+def _number(value):
+    try:
+        return format(Decimal(value).normalize(), 'f')
+    except InvalidOperation:
+        return value
+
+
+def canonical_filters(params, exclude=()):
+    """The search parameters that change the result, in one canonical form."""
+    canonical = {}
+    for key in RESULT_PARAMS.difference(exclude).intersection(params):
+        value = params.get(key, '').strip()
+        if key in CASE_FOLDED:
+            value = value.casefold()
+        elif key in NUMERIC:
+            value = _number(value)
+        elif key in ('amenities', 'facets'):
+            value = ','.join(sorted({s.strip().lower() for s in value.split(',') if s.strip()}))
+        if value and value != _number(DEFAULTS.get(key, '')):
+            canonical[key] = value
+    if 'near' not in canonical:
+        canonical.pop('radius_km', None)
+    if 'check_in' in canonical or 'check_out' in canonical:
+        # Dated results also change with every booking write.
+        canonical['availability'] = str(availability_version())
+    return dict(sorted(canonical.items()))
+
+
+def search_cache_key(prefix, params, exclude=()):
+    raw = json.dumps(canonical_filters(params, exclude), separators=(',', ':'))
+    return f'search:{prefix}:{global_version()}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def cached_search(key, compute):
+    """Return the cached value for `key`, computing it at most once per process on a miss."""
+    cache = get_search_cache()
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        flight.done.wait(FLIGHT_TIMEOUT)
+        if flight.result is not None:
+            return flight.result
+        # The leader failed or is stuck; answer this request on its own.
+        return compute()
+
+    try:
+        result = compute()
+        cache.set(key, result, search_cache_timeout())
+        flight.result = result
+        return result
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
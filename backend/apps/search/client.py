@@ -0,0 +1,178 @@
+"""
+Process-wide Elasticsearch client, circuit breaker and search latency stats.
+
+One pooled client is built lazily on first use and shared by every request
+thread; nothing is pinged per request. The breaker counts consecutive
+failed ES calls. Once it opens, `get_es_client()` raises immediately so
+search falls straight back to the ORM. After the cooldown a single
+background thread pings ES and closes the breaker when ES answers, so no
+request ever waits on a dead node.
+
+All state is per process: each worker trips and recovers on its own.
+"""
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+LATENCY_WINDOW = 500
+
+
+class CircuitBreaker:
+    def __init__(self, threshold, cooldown):
+        self.threshold, self.cooldown = threshold, cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def allow(self, probe=None):
+        """True if a request may use ES now; starts `probe` once the cooldown is over."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and probe and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                threading.Thread(target=self._run_probe, args=(probe,), daemon=True).start()
+            return False
+
+    def _run_probe(self, probe):
+        try:
+            ok = probe()
+        except Exception as e:
+            ok, self.last_error = False, repr(e)
+        if ok:
+            self.record_success()
+        else:
+            with self._lock:
+                self.state, self.opened_at = OPEN, time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.state, self.failures, self.opened_at = CLOSED, 0, None
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self.failures += 1
+            self.last_error = repr(error) if error else self.last_error
+            if self.state != OPEN and self.failures >= self.threshold:
+                self.state, self.opened_at = OPEN, time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = round(max(0.0, self.cooldown - (time.monotonic() - self.opened_at)), 1)
+            return {
+                'state':      self.state,
+                'failures':   self.failures,
+                'threshold':  self.threshold,
+                'cooldown_s': self.cooldown,
+                'retry_in_s': retry_in,
+                'last_error': self.last_error,
+            }
+
+
+class LatencyStats:
+    """Rolling window of request durations per search engine."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, engine, seconds):
+        with self._lock:
+            self._samples.setdefault(engine, deque(maxlen=self.window)).append(seconds * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            samples = {engine: sorted(values) for engine, values in self._samples.items()}
+        return {engine: _summary(values) for engine, values in samples.items()}
+
+
+def _summary(values):
+    def pct(p):
+        return round(values[min(len(values) - 1, int(p * len(values)))], 1)
+    return {
+        'count':  len(values),
+        'avg_ms': round(sum(values) / len(values), 1),
+        'p50_ms': pct(0.50),
+        'p95_ms': pct(0.95),
+        'p99_ms': pct(0.99),
+        'max_ms': round(values[-1], 1),
+    }
+
+
+breaker = CircuitBreaker(
+    threshold=getattr(settings, 'ELASTICSEARCH_BREAKER_THRESHOLD', 3),
+    cooldown=getattr(settings, 'ELASTICSEARCH_BREAKER_COOLDOWN', 30),
+)
+latency = LatencyStats()
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _es_url():
+    return (
+        getattr(settings, 'ELASTICSEARCH_DSL', {})
+        .get('default', {})
+        .get('hosts', 'http://localhost:9200')
+    )
+
+
+def pooled_client():
+    """The shared client (HTTP connection pool), built on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from elasticsearch import Elasticsearch
+                _client = Elasticsearch(
+                    _es_url(),
+                    request_timeout=getattr(settings, 'ELASTICSEARCH_TIMEOUT', 2),
+                    max_retries=0,
+                    retry_on_timeout=False,
+                )
+    return _client
+
+
+def _probe():
+    return pooled_client().ping()
+
+
+def get_es_client(ping=False):
+    """
+    Return the pooled client, or raise ConnectionError while the breaker is
+    open. `ping=True` (management commands) checks reachability up front.
+    """
+    if not breaker.allow(probe=_probe):
+        raise ConnectionError(f"Elasticsearch circuit open (retry in {breaker.snapshot()['retry_in_s']}s)")
+    client = pooled_client()
+    if ping and not client.ping():
+        raise ConnectionError(f"Elasticsearch not reachable at {_es_url()}")
+    return client
+
+
+def is_outage(error):
+    """Errors that say ES is unhealthy (not that the query was bad)."""
+    from elasticsearch import ApiError, TransportError
+    if isinstance(error, TransportError):  # connection refused, timeouts, TLS
+        return True
+    return isinstance(error, ApiError) and (error.meta.status >= 500 or error.meta.status == 429)
+
+
+def health(detail=False):
+    """
+    Breaker state only, or with `detail` the full breaker snapshot (failure
+    count, last error) and per-engine latency. The last error can name hosts
+    and carries exception text, so `detail` is for staff.
+    """
+    snapshot = breaker.snapshot()
+    if not detail:
+        return {'status': 'ok' if snapshot['state'] == CLOSED else 'degraded', 'breaker': {'state': snapshot['state']}}
+    return {'breaker': snapshot, 'latency': latency.snapshot()}
@@ -8,31 +8,59 @@ INSTALLED_APPS is safe and eliminates the startup connection error.
 To index data (only after ES is running):
     python manage.py index_listings
 """
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+from .client import breaker, get_es_client, is_outage
+
+# Bulk requests are far slower than searches; commands get their own timeout.
+BULK_TIMEOUT = 60
+
+
+def required_amenities(filters):
+    """Amenity slugs required by `amenities=wifi,pool` and/or `has_<amenity>=true`."""
+    from apps.listings.models import Listing
+    slugs = [s.strip() for s in filters.get('amenities', '').split(',') if s.strip()]
+    Listing.amenity_bits(slugs)  # validate
+    slugs += [slug for slug, field in Listing.AMENITIES if filters.get(field) == 'true']
+    return sorted(set(slugs))
 
-def get_es_client():
-    """Return a connected Elasticsearch client, or raise ConnectionError."""
-    from django.conf import settings
-    from elasticsearch import Elasticsearch
-    url = (
-        getattr(settings, 'ELASTICSEARCH_DSL', {})
-        .get('default', {})
-        .get('hosts', 'http://localhost:9200')
-    )
-    client = Elasticsearch(url)
-    if not client.ping():
-        raise ConnectionError(f"Elasticsearch not reachable at {url}")
-    return client
 
+def geo_filter_clauses(filters):
+    """`bbox` / `near` + `radius_km` filters as ES geo queries on `location`."""
+    from apps.listings import geo
+    clauses = []
+    if filters.get('bbox'):
+        south, west, north, east = geo.parse_bbox(filters['bbox'])
+        clauses.append({"geo_bounding_box": {"location": {
+            "top_left":     {"lat": north, "lon": west},
+            "bottom_right": {"lat": south, "lon": east},
+        }}})
+    if filters.get('near'):
+        lat, lng = geo.parse_point(filters['near'])
+        radius = geo.near_radius(filters)
+        if radius is not None:
+            clauses.append({"geo_distance": {
+                "distance": f"{radius}km",
+                "location": {"lat": lat, "lon": lng},
+            }})
+    return clauses
 
-def search_listings_es(query, filters, page=1, page_size=12):
+
+def booked_listing_ids(filters):
     """
-    Full-text + filtered Elasticsearch query.
-    Returns (list_of_ids, total_count).
-    Raises on connection failure so caller can fall back to ORM.
+    Listings booked on some night of `check_in`..`check_out`, to exclude
+    by id: occupancy lives in the database, not in the index.
     """
-    client = get_es_client()
+    from apps.bookings.availability import parse_stay, unavailable_listing_ids
+    if not filters.get('check_in') and not filters.get('check_out'):
+        return set()
+    return unavailable_listing_ids(*parse_stay(filters.get('check_in'), filters.get('check_out')))
 
+
+def listing_query(query, filters):
+    """The bool query for free text `query` plus the structured `filters`."""
     must = []
     filter_clauses = [{"term": {"is_active": True}}]
 
@@ -57,107 +85,504 @@ def search_listings_es(query, filters, page=1, page_size=12):
     if filters.get('min_guests'):
         filter_clauses.append({"range": {"guests": {"gte": int(filters['min_guests'])}}})
 
-    for amenity in ['has_wifi','has_pool','has_kitchen','has_parking','has_ac','has_gym','has_workspace']:
-        if filters.get(amenity) == 'true':
-            filter_clauses.append({"term": {amenity: True}})
+    for slug in required_amenities(filters):
+        filter_clauses.append({"term": {"amenities": slug}})
+
+    filter_clauses.extend(geo_filter_clauses(filters))
+
+    query = {
+        "bool": {
+            "must": must or [{"match_all": {}}],
+            "filter": filter_clauses,
+        }
+    }
+    booked = booked_listing_ids(filters)
+    if booked:
+        query["bool"]["must_not"] = [{"terms": {"id": sorted(booked)}}]
+    return query
+
 
-    ordering = filters.get('ordering', '-created_at')
-    sort_field = ordering.lstrip('-')
+def listing_sort(ordering, near=None):
+    """
+    Sort on the ordering field with `id` as tiebreaker, so every hit has a
+    unique position. `distance` sorts by arc distance from `near` ('lat,lng').
+    """
+    from apps.listings import geo
+    from apps.listings.pagination import DISTANCE_ORDERING, LISTING_ORDERINGS
+    if ordering == DISTANCE_ORDERING and near:
+        lat, lng = geo.parse_point(near)
+        return [
+            {"_geo_distance": {"location": {"lat": lat, "lon": lng}, "order": "asc", "unit": "km"}},
+            {"id": {"order": "asc"}},
+        ]
+    if ordering not in LISTING_ORDERINGS:
+        ordering = '-created_at'
     sort_dir = 'desc' if ordering.startswith('-') else 'asc'
+    return [{ordering.lstrip('-'): {"order": sort_dir}}, {"id": {"order": sort_dir}}]
+
+
+def _search(client, **kwargs):
+    """client.search, feeding the circuit breaker."""
+    try:
+        result = client.search(**kwargs)
+    except Exception as e:
+        if is_outage(e):
+            breaker.record_failure(e)
+        raise
+    breaker.record_success()
+    return result
+
+
+def _total(hits):
+    """(total, is_exact) from a hits block; (None, False) when totals were not tracked."""
+    total = hits.get("total")
+    if total is None:
+        return None, False
+    if isinstance(total, dict):
+        return total["value"], total.get("relation", "eq") == "eq"
+    return total, True
+
 
+def search_listings_es(query, filters, page=1, page_size=12, facets=(), cards=False):
+    """
+    Full-text + filtered Elasticsearch query.
+    Returns (list_of_ids, total_count, facet_counts, card_documents): the
+    facets named in `facets` are aggregated in the same request (None when
+    none asked for); with `cards`, the stored card of each hit, in hit order
+    (None for a document indexed without one), else None.
+    Raises on connection failure so caller can fall back to ORM.
+    """
+    from .facets import es_aggregations, from_es
+
+    client = get_es_client()
     body = {
-        "query": {
-            "bool": {
-                "must": must or [{"match_all": {}}],
-                "filter": filter_clauses,
-            }
-        },
-        "sort": [{sort_field: {"order": sort_dir}}],
+        "query": listing_query(query, filters),
+        "sort": listing_sort(filters.get('ordering', '-created_at'), filters.get('near')),
         "from": (page - 1) * page_size,
         "size": page_size,
+        "_source": ["card"] if cards else False,
     }
-
-    result = client.search(index="listings", body=body)
+    if facets:
+        body["aggs"] = es_aggregations(facets)
+    result = _search(client, index="listings", body=body)
     hits = result["hits"]
-    total = hits["total"]["value"] if isinstance(hits["total"], dict) else hits["total"]
+    total, _ = _total(hits)
     ids   = [int(h["_id"]) for h in hits["hits"]]
-    return ids, total
+    card_docs = [h.get("_source", {}).get("card") for h in hits["hits"]] if cards else None
+    return ids, total, from_es(facets, result["aggregations"]) if facets else None, card_docs
+
 
+# Sort values travel inside the cursor; PITs keep a consistent snapshot across pages.
+PIT_KEEP_ALIVE = '2m'
+TRACK_TOTAL_HITS = {'exact': True, 'approx': 10000, 'none': False}
 
-def build_index():
+
+def search_listings_es_after(query, filters, ordering, search_after=None, pit_id=None,
+                             use_pit=False, page_size=12, count=None):
     """
-    Index all active listings. Call after Elasticsearch is running:
-        python manage.py index_listings
+    One page of a search_after scan sorted by (ordering, id).
+
+    With `use_pit` the first page opens a point in time and later pages
+    pass its id back, so the listing set does not shift while paging.
+    Returns (ids, next_search_after or None, pit_id, total, total_exact).
     """
+    client = get_es_client()
+    if use_pit and not pit_id:
+        pit_id = client.open_point_in_time(index="listings", keep_alive=PIT_KEEP_ALIVE)["id"]
+
+    body = {
+        "query": listing_query(query, filters),
+        "sort": listing_sort(ordering),
+        "size": page_size + 1,
+        "track_total_hits": TRACK_TOTAL_HITS.get(count, False),
+    }
+    if search_after:
+        body["search_after"] = search_after
+    if pit_id:
+        body["pit"] = {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE}
+        result = _search(client, body=body)
+        pit_id = result.get("pit_id", pit_id)
+    else:
+        result = _search(client, index="listings", body=body)
+
+    hits = result["hits"]["hits"]
+    page, more = hits[:page_size], len(hits) > page_size
+    total, total_exact = _total(result["hits"])
+    next_after = page[-1]["sort"] if more else None
+    if not more and pit_id:
+        client.close_point_in_time(id=pit_id)
+        pit_id = None
+    return [int(h["_id"]) for h in page], next_after, pit_id, total, total_exact
+
+
+# Query-time boosts live in listing_query; ES 8 rejects mapping-level "boost".
+LISTING_MAPPING = {
+    "properties": {
+        "id":              {"type": "long"},  # sort tiebreaker (sorting on _id is disallowed)
+        "title":           {"type": "text"},
+        "description":     {"type": "text"},
+        "city":            {"type": "text", "fields": {"keyword": {"type": "keyword"}}},
+        "country":         {"type": "text", "fields": {"keyword": {"type": "keyword"}}},
+        "address":         {"type": "text"},
+        "property_type":   {"type": "keyword"},
+        "price_per_night": {"type": "float"},
+        "guests":          {"type": "integer"},
+        "bedrooms":        {"type": "integer"},
+        "bathrooms":       {"type": "float"},
+        "is_active":       {"type": "boolean"},
+        "has_wifi":        {"type": "boolean"},
+        "has_pool":        {"type": "boolean"},
+        "has_kitchen":     {"type": "boolean"},
+        "has_parking":     {"type": "boolean"},
+        "has_ac":          {"type": "boolean"},
+        "has_gym":         {"type": "boolean"},
+        "has_workspace":   {"type": "boolean"},
+        "has_fireplace":   {"type": "boolean"},
+        "has_bbq":         {"type": "boolean"},
+        "has_washer":      {"type": "boolean"},
+        "has_tv":          {"type": "boolean"},
+        "has_ev_charger":  {"type": "boolean"},
+        "amenities":       {"type": "keyword"},
+        "amenity_mask":    {"type": "integer"},
+        "created_at":      {"type": "date"},
+        "latitude":        {"type": "float"},
+        "longitude":       {"type": "float"},
+        "location":        {"type": "geo_point"},
+        # ListingCardSerializer output, returned as-is for `view=card`; stored, not indexed
+        "card":            {"type": "object", "enabled": False},
+    }
+}
+
+# Columns read with .values() — no model instances are built while indexing.
+DOCUMENT_FIELDS = [
+    'id', 'title', 'description', 'city', 'state', 'country', 'address',
+    'property_type', 'price_per_night', 'guests', 'bedrooms', 'bathrooms',
+    'is_active', 'amenity_mask', 'created_at', 'latitude', 'longitude',
+]
+
+
+def document_rows(queryset):
+    """`queryset` as the dict rows listing_document() reads: the indexed columns plus the card's."""
+    return queryset.card_values(*DOCUMENT_FIELDS)
+
+
+def listing_document(row):
+    """ES source for one `document_rows()` row."""
     from apps.listings.models import Listing
+    from apps.listings.serializers import ListingCardSerializer
+    lat, lng = row['latitude'], row['longitude']
+    amenities = Listing.amenity_slugs(row['amenity_mask'])
+    doc = {
+        "id":              row['id'],
+        "title":           row['title'],
+        "description":     row['description'],
+        "city":            row['city'],
+        "state":           row['state'],
+        "country":         row['country'],
+        "address":         row['address'],
+        "property_type":   row['property_type'],
+        "price_per_night": float(row['price_per_night']),
+        "guests":          row['guests'],
+        "bedrooms":        row['bedrooms'],
+        "bathrooms":       float(row['bathrooms']),
+        "is_active":       row['is_active'],
+        "amenities":       amenities,
+        "amenity_mask":    row['amenity_mask'],
+        "created_at":      row['created_at'].isoformat(),
+        "latitude":        float(lat) if lat is not None else None,
+        "longitude":       float(lng) if lng is not None else None,
+        "location":        {"lat": float(lat), "lon": float(lng)} if lat is not None and lng is not None else None,
+        "card":            dict(ListingCardSerializer(row).data),
+    }
+    for slug, field in Listing.AMENITIES:
+        doc[field] = slug in amenities
+    return doc
 
-    client = get_es_client()
 
-    if not client.indices.exists(index="listings"):
-        client.indices.create(index="listings", body={
-            "mappings": {
-                "properties": {
-                    "title":           {"type": "text", "boost": 3},
-                    "description":     {"type": "text"},
-                    "city":            {"type": "text", "boost": 2,
-                                        "fields": {"keyword": {"type": "keyword"}}},
-                    "country":         {"type": "text", "boost": 2,
-                                        "fields": {"keyword": {"type": "keyword"}}},
-                    "address":         {"type": "text"},
-                    "property_type":   {"type": "keyword"},
-                    "price_per_night": {"type": "float"},
-                    "guests":          {"type": "integer"},
-                    "bedrooms":        {"type": "integer"},
-                    "bathrooms":       {"type": "float"},
-                    "is_active":       {"type": "boolean"},
-                    "has_wifi":        {"type": "boolean"},
-                    "has_pool":        {"type": "boolean"},
-                    "has_kitchen":     {"type": "boolean"},
-                    "has_parking":     {"type": "boolean"},
-                    "has_ac":          {"type": "boolean"},
-                    "has_gym":         {"type": "boolean"},
-                    "has_workspace":   {"type": "boolean"},
-                    "has_fireplace":   {"type": "boolean"},
-                    "has_bbq":         {"type": "boolean"},
-                    "created_at":      {"type": "date"},
-                    "latitude":        {"type": "float"},
-                    "longitude":       {"type": "float"},
-                }
-            }
-        })
-        print("Created 'listings' index")
-
-    listings = Listing.objects.filter(is_active=True).prefetch_related('images')
-    count = 0
-    for listing in listings:
-        client.index(index="listings", id=str(listing.id), body={
-            "title":           listing.title,
-            "description":     listing.description,
-            "city":            listing.city,
-            "state":           getattr(listing, 'state', ''),
-            "country":         listing.country,
-            "address":         listing.address,
-            "property_type":   listing.property_type,
-            "price_per_night": float(listing.price_per_night),
-            "guests":          listing.guests,
-            "bedrooms":        listing.bedrooms,
-            "bathrooms":       float(listing.bathrooms),
-            "is_active":       listing.is_active,
-            "has_wifi":        listing.has_wifi,
-            "has_pool":        listing.has_pool,
-            "has_kitchen":     listing.has_kitchen,
-            "has_parking":     listing.has_parking,
-            "has_ac":          listing.has_ac,
-            "has_gym":         listing.has_gym,
-            "has_workspace":   listing.has_workspace,
-            "has_fireplace":   listing.has_fireplace,
-            "has_bbq":         listing.has_bbq,
-            "created_at":      listing.created_at.isoformat(),
-            "latitude":        float(listing.latitude)  if listing.latitude  else None,
-            "longitude":       float(listing.longitude) if listing.longitude else None,
-        })
-        count += 1
+def ensure_index(client, index="listings"):
+    if not client.indices.exists(index=index):
+        client.indices.create(index=index, body={"mappings": LISTING_MAPPING})
+        print(f"Created '{index}' index")
+    else:
+        # Adding fields is allowed on a live index; changing types is not.
+        client.indices.put_mapping(index=index, body=LISTING_MAPPING)
+
+
+class IndexProgress:
+    """Thread-safe indexing counters with a throttled progress callback."""
+
+    def __init__(self, total, callback=None, every=1000):
+        self.total, self.callback, self.every = total, callback, every
+        self.indexed = self.failed = self._last = 0
+        self.failed_ids = []
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self):
+        return self.indexed / self.elapsed if self.elapsed else 0.0
+
+    def add(self, indexed=0, failed=0):
+        with self._lock:
+            self.indexed += indexed
+            self.failed += failed
+            report = self.callback and self.indexed - self._last >= self.every
+            if report:
+                self._last = self.indexed
+        if report:
+            self.callback(self)
+
+
+def bulk_actions(client, actions, batch_size=500, progress=None):
+    """
+    Send bulk actions through streaming_bulk; return the ids that failed.
+    Deleting a document that is already gone counts as success.
+    """
+    from elasticsearch.helpers import streaming_bulk
+    failed, ok_count = [], 0
+    for ok, info in streaming_bulk(
+        client, actions, chunk_size=batch_size,
+        max_retries=3, raise_on_error=False, raise_on_exception=False,
+    ):
+        op, result = next(iter(info.items()))
+        if ok or (op == 'delete' and result.get('status') == 404):
+            ok_count += 1
+            if progress and ok_count == batch_size:
+                progress.add(indexed=ok_count)
+                ok_count = 0
+        else:
+            failed.append(int(result['_id']))
+    if progress:
+        progress.add(indexed=ok_count)
+    return failed
+
+
+def index_action(row, index="listings"):
+    return {"_op_type": "index", "_index": index, "_id": str(row['id']), "_source": listing_document(row)}
+
+
+def delete_action(listing_id, index="listings"):
+    return {"_op_type": "delete", "_index": index, "_id": str(listing_id)}
+
+
+def _bulk_rows(client, rows, index, batch_size, progress):
+    """Send rows as bulk index actions; return the ids that failed."""
+    return bulk_actions(client, (index_action(row, index) for row in rows), batch_size, progress)
+
+
+def _index_range(client, index, id_range, batch_size, chunk_size, max_retries, progress):
+    """Worker: stream one id range into the index, retrying failed documents."""
+    from django.db import connection
+    from apps.listings.models import Listing
+    lo, hi = id_range
+    try:
+        rows = document_rows(
+            Listing.objects.filter(is_active=True, id__gte=lo, id__lt=hi).order_by('id')
+        ).iterator(chunk_size=chunk_size)
+        failed = _bulk_rows(client, rows, index, batch_size, progress)
+        for attempt in range(max_retries):
+            if not failed:
+                break
+            time.sleep(0.5 * 2 ** attempt)
+            rows = document_rows(Listing.objects.filter(is_active=True, id__in=failed))
+            failed = _bulk_rows(client, rows, index, batch_size, progress)
+        progress.add(failed=len(failed))
+        return failed
+    finally:
+        # Each worker thread opened its own DB connection.
+        connection.close()
+
+
+def id_ranges(workers):
+    """Split the active id space into `workers` half-open ranges."""
+    from django.db.models import Max, Min
+    from apps.listings.models import Listing
+    bounds = Listing.objects.filter(is_active=True).aggregate(lo=Min('id'), hi=Max('id'))
+    if bounds['lo'] is None:
+        return []
+    lo, hi = bounds['lo'], bounds['hi'] + 1
+    step = max(1, -(-(hi - lo) // workers))
+    return [(start, min(start + step, hi)) for start in range(lo, hi, step)]
+
+
+def _bulk_build(client, index, batch_size, workers, chunk_size, max_retries, progress_callback):
+    from apps.listings.models import Listing
+    progress = IndexProgress(
+        Listing.objects.filter(is_active=True).count(), progress_callback, every=batch_size,
+    )
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [
+            pool.submit(_index_range, client, index, r, batch_size, chunk_size, max_retries, progress)
+            for r in id_ranges(workers)
+        ]
+        for future in futures:
+            progress.failed_ids.extend(future.result())
+    return progress
+
+
+def build_index(batch_size=500, workers=1, chunk_size=2000, max_retries=3,
+                index="listings", progress_callback=None):
+    """
+    Index all active listings with the bulk API. Call after Elasticsearch is running:
+        python manage.py index_listings [--workers 4] [--batch-size 1000]
+
+    Rows are streamed with .values().iterator(); with workers > 1 the id
+    space is split into ranges indexed by parallel threads. Documents that
+    fail are retried `max_retries` times without stopping the run.
+    Returns an IndexProgress with the final counters.
+    """
+    from django.utils import timezone
+    from .sync import set_watermark
+
+    client = get_es_client(ping=True).options(request_timeout=BULK_TIMEOUT)
+    ensure_index(client, index)
+    started = timezone.now()
+
+    progress = _bulk_build(client, index, batch_size, workers, chunk_size, max_retries, progress_callback)
+
+    client.indices.refresh(index=index)
+    # Incremental catch-up only needs to look at what changed after this run began.
+    set_watermark(index, started)
+    return progress
+
+
+# ── Versioned indices ─────────────────────────────────────────────────────
+# `listings` is an alias over `listings_v<N>`. A reindex builds the next
+# version next to the live one and moves the alias in one atomic call, so
+# searches and the sync worker never see an empty or half-built index.
+
+INDEX_ALIAS = "listings"
+VERSION_PREFIX = f"{INDEX_ALIAS}_v"
+ID_PAGE = 10000
+
+
+class ReindexError(Exception):
+    """The new index did not match the database; the alias was left alone."""
+
+
+def index_versions(client):
+    """{index name: version} for every `listings_v<N>` index."""
+    names = client.indices.get(index=f"{VERSION_PREFIX}*", ignore_unavailable=True, allow_no_indices=True)
+    versions = {}
+    for name in names:
+        suffix = name[len(VERSION_PREFIX):]
+        if suffix.isdigit():
+            versions[name] = int(suffix)
+    return versions
+
+
+def alias_targets(client):
+    """Indices the `listings` alias points at; [] when it is missing or a concrete index."""
+    if not client.indices.exists_alias(name=INDEX_ALIAS):
+        return []
+    return sorted(client.indices.get_alias(name=INDEX_ALIAS))
+
+
+def indexed_ids(client, index):
+    """Every document id in `index`, paged with search_after on `id`."""
+    ids, after = set(), None
+    while True:
+        body = {"query": {"match_all": {}}, "sort": [{"id": {"order": "asc"}}],
+                "size": ID_PAGE, "_source": False, "track_total_hits": False}
+        if after is not None:
+            body["search_after"] = after
+        hits = client.search(index=index, body=body)["hits"]["hits"]
+        ids.update(int(h["_id"]) for h in hits)
+        if len(hits) < ID_PAGE:
+            return ids
+        after = hits[-1]["sort"]
+
+
+def reconcile(client, index, batch_size=500):
+    """Index listings missing from `index` and delete documents whose listing is gone or inactive."""
+    from apps.listings.models import Listing
+    from .sync import sync_listings
+    expected = set(Listing.objects.filter(is_active=True).values_list('id', flat=True))
+    present = indexed_ids(client, index)
+    stray = sorted(expected.symmetric_difference(present))
+    return sync_listings(client, stray, index, batch_size) if stray else []
+
+
+def verify_index(client, index):
+    """(documents in `index`, active listings in the database)."""
+    from apps.listings.models import Listing
+    client.indices.refresh(index=index)
+    return client.count(index=index)["count"], Listing.objects.filter(is_active=True).count()
+
+
+def collect_old_indices(client, keep=1):
+    """Delete `listings_v<N>` indices outside the alias, except the `keep` newest. Returns their names."""
+    live = set(alias_targets(client))
+    old = sorted((v, name) for name, v in index_versions(client).items() if name not in live)
+    doomed = [name for _, name in old[:max(0, len(old) - keep)]]
+    for name in doomed:
+        client.indices.delete(index=name)
+    return doomed
+
+
+def reindex(batch_size=500, workers=1, chunk_size=2000, max_retries=3, keep=1, progress_callback=None):
+    """
+    Zero-downtime rebuild:
+        python manage.py index_listings --reindex [--keep 1]
+
+    Builds `listings_v<N+1>` with the current mapping, with replicas and
+    refresh off for the bulk load, then restores them, catches up with
+    listing writes made during the build, and checks the document count
+    against the database (reconciling ids once if they differ). Only then
+    is the `listings` alias moved — a concrete `listings` index left by
+    build_index is replaced in the same atomic call — and old versions
+    beyond `keep` are deleted. Raises ReindexError (deleting the new
+    index) if the counts still disagree. Returns (index name, IndexProgress,
+    names of the old indices deleted).
+    """
+    from django.conf import settings
+    from django.utils import timezone
+    from .models import SyncWatermark
+    from .sync import catch_up, get_watermark
+
+    client = get_es_client(ping=True).options(request_timeout=BULK_TIMEOUT)
+    index = f"{VERSION_PREFIX}{max(index_versions(client).values(), default=0) + 1}"
+    client.indices.create(index=index, body={
+        "settings": {"number_of_replicas": 0, "refresh_interval": "-1"},
+        "mappings": LISTING_MAPPING,
+    })
+    try:
+        started = timezone.now()
+        progress = _bulk_build(client, index, batch_size, workers, chunk_size, max_retries, progress_callback)
+        client.indices.put_settings(index=index, body={"index": {
+            "number_of_replicas": getattr(settings, 'ELASTICSEARCH_REPLICAS', 1),
+            "refresh_interval": None,  # back to the cluster default
+        }})
+        client.cluster.health(index=index, wait_for_status="yellow", timeout="60s")
+
+        # Writes during the build went to the live index through the alias.
+        catch_up(client, since=started, batch_size=batch_size, index=index)
+        indexed, expected = verify_index(client, index)
+        if indexed != expected:
+            reconcile(client, index, batch_size)
+            indexed, expected = verify_index(client, index)
+        if indexed != expected:
+            raise ReindexError(f"{index} holds {indexed} documents, the database {expected} active listings")
+
+        live = alias_targets(client)
+        if live:
+            actions = [{"remove": {"index": name, "alias": INDEX_ALIAS}} for name in live]
+        elif client.indices.exists(index=INDEX_ALIAS):
+            actions = [{"remove_index": {"index": INDEX_ALIAS}}]
+        else:
+            actions = []
+        actions.append({"add": {"index": index, "alias": INDEX_ALIAS}})
+        client.indices.update_aliases(body={"actions": actions})
+    except BaseException:
+        client.indices.delete(index=index, ignore_unavailable=True)
+        raise
 
-    client.indices.refresh(index="listings")
-    print(f"Indexed {count} listings")
-    return count
+    # Listing writes synced to the old index between the catch-up and the swap.
+    since = get_watermark(index)
+    SyncWatermark.objects.filter(name=index).delete()
+    catch_up(client, since=since, batch_size=batch_size, index=INDEX_ALIAS)
+    return index, progress, collect_old_indices(client, keep)
@@ -0,0 +1,108 @@
+"""
+Facet counts for search results (`facets=property_type,amenities,price`).
+
+Counts are taken over the whole filtered result set, not the current
+page. On Elasticsearch they come back as aggregations of the same search
+request; on the database they are one aggregate query whose every facet
+value is a conditional COUNT over the filtered queryset, so asking for
+all three facets still costs a single query. Both paths return the same
+shape:
+
+    {"property_type": [{"value": "villa", "count": 4}, ...],
+     "amenities":     [{"value": "wifi", "count": 11}, ...],
+     "price":         [{"from": 0, "to": 50, "count": 2}, ..., {"from": 1000, "to": None, "count": 1}]}
+
+Property types and amenities with no match are left out; price buckets
+are fixed (PRICE_RANGES) and always all present.
+"""
+from django.db.models import Count, Q
+
+FACETS = ('property_type', 'amenities', 'price')
+# Lower bounds of the price buckets; the last one is open-ended.
+PRICE_RANGES = (0, 50, 100, 150, 200, 300, 500, 1000)
+
+
+def parse_facets(value):
+    """'price,amenities' -> ['amenities', 'price']; 'all' -> every facet."""
+    names = {s.strip().lower() for s in (value or '').split(',') if s.strip()}
+    if 'all' in names:
+        return list(FACETS)
+    unknown = names.difference(FACETS)
+    if unknown:
+        raise ValueError(f'Unknown facet(s): {", ".join(sorted(unknown))}. Choose from: {", ".join(FACETS)}.')
+    return [name for name in FACETS if name in names]
+
+
+def _price_buckets():
+    bounds = PRICE_RANGES + (None,)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _values(counts):
+    """[(value, count)] -> facet entries, most frequent first, empty values dropped."""
+    return [{'value': value, 'count': count}
+            for value, count in sorted(counts, key=lambda vc: (-vc[1], vc[0])) if count]
+
+
+def es_aggregations(names):
+    """The `aggs` block computing `names` alongside the hits."""
+    from apps.listings.models import Listing
+    aggs = {}
+    if 'property_type' in names:
+        aggs['property_type'] = {"terms": {"field": "property_type", "size": len(Listing.PROPERTY_TYPES)}}
+    if 'amenities' in names:
+        aggs['amenities'] = {"terms": {"field": "amenities", "size": len(Listing.AMENITIES)}}
+    if 'price' in names:
+        aggs['price'] = {"range": {"field": "price_per_night", "ranges": [
+            {"from": lo, "to": hi} if hi is not None else {"from": lo} for lo, hi in _price_buckets()
+        ]}}
+    return aggs
+
+
+def from_es(names, aggregations):
+    """Facets in the common shape from an Elasticsearch `aggregations` response block."""
+    facets = {}
+    for name in ('property_type', 'amenities'):
+        if name in names:
+            facets[name] = _values((b['key'], b['doc_count']) for b in aggregations[name]['buckets'])
+    if 'price' in names:
+        facets['price'] = [
+            {'from': lo, 'to': hi, 'count': b['doc_count']}
+            for (lo, hi), b in zip(_price_buckets(), aggregations['price']['buckets'])
+        ]
+    return facets
+
+
+def orm_facets(queryset, names):
+    """Facets for a filtered Listing queryset, in one aggregate query."""
+    from apps.listings.models import Listing
+    aggs = {}
+    if 'property_type' in names:
+        for value, _ in Listing.PROPERTY_TYPES:
+            aggs[f'property_type__{value}'] = Count('id', filter=Q(property_type=value))
+    if 'amenities' in names:
+        for slug, field in Listing.AMENITIES:
+            aggs[f'amenities__{slug}'] = Count('id', filter=Q(**{field: True}))
+    if 'price' in names:
+        for i, (lo, hi) in enumerate(_price_buckets()):
+            bucket = Q(price_per_night__gte=lo)
+            if hi is not None:
+                bucket &= Q(price_per_night__lt=hi)
+            aggs[f'price__{i}'] = Count('id', filter=bucket)
+    if not aggs:
+        return {}
+
+    row = queryset.order_by().aggregate(**aggs)
+    facets = {}
+    if 'property_type' in names:
+        facets['property_type'] = _values(
+            (value, row[f'property_type__{value}']) for value, _ in Listing.PROPERTY_TYPES
+        )
+    if 'amenities' in names:
+        facets['amenities'] = _values((slug, row[f'amenities__{slug}']) for slug, _ in Listing.AMENITIES)
+    if 'price' in names:
+        facets['price'] = [
+            {'from': lo, 'to': hi, 'count': row[f'price__{i}']}
+            for i, (lo, hi) in enumerate(_price_buckets())
+        ]
+    return facets
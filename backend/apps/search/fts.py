@@ -0,0 +1,149 @@
+"""
+SQLite FTS5 full-text index over listing text.
+
+`search_listing_fts` is an external-content FTS5 table over
+listings_listing (title, city, country, description, address): it
+stores only the inverted index and reads column values back from the
+listings table. Triggers keep it in step with every insert, update and
+delete, including writes that bypass Django signals.
+
+Django rebuilds a SQLite table (and drops its triggers) on some schema
+changes, so `install()` also runs after every `migrate` and restores
+anything missing.
+
+`text_search(queryset, q)` turns free text into an FTS5 MATCH
+(every word required, each matched as a prefix), joins the queryset
+to the FTS table once through the unmanaged `ListingText` model and
+selects its `rank` column as `text_rank`. The table's rank function is
+configured as bm25 with the same column weights as the Elasticsearch
+query; lower is better.
+"""
+import re
+
+from django.db import connections
+from django.db.models import F, FloatField, Lookup, TextField, Value
+
+FTS_TABLE = 'search_listing_fts'
+SOURCE_TABLE = 'listings_listing'
+COLUMNS = ('title', 'city', 'country', 'description', 'address')
+WEIGHTS = (3.0, 2.0, 2.0, 1.0, 1.0)
+TOKEN = re.compile(r'\w+')
+
+_cols = ', '.join(COLUMNS)
+_new = ', '.join(f'new.{c}' for c in COLUMNS)
+_old = ', '.join(f'old.{c}' for c in COLUMNS)
+
+CREATE_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{_cols}, content='{SOURCE_TABLE}', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+TRIGGERS = {
+    f'{FTS_TABLE}_ai': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {SOURCE_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {_cols}) VALUES (new.id, {_new}); END"
+    ),
+    f'{FTS_TABLE}_ad': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {SOURCE_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_cols}) VALUES ('delete', old.id, {_old}); END"
+    ),
+    f'{FTS_TABLE}_au': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_cols} ON {SOURCE_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_cols}) VALUES ('delete', old.id, {_old}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {_cols}) VALUES (new.id, {_new}); END"
+    ),
+}
+REBUILD = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+RANK = f"bm25({', '.join(str(w) for w in WEIGHTS)})"
+SET_RANK = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', %s)"
+DROP = [f'DROP TRIGGER IF EXISTS {name}' for name in TRIGGERS] + [f'DROP TABLE IF EXISTS {FTS_TABLE}']
+
+_available = {}
+
+
+def _existing(cursor):
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE name = %s OR (type = 'trigger' AND tbl_name = %s)",
+        [FTS_TABLE, SOURCE_TABLE],
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _rank(cursor):
+    cursor.execute(f"SELECT v FROM {FTS_TABLE}_config WHERE k = 'rank'")
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def install(connection):
+    """
+    Create the FTS table and triggers where missing, rebuilding the index if
+    anything was, and make sure the table ranks with RANK.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        if SOURCE_TABLE not in connection.introspection.table_names(cursor):
+            return False
+        existing = _existing(cursor)
+        created = not {FTS_TABLE, *TRIGGERS} <= existing
+        if created:
+            cursor.execute(CREATE_TABLE)
+            for sql in TRIGGERS.values():
+                cursor.execute(sql)
+            cursor.execute(REBUILD)
+        if _rank(cursor) != RANK:
+            cursor.execute(SET_RANK, [RANK])
+    _available.pop(connection.alias, None)
+    return created
+
+
+def uninstall(connection):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for sql in DROP:
+                cursor.execute(sql)
+    _available.pop(connection.alias, None)
+
+
+def available(using='default'):
+    """True when the database is SQLite and the FTS table exists."""
+    if using not in _available:
+        connection = connections[using]
+        if connection.vendor != 'sqlite':
+            _available[using] = False
+        else:
+            with connection.cursor() as cursor:
+                _available[using] = FTS_TABLE in _existing(cursor)
+    return _available[using]
+
+
+class Match(Lookup):
+    """`<column> MATCH <expression>`; on the table-named hidden column it searches every column."""
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class DocumentField(TextField):
+    """The FTS5 hidden column named after the table, which takes MATCH over all columns."""
+
+
+DocumentField.register_lookup(Match)
+
+
+def match_expression(q):
+    """'beach vil' -> '"beach"* "vil"*': every word required, each as a prefix."""
+    return ' '.join(f'"{token}"*' for token in TOKEN.findall(q))
+
+
+def text_search(queryset, q):
+    """Restrict a Listing queryset to FTS matches for `q` and annotate `text_rank`."""
+    expr = match_expression(q)
+    if not expr:
+        return queryset.annotate(text_rank=Value(None, output_field=FloatField())).none()
+    # One inner join: the MATCH and the rank are read from the same FTS row.
+    return queryset.filter(search_text__document__match=expr).annotate(text_rank=F('search_text__rank'))
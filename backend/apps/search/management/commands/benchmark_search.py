@@ -0,0 +1,102 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+
+from apps.listings.models import Listing
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the in-memory and SQLite FTS search engines against the ORM fallback path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=200,
+                            help='Number of generated searches to run per engine')
+        parser.add_argument('--synthetic', type=int, default=0,
+                            help='Temporarily add this many copies of existing listings (rolled back afterwards)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            if options['synthetic']:
+                self.add_synthetic(options['synthetic'], rng)
+            try:
+                self.run(options['queries'], rng)
+            finally:
+                transaction.set_rollback(True)
+                from apps.search import memory
+                memory._index = None
+
+    def add_synthetic(self, n, rng):
+        rows = list(Listing.objects.values())
+        if not rows:
+            raise CommandError('No listings to copy — run seed_data first.')
+        words = [w for r in rows for w in r['title'].split() if len(w) > 3]
+        batch = []
+        for i in range(n):
+            row = dict(rng.choice(rows))
+            row.pop('id')
+            row['title'] = ' '.join(rng.sample(words, min(4, len(words))))
+            row['price_per_night'] = rng.randint(30, 900)
+            batch.append(Listing(**row))
+        Listing.objects.bulk_create(batch, batch_size=1000)
+        self.stdout.write(f'Added {n:,} synthetic listings (rolled back at the end)')
+
+    def sample_queries(self, n, rng):
+        rows = list(Listing.objects.filter(is_active=True).values('title', 'city', 'property_type')[:500])
+        words = sorted({w.lower() for r in rows for w in r['title'].split() if len(w) > 3})
+        cities = sorted({r['city'] for r in rows})
+        types = sorted({r['property_type'] for r in rows})
+        queries = []
+        for _ in range(n):
+            params = {}
+            kind = rng.random()
+            if kind < 0.5 and words:
+                params['q'] = rng.choice(words)
+            elif kind < 0.7 and words:
+                params['q'] = rng.choice(words)[:3]  # still typing
+            elif cities:
+                params['city'] = rng.choice(cities)
+            if rng.random() < 0.3 and types:
+                params['property_type'] = rng.choice(types)
+            if rng.random() < 0.3:
+                params['max_price'] = str(rng.choice([100, 200, 400]))
+            queries.append(params)
+        return queries
+
+    def run(self, n, rng):
+        from apps.search import fts, memory
+        from apps.search.views import _fallback_search, _memory_search
+
+        started = time.perf_counter()
+        memory._index = memory.MemoryIndex.build()
+        build_ms = (time.perf_counter() - started) * 1000
+        stats = memory._index.stats()
+        self.stdout.write(
+            f'Memory index: {stats["documents"]:,} listings, {stats["terms"]:,} terms, '
+            f'{stats["postings"]:,} postings, {stats["array_bytes"] / 1024:,.0f} KiB of arrays, '
+            f'built in {build_ms:,.0f} ms'
+        )
+
+        factory = RequestFactory()
+        requests = [factory.get('/api/search/', params) for params in self.sample_queries(n, rng)]
+        engines = [('django-orm', _fallback_search), ('memory', _memory_search)]
+        if fts.available():
+            engines.append(('sqlite-fts', lambda request: _fallback_search(request, use_fts=True)))
+        for engine, func in engines:
+            timings, hits = [], 0
+            for request in requests:
+                t = time.perf_counter()
+                result = func(request)
+                timings.append((time.perf_counter() - t) * 1000)
+                hits += result['count']
+            timings.sort()
+            self.stdout.write(
+                f'{engine:>11}: p50 {statistics.median(timings):7.2f} ms · '
+                f'p95 {timings[int(0.95 * (len(timings) - 1))]:7.2f} ms · '
+                f'mean {statistics.fmean(timings):7.2f} ms · {hits / len(timings):,.1f} hits/query'
+            )
@@ -4,14 +4,68 @@ from django.core.management.base import BaseCommand
 class Command(BaseCommand):
     help = 'Index all listings into Elasticsearch (only run when ES is running)'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Documents per bulk request')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Parallel indexing threads, each over its own id range')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Rows fetched per database round trip')
+        parser.add_argument('--max-retries', type=int, default=3,
+                            help='Retries for documents rejected by Elasticsearch')
+        parser.add_argument('--reindex', action='store_true',
+                            help='Build a new listings_v<N> index and swap the listings alias to it')
+        parser.add_argument('--keep', type=int, default=1,
+                            help='With --reindex: previous index versions to keep for rollback')
+
     def handle(self, *args, **options):
         self.stdout.write('Connecting to Elasticsearch...')
         try:
+            if options['reindex']:
+                return self.reindex(options)
             from apps.search.documents import build_index
-            count = build_index()
-            self.stdout.write(self.style.SUCCESS(f'✅ Indexed {count} listings into Elasticsearch'))
+            progress = build_index(
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                chunk_size=options['chunk_size'],
+                max_retries=options['max_retries'],
+                progress_callback=self.report,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ Indexed {progress.indexed} listings into Elasticsearch '
+                f'in {progress.elapsed:.1f}s ({progress.rate:,.0f} docs/s)'
+            ))
+            if progress.failed_ids:
+                self.stdout.write(self.style.WARNING(
+                    f'⚠ {len(progress.failed_ids)} listings failed after retries: '
+                    f'{progress.failed_ids[:20]}'
+                ))
         except ConnectionError as e:
             self.stdout.write(self.style.ERROR(f'❌ Elasticsearch not reachable: {e}'))
             self.stdout.write('Start Elasticsearch first, then re-run this command.')
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'❌ Error: {e}'))
+
+    def reindex(self, options):
+        from apps.search.documents import reindex
+        index, progress, deleted = reindex(
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            max_retries=options['max_retries'],
+            keep=options['keep'],
+            progress_callback=self.report,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Built {index} with {progress.indexed} listings in {progress.elapsed:.1f}s '
+            f'({progress.rate:,.0f} docs/s); the listings alias now points to it'
+        ))
+        if deleted:
+            self.stdout.write(f'Deleted old indices: {", ".join(deleted)}')
+
+    def report(self, progress):
+        pct = 100 * progress.indexed / progress.total if progress.total else 100
+        self.stdout.write(
+            f'  {progress.indexed:,}/{progress.total:,} ({pct:.0f}%) '
+            f'· {progress.rate:,.0f} docs/s · {progress.failed} failed'
+        )
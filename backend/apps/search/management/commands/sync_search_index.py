@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+
+class Command(BaseCommand):
+    help = 'Push queued listing changes (the search outbox) into Elasticsearch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Outbox rows drained per bulk request')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling the outbox instead of exiting once it is empty')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to sleep between polls in --loop mode')
+        parser.add_argument('--catch-up', action='store_true',
+                            help='Re-sync every listing updated since the stored watermark, then drain')
+        parser.add_argument('--since',
+                            help='ISO timestamp to catch up from instead of the stored watermark')
+
+    def handle(self, *args, **options):
+        from apps.search.documents import BULK_TIMEOUT, get_es_client
+        from apps.search.sync import catch_up, drain_outbox, get_watermark
+
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError('--since must be an ISO 8601 timestamp')
+
+        try:
+            client = get_es_client(ping=True).options(request_timeout=BULK_TIMEOUT)
+        except ConnectionError as e:
+            raise CommandError(str(e))
+
+        if options['catch_up'] or since:
+            self.stdout.write(f'Catching up from {since or get_watermark() or "the beginning"}...')
+            synced, failed = catch_up(client, since=since, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'✅ Caught up {synced} listings'))
+            if failed:
+                self.stdout.write(self.style.WARNING(f'⚠ {len(failed)} failed and were queued in the outbox'))
+
+        while True:
+            total = 0
+            while True:
+                synced, failed = drain_outbox(client, batch_size=options['batch_size'])
+                if failed:
+                    self.stdout.write(self.style.WARNING(f'⚠ {len(failed)} listings failed, will retry: {failed[:20]}'))
+                if not synced or len(failed) == synced:
+                    break
+                total += synced - len(failed)
+            if total:
+                self.stdout.write(self.style.SUCCESS(f'✅ Synced {total} listings'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,368 @@
+"""
+In-process inverted-index search engine (`engine=memory`).
+
+Active listings are tokenized into an inverted index whose posting lists
+are parallel `array`s (document positions, field-weighted term
+frequencies), and every filterable column is held in its own array, so a
+search is: intersect the posting lists of the query terms (the last term
+matches as a prefix), test the structured filters against the column
+arrays, then rank by BM25 or sort by the requested column.
+
+Documents are addressed by position. An update tombstones the old
+position and appends the new version, which keeps every posting list
+sorted without rewriting it; the index is rebuilt from scratch once
+tombstones pass REBUILD_TOMBSTONE_RATIO.
+
+The index follows the database on its own. Each process keeps its own
+copy, so the change check reads the database rather than a cache token:
+at most once per REFRESH_INTERVAL it compares the latest `updated_at`
+and the active listing count (`listings_state()`) with what it was built
+from, re-reads the rows whose `updated_at` moved past its watermark, and
+rebuilds if its active count no longer matches (a hard delete).
+"""
+import bisect
+import math
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import Counter
+from datetime import timedelta
+
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from apps.bookings.availability import parse_stay, unavailable_listing_ids
+from apps.listings import geo
+
+# (field, weight) — the same boosts the Elasticsearch query uses.
+TEXT_FIELDS = (('title', 3.0), ('city', 2.0), ('country', 2.0), ('description', 1.0), ('address', 1.0))
+ROW_FIELDS = [
+    'id', 'title', 'city', 'country', 'description', 'address', 'property_type',
+    'price_per_night', 'guests', 'bedrooms', 'amenity_mask', 'latitude', 'longitude',
+    'is_active', 'created_at', 'updated_at',
+]
+BM25_K1, BM25_B = 1.2, 0.75
+MAX_PREFIX_EXPANSIONS = 50
+REBUILD_TOMBSTONE_RATIO = 0.25
+REFRESH_INTERVAL = 1.0
+WATERMARK_OVERLAP = timedelta(minutes=1)
+TOKEN = re.compile(r'\w+')
+NAN = float('nan')
+
+
+def fold(text):
+    """Case-fold and strip accents: 'Zürich' -> 'zurich'."""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text):
+    return TOKEN.findall(fold(text))
+
+
+def listings_state():
+    """(latest updated_at, active count) of the listings table — one aggregate query."""
+    from apps.listings.models import Listing
+    row = Listing.objects.aggregate(updated=Max('updated_at'), active=Count('id', filter=Q(is_active=True)))
+    return row['updated'], row['active']
+
+
+def _flag(value):
+    value = value.lower()
+    if value in ('true', '1'):
+        return True
+    if value in ('false', '0'):
+        return False
+    raise ValueError(f'Invalid boolean: {value!r}')
+
+
+class MemoryIndex:
+    def __init__(self):
+        self.pos = {}                 # listing id -> live position
+        self.ids = array('q')
+        self.alive = bytearray()
+        self.updated = array('d')     # updated_at timestamps, to skip unchanged rows on refresh
+        self.created = array('d')
+        self.price = array('d')
+        self.guests = array('l')
+        self.bedrooms = array('l')
+        self.mask = array('L')
+        self.lat = array('d')
+        self.lng = array('d')
+        self.doc_len = array('f')
+        self.property_type = []
+        self.city = []                # folded, for `icontains`
+        self.country = []
+        self.postings = {}            # term -> (array('L') positions, array('f') weighted tf)
+        self._terms = []              # sorted vocabulary, for prefix lookups
+        self._terms_dirty = False
+        self.total_len = 0.0
+        self.state = None
+        self.watermark = None
+        self.checked_at = 0.0
+        self.lock = threading.RLock()
+
+    # ── Building ──────────────────────────────────────────────────────────
+
+    @classmethod
+    def build(cls):
+        from apps.listings.models import Listing
+        index = cls()
+        index.state = listings_state()
+        index.watermark = timezone.now()
+        rows = Listing.objects.filter(is_active=True).values(*ROW_FIELDS).iterator(chunk_size=2000)
+        for row in rows:
+            index._add(row)
+        index.checked_at = time.monotonic()
+        return index
+
+    def __len__(self):
+        return len(self.pos)
+
+    def _add(self, row):
+        p = len(self.ids)
+        self.pos[row['id']] = p
+        self.ids.append(row['id'])
+        self.alive.append(1)
+        self.updated.append(row['updated_at'].timestamp())
+        self.created.append(row['created_at'].timestamp())
+        self.price.append(float(row['price_per_night']))
+        self.guests.append(row['guests'])
+        self.bedrooms.append(row['bedrooms'])
+        self.mask.append(row['amenity_mask'])
+        has_point = row['latitude'] is not None and row['longitude'] is not None
+        self.lat.append(float(row['latitude']) if has_point else NAN)
+        self.lng.append(float(row['longitude']) if has_point else NAN)
+        self.property_type.append(row['property_type'])
+        self.city.append(fold(row['city']))
+        self.country.append(fold(row['country']))
+
+        tf, length = Counter(), 0.0
+        for field, weight in TEXT_FIELDS:
+            tokens = tokenize(row[field])
+            length += weight * len(tokens)
+            for token in tokens:
+                tf[token] += weight
+        self.doc_len.append(length)
+        self.total_len += length
+        for term, freq in tf.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = (array('L'), array('f'))
+                self._terms_dirty = True
+            posting[0].append(p)
+            posting[1].append(freq)
+
+    def _remove(self, listing_id):
+        p = self.pos.pop(listing_id, None)
+        if p is not None:
+            self.alive[p] = 0
+            self.total_len -= self.doc_len[p]
+
+    def apply(self, row):
+        """Insert, replace or drop one listing row."""
+        p = self.pos.get(row['id'])
+        if p is not None and self.updated[p] == row['updated_at'].timestamp() and row['is_active']:
+            return
+        self._remove(row['id'])
+        if row['is_active']:
+            self._add(row)
+
+    @property
+    def tombstones(self):
+        return len(self.ids) - len(self.pos)
+
+    def refresh(self):
+        """
+        Catch up with listing writes made since the last check. Returns the
+        index to use from now on — a fresh one when a rebuild was needed.
+        """
+        from apps.listings.models import Listing
+        with self.lock:
+            if time.monotonic() - self.checked_at < REFRESH_INTERVAL:
+                return self
+            self.checked_at = time.monotonic()
+            state = listings_state()
+            if state == self.state:
+                return self
+
+            started = timezone.now()
+            rows = Listing.objects.filter(updated_at__gte=self.watermark - WATERMARK_OVERLAP).values(*ROW_FIELDS)
+            for row in rows:
+                self.apply(row)
+            self.state, self.watermark = state, started
+
+            if (state[1] != len(self.pos)
+                    or self.tombstones > REBUILD_TOMBSTONE_RATIO * len(self.ids)):
+                return MemoryIndex.build()
+            return self
+
+    # ── Searching ─────────────────────────────────────────────────────────
+
+    def _expand(self, term):
+        """Vocabulary terms starting with `term`, the exact term first."""
+        if self._terms_dirty:
+            self._terms = sorted(self.postings)
+            self._terms_dirty = False
+        i = bisect.bisect_left(self._terms, term)
+        out = []
+        while i < len(self._terms) and self._terms[i].startswith(term) and len(out) < MAX_PREFIX_EXPANSIONS:
+            out.append(self._terms[i])
+            i += 1
+        return out
+
+    def _match(self, query):
+        """{position: bm25 score} for live documents containing every query term."""
+        terms = tokenize(query)
+        n = len(self.pos)
+        if not terms or not n:
+            return {}
+        avg_len = self.total_len / n or 1.0
+        alive, doc_len = self.alive, self.doc_len
+
+        scores = None
+        for i, term in enumerate(terms):
+            # The last word is still being typed: match it as a prefix.
+            variants = self._expand(term) if i == len(terms) - 1 else [term]
+            term_scores = {}
+            for variant in variants:
+                positions, freqs = self.postings.get(variant, ((), ()))
+                if not positions:
+                    continue
+                df = len(positions)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                for p, tf in zip(positions, freqs):
+                    if not alive[p] or (scores is not None and p not in scores):
+                        continue
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * doc_len[p] / avg_len)
+                    term_scores[p] = term_scores.get(p, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {p: s + term_scores[p] for p, s in scores.items() if p in term_scores}
+            if not scores:
+                return {}
+        return scores
+
+    def _predicates(self, filters):
+        """One position -> bool test per structured filter, reading the column arrays."""
+        from apps.listings.models import Listing
+        tests = []
+
+        def number(key, cast=float):
+            try:
+                return cast(filters[key])
+            except ValueError:
+                raise ValueError(f'{key} must be a number.')
+
+        if filters.get('property_type'):
+            value = filters['property_type']
+            tests.append(lambda p: self.property_type[p] == value)
+        for key, column in (('city', self.city), ('country', self.country)):
+            if filters.get(key):
+                needle = fold(filters[key])
+                tests.append(lambda p, column=column, needle=needle: needle in column[p])
+        for key, column, op in (
+            ('min_price', self.price, float.__ge__), ('max_price', self.price, float.__le__),
+            ('min_guests', self.guests, float.__ge__), ('min_bedrooms', self.bedrooms, float.__ge__),
+        ):
+            if filters.get(key):
+                bound = number(key)
+                tests.append(lambda p, column=column, op=op, bound=bound: op(float(column[p]), bound))
+
+        required, excluded = 0, 0
+        if filters.get('amenities'):
+            required |= Listing.amenity_bits(s.strip() for s in filters['amenities'].split(',') if s.strip())
+        for slug, field in Listing.AMENITIES:
+            if filters.get(field):
+                bit = Listing.amenity_bits([slug])
+                if _flag(filters[field]):
+                    required |= bit
+                else:
+                    excluded |= bit
+        if required or excluded:
+            tests.append(lambda p: self.mask[p] & required == required and not self.mask[p] & excluded)
+
+        if filters.get('bbox'):
+            south, west, north, east = geo.parse_bbox(filters['bbox'])
+
+            def in_box(p):
+                lat, lng = self.lat[p], self.lng[p]
+                if not south <= lat <= north:  # NaN fails too
+                    return False
+                return west <= lng <= east if west <= east else lng >= west or lng <= east
+            tests.append(in_box)
+        if filters.get('near'):
+            lat0, lng0 = geo.parse_point(filters['near'])
+            radius = geo.near_radius(filters)
+            if radius is not None:
+                tests.append(lambda p: not math.isnan(self.lat[p])
+                             and geo.haversine_km(lat0, lng0, self.lat[p], self.lng[p]) <= radius)
+        if filters.get('check_in') or filters.get('check_out'):
+            booked = unavailable_listing_ids(*parse_stay(filters.get('check_in'), filters.get('check_out')))
+            if booked:
+                tests.append(lambda p: self.ids[p] not in booked)
+        return tests
+
+    def search(self, query, filters, ordering=None, page=1, page_size=12):
+        """
+        Returns (ids, total). Text matches are ranked by BM25 unless an
+        explicit `ordering` is given; otherwise newest first, as elsewhere.
+        `distance` sorts nearest first from filters['near'].
+        """
+        with self.lock:
+            tests = self._predicates(filters)
+            if query:
+                scores = self._match(query)
+                candidates = scores.keys()
+            else:
+                scores = None
+                candidates = (p for p in self.pos.values())
+            matches = [p for p in candidates if all(test(p) for test in tests)]
+
+            ids = self.ids
+            if ordering == 'distance' and filters.get('near'):
+                lat0, lng0 = geo.parse_point(filters['near'])
+                # Listings without coordinates (NaN) last, as on Elasticsearch.
+                distance = {p: math.inf if math.isnan(self.lat[p])
+                            else geo.haversine_km(lat0, lng0, self.lat[p], self.lng[p]) for p in matches}
+                matches.sort(key=lambda p: (distance[p], ids[p]))
+            elif scores is not None and not ordering:
+                matches.sort(key=lambda p: (-scores[p], -self.created[p], -ids[p]))
+            else:
+                ordering = ordering or '-created_at'
+                column = {'created_at': self.created, 'price_per_night': self.price}[ordering.lstrip('-')]
+                sign = -1 if ordering.startswith('-') else 1
+                matches.sort(key=lambda p: (sign * column[p], sign * ids[p]))
+
+            start = (page - 1) * page_size
+            return [ids[p] for p in matches[start:start + page_size]], len(matches)
+
+    def stats(self):
+        arrays = [self.ids, self.updated, self.created, self.price, self.guests, self.bedrooms,
+                  self.mask, self.lat, self.lng, self.doc_len]
+        posting_bytes = sum(a.itemsize * len(a) for pair in self.postings.values() for a in pair)
+        return {
+            'documents':      len(self.pos),
+            'tombstones':     self.tombstones,
+            'terms':          len(self.postings),
+            'postings':       sum(len(positions) for positions, _ in self.postings.values()),
+            'array_bytes':    sum(a.itemsize * len(a) for a in arrays) + posting_bytes,
+        }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_memory_index():
+    """The process-wide index, built on first use and refreshed from listing writes."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = MemoryIndex.build()
+    _index = _index.refresh()
+    return _index
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:05
+
+from django.db import migrations
+
+from apps.search import fts
+
+
+def install_fts(apps, schema_editor):
+    fts.install(schema_editor.connection)
+
+
+def uninstall_fts(apps, schema_editor):
+    fts.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0006_indexes'),
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        # SQLite only; a no-op on other databases.
+        migrations.RunPython(install_fts, uninstall_fts),
+    ]
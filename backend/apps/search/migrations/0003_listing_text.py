@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:09
+
+import apps.search.fts
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0006_indexes'),
+        ('search', '0002_listing_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingText',
+            fields=[
+                ('listing', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_text', serialize=False, to='listings.listing')),
+                ('document', apps.search.fts.DocumentField(db_column='search_listing_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'search_listing_fts',
+                'managed': False,
+            },
+        ),
+    ]
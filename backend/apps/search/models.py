@@ -1 +1,51 @@
-# No models — search uses Elasticsearch documents
+from django.db import models
+
+from .fts import FTS_TABLE, DocumentField
+
+
+class ListingChange(models.Model):
+    """
+    Outbox row: "listing `listing_id` changed, re-sync its search document".
+
+    Written by the listing/image/review signals inside the same transaction
+    as the change itself, so a committed edit is never lost even if
+    Elasticsearch is down. `sync_search_index` drains the table.
+    """
+    listing_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = 'search'
+        ordering  = ['id']
+        indexes   = [models.Index(fields=['listing_id', 'id'], name='listingchange_listing_idx')]
+
+    def __str__(self):
+        return f'listing {self.listing_id} changed at {self.created_at:%Y-%m-%d %H:%M:%S}'
+
+
+class SyncWatermark(models.Model):
+    """High-water mark of `Listing.updated_at` already pushed to an index (catch-up mode)."""
+    name       = models.CharField(max_length=50, unique=True)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        app_label = 'search'
+
+    def __str__(self):
+        return f'{self.name} @ {self.updated_at:%Y-%m-%d %H:%M:%S}'
+
+
+class ListingText(models.Model):
+    """
+    Read-only view of the SQLite FTS5 table (apps.search.fts), one row per
+    listing keyed by rowid = listing id, for joining from Listing querysets.
+    """
+    listing  = models.OneToOneField('listings.Listing', primary_key=True, db_column='rowid',
+                                    on_delete=models.DO_NOTHING, related_name='search_text')
+    document = DocumentField(db_column=FTS_TABLE)
+    rank     = models.FloatField()
+
+    class Meta:
+        app_label = 'search'
+        managed   = False
+        db_table  = FTS_TABLE
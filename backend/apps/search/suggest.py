@@ -0,0 +1,231 @@
+"""
+Autocomplete suggestion index.
+
+Cities, regions (`Listing.state`) and countries are weighted by their
+number of active listings; listing titles are suggested after them.
+Every suggestion is stored under its folded full text and under each of
+its later words ("new york" and "york"), in one sorted array, so a
+prefix lookup is a bisect plus a short forward scan. When a prefix finds
+too little, place names starting with the same letter are matched with
+a bounded edit distance to absorb typos ("barcleona").
+
+A keystroke only reads the process copy of the index. When the listings
+table changes — its latest `updated_at` or active count, checked at most
+once per REFRESH_INTERVAL, as for the memory index — the index is fetched
+from the cache if another process already caught up, otherwise a new one
+is made from the current one plus the listings whose `updated_at` passed
+its watermark, and stored in the cache. An index is never modified once
+published; requests keep reading the old one until the new one replaces
+it.
+"""
+import bisect
+import threading
+import time
+from collections import Counter
+
+from django.utils import timezone
+
+from apps.listings.cache import get_cache
+from .memory import REFRESH_INTERVAL, WATERMARK_OVERLAP, fold, listings_state
+
+LIMIT = 8
+MAX_LISTINGS = 3           # titles shown per answer, after places
+SCAN_LIMIT = 200           # keys inspected per prefix lookup
+CACHE_KEY = 'search:suggest:{updated}:{active}'
+CACHE_TIMEOUT = 24 * 3600
+ROW_FIELDS = ['id', 'title', 'city', 'state', 'country', 'is_active']
+TYPE_ORDER = {'city': 0, 'region': 1, 'country': 2, 'listing': 3}
+
+
+def _refs(pk, title, city, state, country):
+    """Suggestion identities a listing contributes to."""
+    if city:
+        yield ('city', city, country)
+    if state:
+        yield ('region', state, country)
+    if country:
+        yield ('country', country)
+    if title:
+        yield ('listing', pk, title, city, country)
+
+
+def _text(ref):
+    return ref[2] if ref[0] == 'listing' else ref[1]
+
+
+def _cache_key(state):
+    updated, active = state
+    return CACHE_KEY.format(updated=updated.timestamp() if updated else 0, active=active)
+
+
+def _word_starts(text):
+    """'new york city' -> ['new york city', 'york city', 'city']"""
+    words = text.split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+def _within(query, key, max_dist):
+    """True if `query` is within `max_dist` edits (transpositions included) of a prefix of `key`."""
+    before, prev = None, list(range(len(key) + 1))
+    for i, qc in enumerate(query, 1):
+        cur = [i]
+        for j, kc in enumerate(key, 1):
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (qc != kc))
+            if before is not None and j > 1 and qc == key[j - 2] and query[i - 2] == kc:
+                d = min(d, before[j - 2] + 1)
+            cur.append(d)
+        if min(cur) > max_dist:
+            return False
+        before, prev = prev, cur
+    return min(prev) <= max_dist
+
+
+class SuggestionIndex:
+    def __init__(self):
+        self.listings = {}      # listing id -> its refs
+        self.weights = Counter()
+        self.keys, self.refs = [], []
+        self.place_keys, self.place_refs = [], []
+        self.state = None
+        self.watermark = None
+
+    @classmethod
+    def build(cls):
+        from apps.listings.models import Listing
+        index = cls()
+        index.state, index.watermark = listings_state(), timezone.now()
+        for row in Listing.objects.filter(is_active=True).values(*ROW_FIELDS).iterator(chunk_size=2000):
+            index._add(row)
+        index._reindex()
+        return index
+
+    def _add(self, row):
+        refs = tuple(_refs(row['id'], row['title'], row['city'], row['state'], row['country']))
+        self.listings[row['id']] = refs
+        self.weights.update(refs)
+
+    def _remove(self, pk):
+        for ref in self.listings.pop(pk, ()):
+            self.weights[ref] -= 1
+            if self.weights[ref] <= 0:
+                del self.weights[ref]
+
+    def _reindex(self):
+        pairs, places = [], []
+        for ref in self.weights:
+            for key in _word_starts(fold(_text(ref))):
+                pairs.append((key, ref))
+                if ref[0] != 'listing':
+                    places.append((key, ref))
+        pairs.sort()
+        places.sort()
+        self.keys, self.refs = [k for k, _ in pairs], [r for _, r in pairs]
+        self.place_keys, self.place_refs = [k for k, _ in places], [r for _, r in places]
+
+    def catch_up(self, state):
+        """
+        A new index: this one plus the listing writes made since its
+        watermark, or a full rebuild if rows were deleted. `self` is left as is.
+        """
+        from apps.listings.models import Listing
+        started = timezone.now()
+        index = SuggestionIndex()
+        index.listings, index.weights = dict(self.listings), Counter(self.weights)
+        rows = Listing.objects.filter(updated_at__gte=self.watermark - WATERMARK_OVERLAP).values(*ROW_FIELDS)
+        for row in rows:
+            index._remove(row['id'])
+            if row['is_active']:
+                index._add(row)
+        if state[1] != len(index.listings):
+            return SuggestionIndex.build()
+        index._reindex()
+        index.state, index.watermark = state, started
+        return index
+
+    # ── Lookup ────────────────────────────────────────────────────────────
+
+    def _prefix(self, keys, refs, query):
+        found = {}
+        i = bisect.bisect_left(keys, query)
+        end = min(len(keys), i + SCAN_LIMIT)
+        while i < end and keys[i].startswith(query):
+            found[refs[i]] = keys[i] == query or keys[i] == fold(_text(refs[i]))
+            i += 1
+        return found
+
+    def _fuzzy(self, query):
+        max_dist = 1 if len(query) < 6 else 2
+        keys, refs = self.place_keys, self.place_refs
+        lo = bisect.bisect_left(keys, query[0])
+        hi = bisect.bisect_left(keys, chr(ord(query[0]) + 1))
+        return {refs[i]: False for i in range(lo, hi)
+                if _within(query, keys[i][:len(query) + max_dist], max_dist)}
+
+    def suggest(self, q, limit=LIMIT):
+        query = ' '.join(fold(q).split())
+        if len(query) < 2:
+            return []
+        found = self._prefix(self.keys, self.refs, query)
+        if len(found) < limit and len(query) >= 3:
+            for ref, full in self._fuzzy(query).items():
+                found.setdefault(ref, full)
+
+        ranked = sorted(found, key=lambda ref: (
+            ref[0] == 'listing', not found[ref], -self.weights[ref], TYPE_ORDER[ref[0]], _text(ref),
+        ))
+        out, titles = [], 0
+        for ref in ranked:
+            if ref[0] == 'listing':
+                if titles >= MAX_LISTINGS:
+                    continue
+                titles += 1
+            out.append(self._payload(ref))
+            if len(out) >= limit:
+                break
+        return out
+
+    def _payload(self, ref):
+        kind = ref[0]
+        if kind == 'city':
+            _, city, country = ref
+            return {'city': city, 'country': country, 'label': f'{city}, {country}',
+                    'type': kind, 'count': self.weights[ref]}
+        if kind == 'region':
+            _, region, country = ref
+            return {'city': None, 'country': country, 'region': region, 'label': f'{region}, {country}',
+                    'type': kind, 'count': self.weights[ref]}
+        if kind == 'country':
+            return {'city': None, 'country': ref[1], 'label': ref[1], 'type': kind, 'count': self.weights[ref]}
+        _, pk, title, city, country = ref
+        return {'city': city, 'country': country, 'label': title, 'type': kind, 'listing_id': pk}
+
+
+_index = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_suggestion_index():
+    """
+    The process copy of the index, caught up with listing writes at most once
+    per REFRESH_INTERVAL. A caught-up index replaces the old one in a single
+    assignment, so a concurrent lookup sees one or the other, never a mix.
+    """
+    global _index, _checked_at
+    current = _index
+    if current is not None and time.monotonic() - _checked_at < REFRESH_INTERVAL:
+        return current
+    with _lock:
+        current = _index
+        if current is not None and time.monotonic() - _checked_at < REFRESH_INTERVAL:
+            return current
+        state = listings_state()
+        if current is None or current.state != state:
+            cache = get_cache()
+            index = cache.get(_cache_key(state))
+            if index is None:
+                index = current.catch_up(state) if current is not None else SuggestionIndex.build()
+                cache.set(_cache_key(index.state), index, CACHE_TIMEOUT)
+            _index = current = index
+        _checked_at = time.monotonic()
+        return current
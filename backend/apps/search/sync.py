@@ -0,0 +1,101 @@
+"""
+Incremental search index sync.
+
+Listing, ListingImage and Review signals call `record_listing_changes`,
+which appends the listing id to the `ListingChange` outbox inside the
+writer's transaction. `drain_outbox` (run by `sync_search_index`) reads
+the outbox in id order, collapses repeated edits of the same listing into
+one document write, upserts active listings, deletes inactive or removed
+ones, and only then drops the processed rows, so a failed bulk request
+is retried on the next pass.
+
+Writes that bypass signals (queryset.update(), raw SQL, restored dumps)
+are picked up by `catch_up`, which re-syncs every listing whose
+`updated_at` is past the stored watermark. Hard deletes leave no row to
+find that way; they are only ever seen through the outbox.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import ListingChange, SyncWatermark
+
+# Rows committed late can carry an updated_at slightly older than the
+# watermark; catch-up re-reads this much history to cover them.
+WATERMARK_OVERLAP = timedelta(minutes=1)
+
+
+def record_listing_changes(listing_ids):
+    ListingChange.objects.bulk_create([ListingChange(listing_id=pk) for pk in set(listing_ids) if pk])
+
+
+def sync_listings(client, listing_ids, index="listings", batch_size=500):
+    """Upsert or delete the documents of `listing_ids`; return the ids that failed."""
+    from apps.listings.models import Listing
+    from .documents import bulk_actions, delete_action, document_rows, index_action
+
+    listing_ids = set(listing_ids)
+    rows = document_rows(Listing.objects.filter(pk__in=listing_ids))
+    active = {row['id']: row for row in rows if row['is_active']}
+    actions = [index_action(row, index) for row in active.values()]
+    actions += [delete_action(pk, index) for pk in sorted(listing_ids - active.keys())]
+    return bulk_actions(client, actions, batch_size)
+
+
+def drain_outbox(client, batch_size=500, index="listings"):
+    """
+    Sync up to `batch_size` outbox rows. Returns (listings_synced, failed_ids);
+    listings_synced is 0 once the outbox is empty.
+    """
+    changes = list(ListingChange.objects.order_by('id').values_list('id', 'listing_id')[:batch_size])
+    if not changes:
+        return 0, []
+    last_id = changes[-1][0]
+    listing_ids = {listing_id for _, listing_id in changes}
+
+    failed = sync_listings(client, listing_ids, index, batch_size)
+    done = listing_ids.difference(failed)
+    # Rows queued after `last_id` stay: the listing changed again since we read it.
+    ListingChange.objects.filter(id__lte=last_id, listing_id__in=done).delete()
+    return len(listing_ids), failed
+
+
+def get_watermark(index="listings"):
+    row = SyncWatermark.objects.filter(name=index).first()
+    return row.updated_at if row else None
+
+
+def set_watermark(index, value):
+    SyncWatermark.objects.update_or_create(name=index, defaults={'updated_at': value})
+
+
+def catch_up(client, since=None, batch_size=500, index="listings"):
+    """
+    Re-sync listings updated since `since` (default: the stored watermark,
+    or everything when there is none), then advance the watermark.
+    Returns (listings_synced, failed_ids).
+    """
+    from apps.listings.models import Listing
+
+    started = timezone.now()
+    since = since or get_watermark(index)
+    qs = Listing.objects.order_by('pk')
+    if since is not None:
+        qs = qs.filter(updated_at__gte=since - WATERMARK_OVERLAP)
+
+    synced, failed, batch = 0, [], []
+    for pk in qs.values_list('pk', flat=True).iterator(chunk_size=batch_size):
+        batch.append(pk)
+        if len(batch) >= batch_size:
+            failed += sync_listings(client, batch, index, batch_size)
+            synced += len(batch)
+            batch = []
+    if batch:
+        failed += sync_listings(client, batch, index, batch_size)
+        synced += len(batch)
+
+    if failed:
+        # Hand the stragglers to the outbox rather than holding the watermark back.
+        record_listing_changes(failed)
+    set_watermark(index, started)
+    return synced, failed
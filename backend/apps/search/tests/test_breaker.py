@@ -0,0 +1,105 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.listings.tests.utils import clear_caches, make_listing
+from apps.search import client as es
+from apps.search.client import CLOSED, OPEN, CircuitBreaker, breaker
+
+
+class DeferredThread:
+    """Stands in for the probe thread; `run_started()` runs it once allow() has returned."""
+    started = []
+
+    def __init__(self, target, args=(), **kwargs):
+        self.target, self.args = target, args
+
+    def start(self):
+        self.started.append(self)
+
+    @classmethod
+    def run_started(cls):
+        while cls.started:
+            thread = cls.started.pop()
+            thread.target(*thread.args)
+
+
+@mock.patch.object(es.threading, 'Thread', DeferredThread)
+class CircuitBreakerTests(TestCase):
+    def test_opens_after_the_threshold(self):
+        cb = CircuitBreaker(threshold=2, cooldown=60)
+        cb.record_failure(ConnectionError('refused'))
+        self.assertTrue(cb.allow())
+        cb.record_failure()
+        self.assertFalse(cb.allow())
+        self.assertEqual(cb.snapshot()['state'], OPEN)
+        self.assertIn('refused', cb.snapshot()['last_error'])
+
+    def test_probes_only_after_the_cooldown(self):
+        cb = CircuitBreaker(threshold=1, cooldown=60)
+        cb.record_failure()
+        probe = mock.Mock(return_value=True)
+        self.assertFalse(cb.allow(probe))
+        probe.assert_not_called()
+
+    def test_a_successful_probe_closes_it(self):
+        cb = CircuitBreaker(threshold=1, cooldown=0)
+        cb.record_failure()
+        self.assertFalse(cb.allow(lambda: True))  # this request still falls back
+        DeferredThread.run_started()
+        self.assertEqual(cb.snapshot()['state'], CLOSED)
+        self.assertTrue(cb.allow())
+
+    def test_a_failed_probe_keeps_it_open(self):
+        cb = CircuitBreaker(threshold=1, cooldown=0)
+        cb.record_failure()
+        cb.allow(mock.Mock(side_effect=ConnectionError('still down')))
+        DeferredThread.run_started()
+        self.assertEqual(cb.snapshot()['state'], OPEN)
+        self.assertIn('still down', cb.snapshot()['last_error'])
+
+    def test_open_breaker_refuses_clients(self):
+        self.addCleanup(breaker.record_success)
+        with mock.patch.object(breaker, 'threshold', 1), mock.patch.object(breaker, 'cooldown', 60):
+            breaker.record_failure()
+            with self.assertRaises(ConnectionError):
+                es.get_es_client()
+
+
+@override_settings(SEARCH_MEMORY_FALLBACK=False)
+class SearchFallbackTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.api = APIClient()
+        self.cheap = make_listing(title='Sunny loft', price_per_night=Decimal('60.00'), has_wifi=True)
+        self.dear = make_listing(title='Sunny villa', price_per_night=Decimal('400.00'))
+        make_listing(title='Dark cellar', city='Porto')
+        patcher = mock.patch('apps.search.documents.get_es_client', side_effect=ConnectionError('down'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _search(self, **params):
+        response = self.api.get('/api/search/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_elasticsearch_down_falls_back_to_the_database(self):
+        data = self._search(q='sunny')
+        self.assertIn(data['engine'], ('sqlite-fts', 'django-orm'))
+        self.assertEqual({row['id'] for row in data['results']}, {self.cheap.pk, self.dear.pk})
+
+    @override_settings(SEARCH_MEMORY_FALLBACK=True)
+    def test_memory_fallback_when_enabled(self):
+        self.assertEqual(self._search(q='sunny')['engine'], 'memory')
+
+    def test_filters_agree_across_engines(self):
+        params = {'q': 'sunny', 'city': 'lisbon', 'max_price': '100', 'amenities': 'wifi'}
+        for engine in (None, 'django-orm', 'memory'):
+            clear_caches()
+            results = self._search(**params, **({'engine': engine} if engine else {}))['results']
+            self.assertEqual([row['id'] for row in results], [self.cheap.pk], engine)
+
+    def test_unknown_engine(self):
+        self.assertEqual(self.api.get('/api/search/', {'engine': 'solr'}).status_code, 400)
@@ -0,0 +1,122 @@
+import os
+import runpy
+import threading
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.http import QueryDict
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.listings.models import Listing
+from apps.listings.tests.utils import clear_caches, make_listing
+from apps.search import views
+from apps.search.cache import cached_search, search_cache_key
+
+
+def key(query, **kwargs):
+    return search_cache_key('page', QueryDict(query), **kwargs)
+
+
+class CacheKeyTests(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def test_equivalent_searches_share_a_key(self):
+        self.assertEqual(
+            key('q=Beach&city=Lisbon&min_price=100&amenities=wifi,pool&page=1'),
+            key('city=%20lisbon&amenities=POOL,wifi&q=beach&min_price=100.00&utm_source=mail'),
+        )
+
+    def test_different_searches_do_not(self):
+        self.assertNotEqual(key('city=lisbon'), key('city=porto'))
+        self.assertNotEqual(key('page=2'), key('page=3'))
+        self.assertEqual(key('page=2', exclude=('page',)), key('page=3', exclude=('page',)))
+
+    def test_radius_only_counts_with_an_origin(self):
+        self.assertEqual(key('radius_km=5'), key(''))
+        self.assertNotEqual(key('near=38.7,-9.1&radius_km=5'), key('near=38.7,-9.1'))
+
+    def test_listing_writes_retire_every_key(self):
+        listing = make_listing()
+        before = key('city=lisbon')
+        with self.captureOnCommitCallbacks(execute=True):
+            listing.save()
+        self.assertNotEqual(key('city=lisbon'), before)
+
+
+class CoalescingTests(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def test_concurrent_misses_compute_once(self):
+        started, release, calls = threading.Event(), threading.Event(), []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'ids': [1]}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cached_search('k', compute))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'ids': [1]}] * 4)
+        self.assertEqual(cached_search('k', compute), {'ids': [1]})
+        self.assertEqual(len(calls), 1)
+
+    def test_a_failed_leader_caches_nothing(self):
+        with self.assertRaises(RuntimeError):
+            cached_search('k', mock.Mock(side_effect=RuntimeError))
+        self.assertEqual(cached_search('k', lambda: {'ids': []}), {'ids': []})
+
+
+class SearchCacheTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.listing = make_listing(price_per_night=Decimal('80.00'))
+
+    def _search(self, **params):
+        return self.client.get('/api/search/', {'engine': 'django-orm', **params})
+
+    def test_repeat_searches_skip_the_engine_but_read_fresh_rows(self):
+        with mock.patch.object(views, '_search_page', wraps=views._search_page) as search_page:
+            self._search(city='Lisbon')
+            # A write that bypasses signals leaves the cached id list in place...
+            Listing.objects.filter(pk=self.listing.pk).update(price_per_night=Decimal('95.00'))
+            response = self._search(city='lisbon ', utm_campaign='x')
+        self.assertEqual(search_page.call_count, 1)
+        # ...but the listing itself is read again.
+        self.assertEqual(response.data['results'][0]['price_per_night'], '95.00')
+
+    def test_writes_show_up_in_the_next_search(self):
+        self.assertEqual(self._search(city='Lisbon').data['count'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_listing()
+        self.assertEqual(self._search(city='Lisbon').data['count'], 2)
+
+
+class SearchCacheSettingsTests(TestCase):
+    def _caches(self, **env):
+        path = os.path.join(settings.BASE_DIR, 'config', 'settings.py')
+        with mock.patch.dict(os.environ):
+            for name in ('CACHE_BACKEND', 'SEARCH_CACHE_BACKEND', 'SEARCH_CACHE_MAX_ENTRIES'):
+                os.environ.pop(name, None)
+            os.environ.update(env)
+            return runpy.run_path(path)['CACHES']
+
+    def test_max_entries_only_for_local_memory(self):
+        self.assertEqual(self._caches()['search']['OPTIONS'], {'MAX_ENTRIES': 10000})
+        redis = 'django.core.cache.backends.redis.RedisCache'
+        self.assertNotIn('OPTIONS', self._caches(CACHE_BACKEND=redis)['search'])
+        search = self._caches(SEARCH_CACHE_BACKEND=redis)
+        self.assertEqual(search['search']['BACKEND'], redis)
+        self.assertNotIn('OPTIONS', search['search'])
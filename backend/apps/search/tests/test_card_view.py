@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.listings.models import Listing, ListingImage
+from apps.listings.serializers import ListingCardSerializer
+from apps.listings.tests.utils import clear_caches, make_listing, make_user
+from apps.search import documents
+
+CARD_FIELDS = set(ListingCardSerializer.Meta.fields)
+
+
+@override_settings(SEARCH_MEMORY_FALLBACK=False)
+class CardViewTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.api = APIClient()
+        host = make_user(is_host=True, first_name='Ana')
+        self.listings = [make_listing(host=host, has_wifi=True) for _ in range(3)]
+        ListingImage.objects.create(listing=self.listings[0], url='https://example.com/cover.jpg', is_primary=True)
+
+    def _search(self, **params):
+        response = self.api.get('/api/search/', {'view': 'card', **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_database_engines_render_cards(self):
+        for engine in ('django-orm', 'memory'):
+            clear_caches()
+            results = self._search(engine=engine)['results']
+            self.assertEqual(len(results), 3)
+            card = next(row for row in results if row['id'] == self.listings[0].pk)
+            self.assertEqual(set(card), CARD_FIELDS)
+            self.assertEqual(card['primary_image'], 'https://example.com/cover.jpg')
+            self.assertEqual(card['host_name'], 'Ana')
+            self.assertEqual(card['amenities'], ['wifi'])
+
+    def test_cards_cost_a_fixed_number_of_queries(self):
+        self._search(engine='django-orm', ordering='price_per_night')
+        clear_caches()
+        make_listing(host=self.listings[0].host)
+        with self.assertNumQueries(3):  # count, page ids, cards
+            self._search(engine='django-orm', ordering='price_per_night')
+
+    def test_elasticsearch_cards_are_used_as_stored(self):
+        first, second, _ = self.listings
+        row = Listing.objects.filter(pk=first.pk).card_values().get()
+        stored = {**ListingCardSerializer(row).data, 'title': 'From the index'}
+        with mock.patch.object(documents, 'search_listings_es',
+                               return_value=([first.pk, second.pk], 2, None, [stored, None])):
+            with self.assertNumQueries(1):  # only the card the index lacked
+                results = self._search()['results']
+        self.assertEqual([row['id'] for row in results], [first.pk, second.pk])
+        self.assertEqual(results[0]['title'], 'From the index')
+        self.assertEqual(results[1]['title'], second.title)
+
+    def test_unknown_view(self):
+        self.assertEqual(self.api.get('/api/search/', {'view': 'tiny'}).status_code, 400)
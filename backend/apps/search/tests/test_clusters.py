@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.listings.tests.utils import clear_caches, make_listing
+
+
+class ClusterTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        for lat, lng, price in [('48.8566', '2.3522', 90), ('48.8606', '2.3376', 150), ('41.3874', '2.1686', 70)]:
+            make_listing(latitude=Decimal(lat), longitude=Decimal(lng), price_per_night=Decimal(price))
+        make_listing()  # no coordinates: never clustered
+
+    def _clusters(self, **params):
+        response = self.client.get('/api/search/clusters/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_nearby_listings_share_a_cell_at_low_zoom(self):
+        data = self._clusters(zoom=5)
+        self.assertEqual(data['total'], 3)
+        counts = sorted(c['count'] for c in data['clusters'])
+        self.assertEqual(counts, [1, 2])
+        paris = max(data['clusters'], key=lambda c: c['count'])
+        self.assertEqual(paris['min_price'], Decimal('90.00'))
+        self.assertIsNone(paris['listing_id'])
+        self.assertAlmostEqual(paris['latitude'], 48.8586, places=3)
+
+    def test_high_zoom_splits_them(self):
+        self.assertEqual(len(self._clusters(zoom=16)['clusters']), 3)
+
+    def test_filters_apply(self):
+        self.assertEqual(self._clusters(zoom=5, max_price=100)['total'], 2)
+        self.assertEqual(self._clusters(zoom=5, bbox='-10,35,5,45')['total'], 1)
+
+    def test_invalid_zoom(self):
+        self.assertEqual(self.client.get('/api/search/clusters/', {'zoom': 'x'}).status_code, 400)
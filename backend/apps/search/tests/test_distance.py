@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.listings.tests.utils import clear_caches, make_listing
+from apps.search import memory
+
+ORIGIN = '38.7223,-9.1393'  # Lisbon
+
+
+class DistanceOrderingTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        memory._index = None
+        self.addCleanup(setattr, memory, '_index', None)
+        self.client = APIClient()
+        self.near = make_listing(latitude=Decimal('38.7250'), longitude=Decimal('-9.1500'))
+        self.far = make_listing(latitude=Decimal('41.1579'), longitude=Decimal('-8.6291'))   # Porto, ~275 km
+        self.nowhere = make_listing()
+
+    def _ids(self, engine, **params):
+        response = self.client.get('/api/search/', {'near': ORIGIN, 'engine': engine, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [hit['id'] for hit in response.data['results']]
+
+    def test_sorting_alone_does_not_cap_the_radius(self):
+        for engine in ('django-orm', 'memory'):
+            with self.subTest(engine=engine):
+                self.assertEqual(self._ids(engine, ordering='distance'), [self.near.id, self.far.id, self.nowhere.id])
+
+    def test_explicit_radius_still_applies(self):
+        for engine in ('django-orm', 'memory'):
+            with self.subTest(engine=engine):
+                self.assertEqual(self._ids(engine, ordering='distance', radius_km='50'), [self.near.id])
+                self.assertEqual(self._ids(engine), [self.near.id])  # a plain `near` filter keeps the default
+
+    def test_distance_is_reported(self):
+        response = self.client.get('/api/search/', {'near': ORIGIN, 'ordering': 'distance', 'engine': 'django-orm'})
+        distances = [hit['distance_km'] for hit in response.data['results']]
+        self.assertLess(distances[0], 2)
+        self.assertGreater(distances[1], 250)
+        self.assertIsNone(distances[2])
+
+    def test_distance_needs_an_origin(self):
+        response = self.client.get('/api/search/', {'ordering': 'distance'})
+        self.assertEqual(response.status_code, 400)
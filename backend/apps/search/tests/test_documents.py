@@ -0,0 +1,86 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.listings.models import Listing
+from apps.listings.tests.utils import make_listing, make_user
+from apps.search import documents
+
+
+class DocumentTests(TestCase):
+    def test_rows_build_documents_in_one_query(self):
+        host = make_user(is_host=True, first_name='Ana')
+        for _ in range(3):
+            make_listing(host=host, has_wifi=True, latitude=Decimal('38.7'), longitude=Decimal('-9.1'))
+        with self.assertNumQueries(1):
+            docs = [documents.listing_document(row) for row in documents.document_rows(Listing.objects.all())]
+        self.assertEqual(len(docs), 3)
+        doc = docs[0]
+        self.assertEqual(doc['amenities'], ['wifi'])
+        self.assertTrue(doc['has_wifi'])
+        self.assertFalse(doc['has_pool'])
+        self.assertEqual(doc['location'], {'lat': 38.7, 'lon': -9.1})
+        self.assertEqual(doc['card']['host_name'], 'Ana')
+        self.assertEqual(doc['card']['id'], doc['id'])
+
+    def test_missing_coordinates_leave_location_empty(self):
+        make_listing()
+        doc = documents.listing_document(documents.document_rows(Listing.objects.all())[0])
+        self.assertIsNone(doc['location'])
+        self.assertIsNone(doc['latitude'])
+
+
+class IdRangeTests(TestCase):
+    def test_ranges_cover_the_active_ids(self):
+        listings = [make_listing() for _ in range(7)]
+        make_listing(is_active=False)
+        ids = [listing.pk for listing in listings]
+        ranges = documents.id_ranges(3)
+        self.assertEqual(len(ranges), 3)
+        self.assertEqual(ranges[0][0], ids[0])
+        self.assertEqual(ranges[-1][1], ids[-1] + 1)
+        for (_, hi), (lo, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(hi, lo)
+
+    def test_no_listings(self):
+        self.assertEqual(documents.id_ranges(4), [])
+
+
+class BulkActionTests(TestCase):
+    def _results(self, *items):
+        return mock.patch('elasticsearch.helpers.streaming_bulk', return_value=iter(items))
+
+    def test_failed_ids_are_returned(self):
+        with self._results(
+            (True, {'index': {'_id': '1', 'status': 201}}),
+            (False, {'index': {'_id': '2', 'status': 429}}),
+            (False, {'delete': {'_id': '3', 'status': 404}}),
+        ):
+            progress = documents.IndexProgress(3)
+            failed = documents.bulk_actions(mock.Mock(), [], batch_size=2, progress=progress)
+        # A delete of a document that is already gone is not a failure.
+        self.assertEqual(failed, [2])
+        self.assertEqual(progress.indexed, 2)
+
+    def test_range_retries_failed_documents(self):
+        listings = [make_listing() for _ in range(3)]
+        calls = []
+
+        def bulk(client, actions, batch_size=500, progress=None):
+            ids = [int(action['_id']) for action in actions]
+            calls.append(ids)
+            if progress:
+                progress.add(indexed=len(ids))
+            # The first pass loses the last document.
+            return ids[-1:] if len(calls) == 1 else []
+
+        with mock.patch.object(documents, 'bulk_actions', side_effect=bulk), \
+                mock.patch('django.db.connection.close'), mock.patch.object(documents.time, 'sleep'):
+            progress = documents.IndexProgress(len(listings))
+            failed = documents._index_range(
+                mock.Mock(), 'listings', documents.id_ranges(1)[0], 500, 100, 3, progress,
+            )
+        self.assertEqual(calls, [[listing.pk for listing in listings], [listings[-1].pk]])
+        self.assertEqual(failed, [])
+        self.assertEqual(progress.failed, 0)
@@ -0,0 +1,83 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.listings.models import Listing
+from apps.listings.tests.utils import clear_caches, make_listing
+from apps.search import views
+from apps.search.facets import FACETS, es_aggregations, from_es, orm_facets, parse_facets
+
+
+def bucket(facets, name, lo):
+    return next(b['count'] for b in facets[name] if b['from'] == lo)
+
+
+class ParseFacetsTests(TestCase):
+    def test_names(self):
+        self.assertEqual(parse_facets(' Price,amenities '), ['amenities', 'price'])
+        self.assertEqual(parse_facets('all'), list(FACETS))
+        self.assertEqual(parse_facets(''), [])
+        with self.assertRaises(ValueError):
+            parse_facets('price,colour')
+
+
+class FacetCountTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        make_listing(property_type='house', price_per_night=Decimal('40.00'), has_wifi=True, has_pool=True)
+        make_listing(property_type='house', price_per_night=Decimal('120.00'), has_wifi=True)
+        make_listing(property_type='villa', price_per_night=Decimal('1200.00'))
+
+    def test_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            facets = orm_facets(Listing.objects.all(), FACETS)
+        self.assertEqual(facets['property_type'], [{'value': 'house', 'count': 2}, {'value': 'villa', 'count': 1}])
+        self.assertEqual(facets['amenities'], [{'value': 'wifi', 'count': 2}, {'value': 'pool', 'count': 1}])
+        self.assertEqual((bucket(facets, 'price', 0), bucket(facets, 'price', 100), bucket(facets, 'price', 1000)),
+                         (1, 1, 1))
+        self.assertIsNone(facets['price'][-1]['to'])
+
+    def test_elasticsearch_shape_matches(self):
+        aggs = es_aggregations(FACETS)
+        self.assertEqual(aggs['property_type']['terms']['field'], 'property_type')
+        self.assertEqual(len(aggs['price']['range']['ranges']), len(orm_facets(Listing.objects.all(), ['price'])['price']))
+        response = {
+            'property_type': {'buckets': [{'key': 'villa', 'doc_count': 1}, {'key': 'house', 'doc_count': 2}]},
+            'amenities': {'buckets': [{'key': 'wifi', 'doc_count': 2}]},
+            'price': {'buckets': [{'doc_count': n} for n in (1, 0, 1, 0, 0, 0, 0, 1)]},
+        }
+        facets = from_es(FACETS, response)
+        self.assertEqual(facets['property_type'], orm_facets(Listing.objects.all(), ['property_type'])['property_type'])
+        self.assertEqual(facets['price'], orm_facets(Listing.objects.all(), ['price'])['price'])
+
+
+class FacetApiTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.api = APIClient()
+        make_listing(property_type='house', city='Porto', has_wifi=True)
+        make_listing(property_type='villa', city='Porto')
+        make_listing(property_type='villa', city='Faro')
+
+    def _search(self, **params):
+        return self.api.get('/api/search/', {'engine': 'django-orm', **params})
+
+    def test_facets_follow_the_filters(self):
+        data = self._search(city='Porto', facets='property_type,amenities', page_size=1).data
+        self.assertEqual(len(data['results']), 1)
+        self.assertEqual(data['facets']['property_type'],
+                         [{'value': 'house', 'count': 1}, {'value': 'villa', 'count': 1}])
+        self.assertEqual(data['facets']['amenities'], [{'value': 'wifi', 'count': 1}])
+        self.assertNotIn('facets', self._search(city='Porto').data)
+
+    def test_counts_are_shared_across_pages(self):
+        self._search(facets='property_type', page_size=1)
+        with mock.patch.object(views, 'orm_facets') as facets:
+            response = self._search(facets='property_type', page_size=1, page=2, ordering='price_per_night')
+        facets.assert_not_called()
+        self.assertEqual(len(response.data['facets']['property_type']), 2)
+
+    def test_unknown_facet(self):
+        self.assertEqual(self._search(facets='colour').status_code, 400)
@@ -0,0 +1,42 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.listings.models import Listing
+from apps.listings.tests.utils import clear_caches, make_listing
+from apps.search import fts
+
+
+class FullTextSearchTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        if not fts.available():
+            self.skipTest('needs SQLite with the FTS5 index')
+        self.title = make_listing(title='Harbour loft', description='Bright rooms.')
+        self.body = make_listing(title='Old town room', description='A short walk to the harbour.')
+        make_listing(title='Mountain cabin')
+
+    def _search(self, q):
+        qs = fts.text_search(Listing.objects.filter(is_active=True), q).order_by('text_rank')
+        return list(qs.values_list('id', flat=True))
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self._search('harbour'), [self.title.id, self.body.id])
+
+    def test_every_word_is_required_and_the_last_is_a_prefix(self):
+        self.assertEqual(self._search('harbour lo'), [self.title.id])
+        self.assertEqual(self._search('!!'), [])
+
+    def test_triggers_follow_writes(self):
+        self.body.description = 'Next to the castle.'
+        self.body.save()
+        self.assertEqual(self._search('harbour'), [self.title.id])
+        self.title.delete()
+        self.assertEqual(self._search('harbour'), [])
+
+    def test_one_join_one_match(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self._search('harbour')
+        sql = ctx.captured_queries[-1]['sql']
+        self.assertEqual(sql.count(' MATCH '), 1)
+        self.assertEqual(sql.count(fts.FTS_TABLE + '" ON'), 1)
@@ -0,0 +1,24 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.listings.tests.utils import make_user
+from apps.search.client import breaker
+
+
+class SearchHealthTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        breaker.record_failure(ConnectionError('http://10.0.0.7:9200 refused'))
+        self.addCleanup(breaker.record_success)
+
+    def test_anonymous_callers_get_the_state_only(self):
+        data = self.client.get('/api/search/health/').data
+        self.assertEqual(set(data), {'status', 'breaker'})
+        self.assertEqual(set(data['breaker']), {'state'})
+        self.assertNotIn('10.0.0.7', str(data))
+
+    def test_staff_get_the_details(self):
+        self.client.force_authenticate(make_user(is_staff=True))
+        data = self.client.get('/api/search/health/').data
+        self.assertIn('10.0.0.7', data['breaker']['last_error'])
+        self.assertIn('latency', data)
@@ -0,0 +1,46 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.listings.models import Listing
+from apps.listings.tests.utils import clear_caches, make_listing
+from apps.search import memory
+
+
+class MemoryIndexTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        memory._index = None
+        self.addCleanup(setattr, memory, '_index', None)
+        self.beach = make_listing(title='Beach villa', city='Faro')
+        self.flat = make_listing(title='City flat', city='Porto')
+
+    def _search(self, query='', **filters):
+        index = memory.get_memory_index()
+        index.checked_at = 0.0  # skip the refresh interval
+        return memory.get_memory_index().search(query, filters)
+
+    def test_text_match_and_filters(self):
+        self.assertEqual(self._search('beach'), ([self.beach.id], 1))
+        self.assertEqual(self._search('', city='porto'), ([self.flat.id], 1))
+        self.assertEqual(self._search('vil'), ([self.beach.id], 1))  # last word as a prefix
+
+    def test_sees_writes_that_bypass_the_cache_tokens(self):
+        # A write from another process: no signal runs here, no token changes.
+        self._search('beach')
+        Listing.objects.filter(pk=self.beach.pk).update(is_active=False)
+        self.assertEqual(self._search('beach'), ([], 0))
+
+    def test_picks_up_edits(self):
+        self._search('beach')
+        self.flat.title = 'Beach loft'
+        self.flat.save()
+        self.assertEqual(self._search('beach')[1], 2)
+
+    def test_api_never_returns_inactive_listings(self):
+        client = APIClient()
+        memory.get_memory_index()
+        Listing.objects.filter(pk=self.beach.pk).update(is_active=False)
+        # The process index has not checked the database yet; hydration still drops the row.
+        response = client.get('/api/search/', {'q': 'beach', 'engine': 'memory'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
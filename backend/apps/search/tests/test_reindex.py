@@ -0,0 +1,89 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.search import documents, sync
+
+
+def es_client(indices, alias=()):
+    """A mocked client holding `indices` with the `listings` alias on `alias`."""
+    client = mock.Mock()
+    client.options.return_value = client
+    client.indices.get.return_value = {name: {} for name in indices}
+    client.indices.exists_alias.return_value = bool(alias)
+    client.indices.get_alias.return_value = {name: {} for name in alias}
+    return client
+
+
+class IndexVersionTests(TestCase):
+    def test_versions(self):
+        client = es_client(['listings_v1', 'listings_v12', 'listings_vx'])
+        self.assertEqual(documents.index_versions(client), {'listings_v1': 1, 'listings_v12': 12})
+
+    def test_collect_keeps_the_live_index_and_the_newest_old_ones(self):
+        client = es_client(['listings_v1', 'listings_v2', 'listings_v3', 'listings_v4'], alias=['listings_v4'])
+        self.assertEqual(documents.collect_old_indices(client, keep=1), ['listings_v1', 'listings_v2'])
+        self.assertEqual([c.kwargs['index'] for c in client.indices.delete.call_args_list],
+                         ['listings_v1', 'listings_v2'])
+        client.indices.delete.reset_mock()
+        self.assertEqual(documents.collect_old_indices(client, keep=5), [])
+        client.indices.delete.assert_not_called()
+
+
+class ReindexTests(TestCase):
+    def setUp(self):
+        self.catch_up = self._patch(sync, 'catch_up', return_value=(0, []))
+        self._patch(documents, '_bulk_build', return_value=documents.IndexProgress(0))
+        self.reconcile = self._patch(documents, 'reconcile', return_value=[])
+
+    def _patch(self, target, name, **kwargs):
+        patcher = mock.patch.object(target, name, **kwargs)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def _reindex(self, client, counts=((5, 5),)):
+        self._patch(documents, 'get_es_client', return_value=client)
+        self._patch(documents, 'verify_index', side_effect=list(counts))
+        return documents.reindex()
+
+    def test_builds_the_next_version_and_moves_the_alias(self):
+        client = es_client(['listings_v1', 'listings_v2'], alias=['listings_v2'])
+
+        def swapped(body):
+            client.indices.get.return_value = {'listings_v1': {}, 'listings_v2': {}, 'listings_v3': {}}
+            client.indices.get_alias.return_value = {'listings_v3': {}}
+        client.indices.update_aliases.side_effect = swapped
+
+        index, _, deleted = self._reindex(client)
+        self.assertEqual(index, 'listings_v3')
+        self.assertEqual(client.indices.create.call_args.kwargs['index'], 'listings_v3')
+        self.assertEqual(client.indices.update_aliases.call_args.kwargs['body']['actions'], [
+            {'remove': {'index': 'listings_v2', 'alias': 'listings'}},
+            {'add': {'index': 'listings_v3', 'alias': 'listings'}},
+        ])
+        # Writes made during the build are replayed into the new index, then through the alias.
+        self.assertEqual([c.kwargs['index'] for c in self.catch_up.call_args_list], ['listings_v3', 'listings'])
+        self.assertEqual(deleted, ['listings_v1'])
+
+    def test_replaces_a_concrete_listings_index(self):
+        client = es_client([])
+        client.indices.exists.return_value = True
+        index, _, _ = self._reindex(client)
+        self.assertEqual(index, 'listings_v1')
+        self.assertEqual(client.indices.update_aliases.call_args.kwargs['body']['actions'], [
+            {'remove_index': {'index': 'listings'}},
+            {'add': {'index': 'listings_v1', 'alias': 'listings'}},
+        ])
+
+    def test_a_count_mismatch_is_reconciled_once(self):
+        client = es_client(['listings_v1'], alias=['listings_v1'])
+        self._reindex(client, counts=[(4, 5), (5, 5)])
+        self.reconcile.assert_called_once()
+        client.indices.update_aliases.assert_called_once()
+
+    def test_a_persistent_mismatch_leaves_the_alias_alone(self):
+        client = es_client(['listings_v1'], alias=['listings_v1'])
+        with self.assertRaises(documents.ReindexError):
+            self._reindex(client, counts=[(4, 5), (4, 5)])
+        client.indices.update_aliases.assert_not_called()
+        client.indices.delete.assert_called_once_with(index='listings_v2', ignore_unavailable=True)
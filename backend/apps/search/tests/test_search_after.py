@@ -0,0 +1,97 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.listings.pagination import decode_search_after, encode_search_after
+from apps.listings.tests.utils import clear_caches, make_listing
+from apps.search import documents
+
+
+def hits(*rows):
+    return {'hits': {'hits': [{'_id': str(pk), 'sort': [price, pk]} for price, pk in rows],
+                     'total': {'value': len(rows), 'relation': 'eq'}}}
+
+
+class ListingSortTests(TestCase):
+    def test_ordering_field_then_id(self):
+        self.assertEqual(documents.listing_sort('-price_per_night'),
+                         [{'price_per_night': {'order': 'desc'}}, {'id': {'order': 'desc'}}])
+        self.assertEqual(documents.listing_sort('nonsense'),
+                         [{'created_at': {'order': 'desc'}}, {'id': {'order': 'desc'}}])
+
+    def test_distance(self):
+        sort = documents.listing_sort('distance', near='38.7,-9.1')
+        self.assertEqual(sort[0]['_geo_distance']['location'], {'lat': 38.7, 'lon': -9.1})
+        self.assertEqual(sort[1], {'id': {'order': 'asc'}})
+
+
+class SearchAfterTests(TestCase):
+    def setUp(self):
+        self.client = mock.Mock()
+        patcher = mock.patch.object(documents, 'get_es_client', return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pages_continue_after_the_last_hit(self):
+        self.client.search.return_value = hits((50, 1), (60, 2), (70, 3))
+        ids, after, pit, _, _ = documents.search_listings_es_after('', {}, 'price_per_night', page_size=2)
+        self.assertEqual((ids, after, pit), ([1, 2], [60, 2], None))
+        body = self.client.search.call_args.kwargs['body']
+        self.assertEqual(body['size'], 3)
+        self.assertNotIn('search_after', body)
+
+        self.client.search.return_value = hits((70, 3))
+        ids, after, _, _, _ = documents.search_listings_es_after(
+            '', {}, 'price_per_night', search_after=[60, 2], page_size=2,
+        )
+        self.assertEqual((ids, after), ([3], None))
+        self.assertEqual(self.client.search.call_args.kwargs['body']['search_after'], [60, 2])
+
+    def test_point_in_time_is_opened_and_closed(self):
+        self.client.open_point_in_time.return_value = {'id': 'pit-1'}
+        self.client.search.return_value = {**hits((50, 1), (60, 2)), 'pit_id': 'pit-2'}
+        _, _, pit, _, _ = documents.search_listings_es_after('', {}, 'price_per_night', use_pit=True, page_size=1)
+        self.assertEqual(pit, 'pit-2')
+        body = self.client.search.call_args.kwargs['body']
+        self.assertEqual(body['pit']['id'], 'pit-1')
+        self.assertNotIn('index', self.client.search.call_args.kwargs)
+
+        self.client.search.return_value = {**hits((60, 2)), 'pit_id': 'pit-2'}
+        _, after, pit, _, _ = documents.search_listings_es_after(
+            '', {}, 'price_per_night', search_after=[50, 1], pit_id='pit-2', page_size=1,
+        )
+        self.assertEqual((after, pit), (None, None))
+        self.client.close_point_in_time.assert_called_once_with(id='pit-2')
+
+
+class CursorFallbackTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.api = APIClient()
+        self.listings = [make_listing(price_per_night=Decimal(price)) for price in (50, 60, 70, 80)]
+
+    def test_elasticsearch_cursor(self):
+        first, second = self.listings[:2]
+        with mock.patch.object(documents, 'search_listings_es_after',
+                               return_value=([first.pk, second.pk], [60.0, second.pk], None, 4, True)):
+            data = self.api.get('/api/search/', {'pagination': 'cursor', 'ordering': 'price_per_night',
+                                                 'page_size': 2}).data
+        self.assertEqual(data['engine'], 'elasticsearch')
+        self.assertEqual([row['id'] for row in data['results']], [first.pk, second.pk])
+        self.assertEqual(decode_search_after(data['next_cursor'], 'price_per_night'), ([60.0, second.pk], None))
+
+    def test_database_continues_an_elasticsearch_cursor(self):
+        cursor = encode_search_after('price_per_night', [60.0, self.listings[1].pk])
+        with mock.patch.object(documents, 'search_listings_es_after', side_effect=ConnectionError):
+            response = self.api.get('/api/search/', {'cursor': cursor, 'ordering': 'price_per_night',
+                                                     'page_size': 2})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertNotEqual(response.data['engine'], 'elasticsearch')
+        self.assertEqual([row['id'] for row in response.data['results']], [l.pk for l in self.listings[2:]])
+
+    def test_cursor_for_another_ordering_is_rejected(self):
+        cursor = encode_search_after('price_per_night', [60.0, 2])
+        response = self.api.get('/api/search/', {'cursor': cursor, 'ordering': '-created_at'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,36 @@
+from django.test import TestCase
+
+from apps.listings.models import Listing
+from apps.listings.tests.utils import clear_caches, make_listing
+from apps.search import suggest
+
+
+class SuggestionIndexTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        suggest._index = None
+        self.addCleanup(setattr, suggest, '_index', None)
+        self.listing = make_listing(title='Harbour loft', city='Barcelona', country='Spain')
+        make_listing(title='Old town room', city='Barcelona', country='Spain')
+
+    def _labels(self, q):
+        suggest._checked_at = 0.0  # skip the refresh interval
+        return [s['label'] for s in suggest.get_suggestion_index().suggest(q)]
+
+    def test_prefix_and_typo(self):
+        self.assertEqual(self._labels('barc')[0], 'Barcelona, Spain')
+        self.assertEqual(self._labels('barcleona')[0], 'Barcelona, Spain')
+        self.assertIn('Harbour loft', self._labels('harb'))
+
+    def test_sees_writes_that_bypass_the_cache_tokens(self):
+        self.assertIn('Harbour loft', self._labels('harb'))
+        Listing.objects.filter(pk=self.listing.pk).update(is_active=False)
+        self.assertNotIn('Harbour loft', self._labels('harb'))
+
+    def test_catch_up_leaves_the_published_index_untouched(self):
+        before = suggest.get_suggestion_index()
+        self.listing.title = 'Harbour penthouse'
+        self.listing.save()
+        self.assertIn('Harbour penthouse', self._labels('harbour'))
+        self.assertIsNot(suggest.get_suggestion_index(), before)
+        self.assertEqual([s['label'] for s in before.suggest('harbour')], ['Harbour loft'])
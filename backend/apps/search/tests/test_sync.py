@@ -0,0 +1,106 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.listings.models import Listing, ListingImage
+from apps.listings.tests.utils import clear_caches, make_listing, make_user
+from apps.reviews.models import Review
+from apps.search import documents, sync
+from apps.search.models import ListingChange
+
+
+def queued():
+    return set(ListingChange.objects.values_list('listing_id', flat=True))
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.listing = make_listing()
+        ListingChange.objects.all().delete()
+
+    def test_writes_queue_the_listing(self):
+        self.listing.title = 'Renamed'
+        self.listing.save()
+        self.assertEqual(queued(), {self.listing.pk})
+
+        ListingChange.objects.all().delete()
+        ListingImage.objects.create(listing=self.listing, url='https://example.com/a.jpg')
+        self.assertEqual(queued(), {self.listing.pk})
+
+        ListingChange.objects.all().delete()
+        Review.objects.create(listing=self.listing, author=make_user(), rating=4, comment='Fine.')
+        self.assertEqual(queued(), {self.listing.pk})
+
+    def test_host_profile_change_queues_their_listings(self):
+        other = make_listing(host=self.listing.host)
+        ListingChange.objects.all().delete()
+        self.listing.host.first_name = 'Rita'
+        self.listing.host.save()
+        self.assertEqual(queued(), {self.listing.pk, other.pk})
+
+
+class DrainTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.active = make_listing()
+        self.inactive = make_listing(is_active=False)
+        gone = make_listing()
+        self.gone_id = gone.pk
+        gone.delete()
+        self.actions = []
+
+    def _drain(self, failed=()):
+        def bulk(client, actions, batch_size=500, progress=None):
+            self.actions += list(actions)
+            return list(failed)
+        with mock.patch.object(documents, 'bulk_actions', side_effect=bulk):
+            return sync.drain_outbox(mock.Mock())
+
+    def test_upserts_active_and_deletes_the_rest(self):
+        self.active.save()  # queued twice: still one document write
+        synced, failed = self._drain()
+        self.assertEqual((synced, failed), (3, []))
+        ops = {int(action['_id']): action['_op_type'] for action in self.actions}
+        self.assertEqual(ops, {self.active.pk: 'index', self.inactive.pk: 'delete', self.gone_id: 'delete'})
+        self.assertEqual(len(self.actions), 3)
+        self.assertEqual(queued(), set())
+        self.assertEqual(self._drain(), (0, []))
+
+    def test_failed_listings_stay_queued(self):
+        synced, failed = self._drain(failed=[self.active.pk])
+        self.assertEqual(failed, [self.active.pk])
+        self.assertEqual(queued(), {self.active.pk})
+
+
+class CatchUpTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.old = make_listing()
+        self.fresh = make_listing()
+        Listing.objects.filter(pk=self.old.pk).update(updated_at=timezone.now() - timedelta(days=1))
+        ListingChange.objects.all().delete()
+        self.synced_ids = []
+
+    def _catch_up(self, failed=()):
+        def sync_listings(client, ids, index='listings', batch_size=500):
+            self.synced_ids += list(ids)
+            return list(failed)
+        with mock.patch.object(sync, 'sync_listings', side_effect=sync_listings):
+            return sync.catch_up(mock.Mock())
+
+    def test_syncs_everything_without_a_watermark(self):
+        self._catch_up()
+        self.assertEqual(sorted(self.synced_ids), [self.old.pk, self.fresh.pk])
+        self.assertIsNotNone(sync.get_watermark())
+
+    def test_writes_that_bypass_signals_are_picked_up(self):
+        sync.set_watermark('listings', timezone.now() - timedelta(hours=1))
+        self._catch_up()
+        self.assertEqual(self.synced_ids, [self.fresh.pk])
+
+    def test_failures_move_to_the_outbox(self):
+        self._catch_up(failed=[self.fresh.pk])
+        self.assertEqual(queued(), {self.fresh.pk})
@@ -4,4 +4,6 @@ from . import views
 urlpatterns = [
     path('',             views.search_listings, name='search'),
     path('autocomplete/',views.autocomplete,    name='autocomplete'),
+    path('clusters/',    views.search_clusters, name='search-clusters'),
+    path('health/',      views.search_health,   name='search-health'),
 ]
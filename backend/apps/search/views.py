@@ -1,99 +1,418 @@
+import time
+
+from django.conf import settings
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from apps.listings.models import Listing
-from apps.listings.serializers import ListingSerializer
+from apps.listings.serializers import ListingCardSerializer, ListingSerializer
 from apps.listings.filters import ListingFilter
-from django.db.models import Q
+from apps.listings.pagination import (
+    DISTANCE_ORDERING, LISTING_ORDERINGS, count_queryset, cursor_page_size, decode_search_after, encode_search_after,
+    is_cursor_request, is_search_after_cursor, keyset_page, search_after_to_keyset,
+)
+from apps.listings import geo
+from apps.listings.cache import availability_version, cache_timeout, get_cache, global_version, normalized_query
+from django.db.models import Avg, Count, F, Min, Q
+from django.db.models.functions import Substr
+from . import fts
+from .cache import PAGING_PARAMS, cached_search, get_search_cache, search_cache_key, search_cache_timeout
+from .facets import orm_facets, parse_facets
+from .client import health, latency
+from .suggest import get_suggestion_index
+
+ENGINES = ('elasticsearch', 'memory', 'sqlite-fts', 'django-orm')
+VIEWS = ('full', 'card')
 
 
-def _fallback_search(request):
-    """Django ORM search — always works, no ES required."""
-    qs = Listing.objects.filter(is_active=True).prefetch_related('images', 'reviews')
+def _filtered_queryset(request, qs=None, use_fts=False):
+    """
+    Active listings matching `q` and the ListingFilter parameters. With
+    `use_fts`, `q` goes through the SQLite FTS index and rows carry `text_rank`.
+    """
+    if qs is None:
+        qs = Listing.objects.filter(is_active=True)
     q = request.GET.get('q', '').strip()
-    if q:
+    if q and use_fts:
+        qs = fts.text_search(qs, q)
+    elif q:
         qs = qs.filter(
             Q(title__icontains=q) |
             Q(city__icontains=q)  |
             Q(country__icontains=q) |
             Q(description__icontains=q)
         )
+    return ListingFilter(request.GET, queryset=qs).qs
 
-    qs = ListingFilter(request.GET, queryset=qs).qs
 
-    ordering = request.GET.get('ordering', '-created_at')
-    # Guard against unsafe ordering values
-    safe_fields = {'price_per_night', '-price_per_night', 'created_at', '-created_at'}
-    if ordering not in safe_fields:
-        ordering = '-created_at'
-    qs = qs.order_by(ordering)
+def _timed(engine, func, *args):
+    started = time.monotonic()
+    result = func(*args)
+    latency.record(engine, time.monotonic() - started)
+    return result
+
 
+def _page_params(request):
     page      = max(1, int(request.GET.get('page', 1)))
     page_size = min(50, int(request.GET.get('page_size', 12)))
-    total     = qs.count()
-    qs        = qs[(page - 1) * page_size: page * page_size]
+    return page, page_size
 
+
+def _page_result(ids, total, page, page_size, engine):
     return {
+        'ids':         ids,
         'count':       total,
         'page':        page,
         'page_size':   page_size,
         'total_pages': max(1, (total + page_size - 1) // page_size),
-        'results':     ListingSerializer(qs, many=True).data,
-        'engine':      'django-orm',
+        'engine':      engine,
     }
 
 
-@api_view(['GET'])
-def search_listings(request):
-    page      = max(1, int(request.GET.get('page', 1)))
-    page_size = min(50, int(request.GET.get('page_size', 12)))
-    q         = request.GET.get('q', '').strip()
+def _view(request):
+    view = request.GET.get('view', 'full')
+    if view not in VIEWS:
+        raise ValueError(f'view must be one of: {", ".join(VIEWS)}.')
+    return view
 
-    try:
-        from apps.search.documents import search_listings_es
 
-        filters = {k: request.GET.get(k, '') for k in [
-            'property_type', 'city', 'country',
-            'min_price', 'max_price', 'min_guests', 'ordering',
-            'has_wifi', 'has_pool', 'has_kitchen', 'has_parking',
-            'has_ac', 'has_gym', 'has_workspace',
-        ]}
+def _hydrate(ids):
+    """
+    Active listings for `ids`, in that order, with everything ListingSerializer
+    reads. An engine that has not caught up with a deactivation yet cannot
+    bring the listing back.
+    """
+    listings_map = {
+        l.id: l for l in
+        Listing.objects.filter(id__in=ids, is_active=True).with_host_summary().prefetch_related('images')
+    }
+    return [listings_map[i] for i in ids if i in listings_map]
 
-        ids, total = search_listings_es(q, filters, page=page, page_size=page_size)
 
-        listings_map = {
-            l.id: l for l in
-            Listing.objects.filter(id__in=ids).prefetch_related('images', 'reviews')
-        }
-        listings = [listings_map[i] for i in ids if i in listings_map]
+def _cards(ids, cards=None):
+    """
+    Card payloads for `ids`, in that order. `cards` are the ones stored in
+    the search index; only ids without one are read from the database,
+    all in one query.
+    """
+    found = {pk: card for pk, card in zip(ids, cards or ()) if card is not None}
+    missing = [pk for pk in ids if pk not in found]
+    if missing:
+        rows = list(Listing.objects.filter(id__in=missing, is_active=True).card_values())
+        found.update((row['id'], card) for row, card in zip(rows, ListingCardSerializer(rows, many=True).data))
+    return [found[pk] for pk in ids if pk in found]
+
+
+def _db_engine():
+    """The database-backed engine: FTS5 when available, else LIKE scans."""
+    return 'sqlite-fts' if fts.available() else 'django-orm'
+
+
+def _fallback_search(request, use_fts=False, cursor=None):
+    """Django ORM search — always works, no ES required. Returns a page of ids."""
+    qs = _filtered_queryset(request, use_fts=use_fts)
+    # Without free text the FTS index is not involved.
+    engine = 'sqlite-fts' if use_fts and request.GET.get('q', '').strip() else 'django-orm'
+
+    ordering = request.GET.get('ordering', '-created_at')
+    # Guard against unsafe ordering values
+    if ordering not in LISTING_ORDERINGS:
+        ordering = '-created_at'
 
-        return Response({
+    if is_cursor_request(request):
+        page_size = cursor_page_size(request, 12)
+        results, next_cursor = keyset_page(
+            qs.only('id', ordering.lstrip('-')), ordering,
+            cursor=cursor or request.GET.get('cursor'), page_size=page_size,
+        )
+        total, total_exact = count_queryset(qs, request.GET.get('count'))
+        return {
+            'ids':         [l.id for l in results],
             'count':       total,
-            'page':        page,
+            'count_exact': total_exact,
             'page_size':   page_size,
-            'total_pages': max(1, (total + page_size - 1) // page_size),
-            'results':     ListingSerializer(listings, many=True).data,
-            'engine':      'elasticsearch',
-        })
+            'next_cursor': next_cursor,
+            'engine':      engine,
+        }
+
+    if use_fts and 'ordering' not in request.GET and request.GET.get('q', '').strip():
+        qs = qs.order_by('text_rank', '-created_at')  # bm25: lower is better
+    elif request.GET.get('ordering') == DISTANCE_ORDERING:
+        # `near` has annotated distance_km (and narrowed the rows when a radius applies).
+        qs = qs.order_by(F('distance_km').asc(nulls_last=True), 'id')
+    else:
+        qs = qs.order_by(ordering)
+
+    page, page_size = _page_params(request)
+    total = qs.count()
+    ids = list(qs.values_list('id', flat=True)[(page - 1) * page_size: page * page_size])
+    return _page_result(ids, total, page, page_size, engine)
+
+
+def _es_filters(request):
+    return {k: request.GET.get(k, '') for k in [
+        'property_type', 'city', 'country',
+        'min_price', 'max_price', 'min_guests', 'ordering',
+        'bbox', 'near', 'radius_km', 'amenities', 'check_in', 'check_out',
+    ] + [field for _, field in Listing.AMENITIES]}
+
+
+def _es_search(request, facets=()):
+    from apps.search.documents import search_listings_es
+
+    page, page_size = _page_params(request)
+    q = request.GET.get('q', '').strip()
+    ids, total, facet_counts, cards = search_listings_es(
+        q, _es_filters(request), page=page, page_size=page_size, facets=facets,
+        cards=_view(request) == 'card',
+    )
+    result = _page_result(ids, total, page, page_size, 'elasticsearch')
+    if facet_counts is not None:
+        result['facets'] = facet_counts
+    if cards is not None:
+        result['cards'] = cards
+    return result
+
+
+def _memory_search(request):
+    """In-process inverted index (apps.search.memory) — BM25-ranked, no DB scan."""
+    from apps.search.memory import get_memory_index
+
+    page, page_size = _page_params(request)
+    ordering = request.GET.get('ordering', '')
+    if ordering not in LISTING_ORDERINGS + (DISTANCE_ORDERING,):
+        ordering = ''
+    ids, total = get_memory_index().search(
+        request.GET.get('q', '').strip(), request.GET, ordering, page=page, page_size=page_size,
+    )
+    return _page_result(ids, total, page, page_size, 'memory')
+
+
+def _es_cursor_search(request, ordering, search_after, pit_id):
+    from apps.search.documents import search_listings_es_after
+
+    filters = _es_filters(request)
+    page_size = cursor_page_size(request, 12)
+    ids, next_after, pit_id, total, total_exact = search_listings_es_after(
+        request.GET.get('q', '').strip(), filters, ordering,
+        search_after=search_after, pit_id=pit_id,
+        use_pit=request.GET.get('pit') in ('1', 'true'),
+        page_size=page_size, count=request.GET.get('count'),
+    )
+    return {
+        'ids':         ids,
+        'count':       total,
+        'count_exact': total_exact,
+        'page_size':   page_size,
+        'next_cursor': encode_search_after(ordering, next_after, pit_id) if next_after else None,
+        'engine':      'elasticsearch',
+    }
+
+
+def _db_search(request, engine, cursor=None):
+    return _timed(engine, _fallback_search, request, engine == 'sqlite-fts', cursor)
 
+
+def _cursor_page(request, engine):
+    """
+    Cursor mode: search_after on Elasticsearch (stable at any depth), keyset
+    paging on the database. A search_after cursor is carried over to the
+    database path as an equivalent keyset cursor if ES becomes unavailable.
+    """
+    token = request.GET.get('cursor')
+    if engine not in ('', 'elasticsearch') or (token and not is_search_after_cursor(token)):
+        return _db_search(request, engine if engine in ('django-orm', 'sqlite-fts') else _db_engine())
+
+    ordering = request.GET.get('ordering', '-created_at')
+    if ordering not in LISTING_ORDERINGS:
+        ordering = '-created_at'
+    search_after, pit_id = decode_search_after(token, ordering) if token else (None, None)
+    try:
+        return _timed('elasticsearch', _es_cursor_search, request, ordering, search_after, pit_id)
     except Exception:
-        # ES unavailable — fall back to ORM silently
-        return Response(_fallback_search(request))
+        keyset = search_after_to_keyset(ordering, search_after) if search_after else None
+        return _db_search(request, _db_engine(), keyset)
+
+
+def _search_page(request, facets=()):
+    """
+    A page of ids from the requested engine or the first healthy one. With
+    `facets`, the Elasticsearch path aggregates them in the same request and
+    adds them to the page under 'facets'; other engines leave them out.
+    """
+    engine = request.GET.get('engine', '')
+    if engine and engine not in ENGINES:
+        raise ValueError(f'engine must be one of: {", ".join(ENGINES)}.')
+    if engine == 'sqlite-fts' and not fts.available():
+        raise ValueError('engine=sqlite-fts needs a SQLite database with the FTS index installed.')
+    if request.GET.get('ordering') == DISTANCE_ORDERING:
+        if not request.GET.get('near'):
+            raise ValueError('ordering=distance needs an origin: near=lat,lng.')
+        if is_cursor_request(request):
+            raise ValueError('ordering=distance supports page-number pagination only.')
+
+    if is_cursor_request(request):
+        return _cursor_page(request, engine)
+    if engine in ('django-orm', 'sqlite-fts'):
+        return _db_search(request, engine)
+    if engine == 'memory':
+        return _timed('memory', _memory_search, request)
+    try:
+        return _timed('elasticsearch', _es_search, request, facets)
+    except Exception:
+        # ES unavailable (or its circuit is open) — fall back silently,
+        # to the in-memory index first when it is enabled.
+        if getattr(settings, 'SEARCH_MEMORY_FALLBACK', False):
+            try:
+                return _timed('memory', _memory_search, request)
+            except Exception:
+                pass
+        return _db_search(request, _db_engine())
+
+
+def _add_distances(results, near):
+    """Set distance_km on each serialized hit from its own coordinates — no query needed."""
+    lat, lng = geo.parse_point(near)
+    for hit in results:
+        has_point = hit['latitude'] is not None and hit['longitude'] is not None
+        hit['distance_km'] = (
+            round(geo.haversine_km(lat, lng, hit['latitude'], hit['longitude']), 2) if has_point else None
+        )
+
+
+def _search_facets(request, names, engine):
+    """
+    Facet counts on their own: an aggregations-only Elasticsearch request
+    when ES served the hits, otherwise one aggregate query on the database.
+    """
+    if engine == 'elasticsearch':
+        from apps.search.documents import search_listings_es
+        try:
+            _, _, facets, _ = search_listings_es(
+                request.GET.get('q', '').strip(), _es_filters(request), page_size=0, facets=names,
+            )
+            return facets
+        except Exception:
+            pass
+    use_fts = engine != 'django-orm' and fts.available()
+    return orm_facets(_filtered_queryset(request, use_fts=use_fts), names)
+
+
+@api_view(['GET'])
+def search_listings(request):
+    # Cached pages are id lists; the listings themselves are always read fresh,
+    # except for view=card pages served from Elasticsearch, which carry its cards.
+    # Facets are cached under their own key, shared by every page and ordering.
+    try:
+        view = _view(request)
+        names = parse_facets(request.GET.get('facets'))
+        facet_key = search_cache_key('facets', request.GET, exclude=PAGING_PARAMS) if names else None
+        pending = names if names and get_search_cache().get(facet_key) is None else ()
+
+        def compute():
+            page = _search_page(request, pending)
+            facets = page.pop('facets', None)
+            if facets is not None:
+                get_search_cache().set(facet_key, facets, search_cache_timeout())
+            return page
+
+        if request.GET.get('pit') in ('1', 'true'):
+            page = compute()  # a point in time belongs to one client
+        else:
+            page = cached_search(search_cache_key('page', request.GET, exclude=('facets',)), compute)
+        facets = cached_search(facet_key, lambda: _search_facets(request, names, page['engine'])) if names else None
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    data = {k: v for k, v in page.items() if k not in ('ids', 'cards', 'engine')}
+    if view == 'card':
+        data['results'] = _cards(page['ids'], page.get('cards'))
+    else:
+        data['results'] = ListingSerializer(_hydrate(page['ids']), many=True).data
+    if request.GET.get('near'):
+        _add_distances(data['results'], request.GET['near'])
+    data['engine'] = page['engine']
+    if names:
+        data['facets'] = facets
+    return Response(data)
+
+
+@api_view(['GET'])
+def search_health(request):
+    """
+    Elasticsearch circuit breaker state for this process; staff also get the
+    failure details and per-engine search latency.
+    """
+    return Response(health(detail=request.user.is_staff))
 
 
 @api_view(['GET'])
 def autocomplete(request):
-    """City/country autocomplete — pure ORM, no ES dependency."""
+    """
+    City/region/country and listing-title suggestions from the in-memory
+    prefix index (apps.search.suggest) — no DB query per keystroke.
+    """
     q = request.GET.get('q', '').strip()
     if not q or len(q) < 2:
         return Response([])
+    return Response(get_suggestion_index().suggest(q))
 
-    cities = (
-        Listing.objects
-        .filter(is_active=True, city__icontains=q)
-        .values_list('city', 'country')
-        .distinct()[:8]
-    )
-    return Response([
-        {'city': c, 'country': n, 'label': f"{c}, {n}"}
-        for c, n in cities
-    ])
+
+def _zoom_precision(zoom):
+    """Geohash precision whose cells are about a quarter of a map tile wide at `zoom`."""
+    tile_width = 360.0 / (1 << zoom)
+    for precision in range(1, geo.GEOHASH_PRECISION + 1):
+        if geo.cell_size(precision)[1] <= tile_width / 4:
+            return precision
+    return geo.GEOHASH_PRECISION
+
+
+@api_view(['GET'])
+def search_clusters(request):
+    """
+    Map clusters for MapView: per geohash cell at the requested zoom, the
+    listing count, centroid and minimum price. Accepts the same filters as
+    search_listings (bbox restricts to the viewport). The stored geohash
+    already holds every zoom's cell as a prefix, so this is one GROUP BY.
+    """
+    try:
+        zoom = max(0, min(20, int(request.GET.get('zoom', 3))))
+    except ValueError:
+        return Response({'error': 'zoom must be an integer.'}, status=400)
+    precision = _zoom_precision(zoom)
+
+    cache = get_cache()
+    key = f'search:clusters:{global_version()}:{normalized_query(request)}'
+    if 'check_in' in request.GET or 'check_out' in request.GET:
+        key += f':{availability_version()}'
+    data = cache.get(key)
+    if data is None:
+        rows = (
+            _filtered_queryset(request, use_fts=fts.available())
+            .filter(geohash__gt='')
+            .annotate(cell=Substr('geohash', 1, precision))
+            .values('cell')
+            .annotate(
+                count=Count('id'),
+                latitude=Avg('latitude'),
+                longitude=Avg('longitude'),
+                min_price=Min('price_per_night'),
+                listing_id=Min('id'),
+            )
+            .order_by()
+        )
+        clusters = [{
+            'cell':       r['cell'],
+            'count':      r['count'],
+            'latitude':   round(float(r['latitude']), 6),
+            'longitude':  round(float(r['longitude']), 6),
+            'min_price':  r['min_price'],
+            'listing_id': r['listing_id'] if r['count'] == 1 else None,
+        } for r in rows]
+        data = {
+            'zoom':      zoom,
+            'precision': precision,
+            'total':     sum(c['count'] for c in clusters),
+            'clusters':  clusters,
+        }
+        cache.set(key, data, cache_timeout())
+    return Response(data)
@@ -10,7 +10,7 @@ from apps.listings.serializers import ListingSerializer
 @permission_classes([permissions.IsAuthenticated])
 def saved_listings(request):
     wl, _ = WishList.objects.get_or_create(user=request.user, name='Saved places')
-    return Response(ListingSerializer(wl.listings.all(), many=True).data)
+    return Response(ListingSerializer(wl.listings.with_host_summary().prefetch_related('images'), many=True).data)
 
 
 @api_view(['POST'])
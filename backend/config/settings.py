@@ -123,6 +123,38 @@ CORS_ALLOWED_ORIGINS = [
 ]
 CORS_ALLOW_CREDENTIALS = True
 
+# ─── Cache ────────────────────────────────────────────────────────────────────
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at Redis or
+# Memcached when running several workers so invalidations are shared.
+LOCMEM_CACHE  = 'django.core.cache.backends.locmem.LocMemCache'
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', LOCMEM_CACHE)
+SEARCH_CACHE_BACKEND = os.environ.get('SEARCH_CACHE_BACKEND', CACHE_BACKEND)
+CACHES = {
+    'default': {
+        'BACKEND':  CACHE_BACKEND,
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'stayfinder'),
+    },
+    # Search result id lists: short-lived, many distinct keys, LRU-evicted when full.
+    'search': {
+        'BACKEND':    SEARCH_CACHE_BACKEND,
+        'LOCATION':   os.environ.get('SEARCH_CACHE_LOCATION', os.environ.get('CACHE_LOCATION', 'stayfinder-search')),
+        'KEY_PREFIX': 'search',
+    },
+}
+if SEARCH_CACHE_BACKEND == LOCMEM_CACHE:
+    # Redis and Memcached hand OPTIONS to their client and bound memory
+    # themselves (maxmemory-policy allkeys-lru, -m); only LocMem takes this.
+    CACHES['search']['OPTIONS'] = {'MAX_ENTRIES': int(os.environ.get('SEARCH_CACHE_MAX_ENTRIES', 10000))}
+
+LISTING_CACHE_ALIAS   = os.environ.get('LISTING_CACHE_ALIAS', 'default')
+LISTING_CACHE_TIMEOUT = int(os.environ.get('LISTING_CACHE_TIMEOUT', 300))
+SEARCH_CACHE_ALIAS    = os.environ.get('SEARCH_CACHE_ALIAS', 'search')
+SEARCH_CACHE_TIMEOUT  = int(os.environ.get('SEARCH_CACHE_TIMEOUT', 60))
+# Serve searches from the in-process index (apps.search.memory) while ES is down.
+# Off by default: the index is built on the first request that needs it, which
+# would then wait for a full read of the listings table.
+SEARCH_MEMORY_FALLBACK = os.environ.get('SEARCH_MEMORY_FALLBACK', 'False') == 'True'
+
 # ─── Elasticsearch ────────────────────────────────────────────────────────────
 ELASTICSEARCH_DSL = {
     'default': {
@@ -131,3 +163,13 @@ ELASTICSEARCH_DSL = {
 }
 
 ELASTICSEARCH_DSL_AUTOSYNC = False  # prevents connection attempts on startup
+
+# Search requests fail fast: after ELASTICSEARCH_BREAKER_THRESHOLD consecutive
+# failures, ES is skipped for ELASTICSEARCH_BREAKER_COOLDOWN seconds while a
+# background probe waits for it to come back.
+ELASTICSEARCH_TIMEOUT           = float(os.environ.get('ELASTICSEARCH_TIMEOUT', 2))
+ELASTICSEARCH_BREAKER_THRESHOLD = int(os.environ.get('ELASTICSEARCH_BREAKER_THRESHOLD', 3))
+ELASTICSEARCH_BREAKER_COOLDOWN  = float(os.environ.get('ELASTICSEARCH_BREAKER_COOLDOWN', 30))
+
+# Replicas for each listings_v<N> index once `index_listings --reindex` has loaded it
+ELASTICSEARCH_REPLICAS = int(os.environ.get('ELASTICSEARCH_REPLICAS', 1))
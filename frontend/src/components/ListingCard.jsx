@@ -8,7 +8,7 @@ export default function ListingCard({ listing, savedIds, onSave }) {
   const [imgIdx, setImgIdx] = useState(0);
   const images = listing.images?.length
     ? listing.images
-    : [{ url: `https://picsum.photos/seed/${listing.id}/800/600` }];
+    : [{ url: listing.primary_image || `https://picsum.photos/seed/${listing.id}/800/600` }];
   const isSaved = savedIds?.includes(listing.id);
 
   return (